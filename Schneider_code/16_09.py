@@ -2,13 +2,15 @@
 #  PI -> USD -> PNG -> Apply to 3D Object Surface (Final Stable Solution)
 # ============================================================
 
-import asyncio, datetime, os, tempfile, time, traceback
+import asyncio, base64, concurrent.futures, datetime, inspect, json, math, os, ssl, tempfile, time, traceback
 import requests, urllib3
 from decimal import Decimal, ROUND_HALF_UP
 from requests.auth import HTTPBasicAuth
+from urllib.parse import urlencode
 
-from omni.usd import get_context
+from omni.usd import get_context, StageEventType
 from pxr import Sdf, UsdShade, UsdGeom
+import numpy as np
 
 # ---------------- Pillow ----------------
 try:
@@ -18,6 +20,17 @@ except ImportError:
     pipapi.install("Pillow")
     from PIL import Image, ImageDraw, ImageFont
 
+# ---------------- websockets (channel mode) ----------------
+try:
+    import websockets
+except ImportError:
+    try:
+        import omni.kit.pipapi as pipapi
+        pipapi.install("websockets")
+        import websockets
+    except Exception:
+        websockets = None
+
 # ---------------- PI Web API ----------------
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
@@ -28,6 +41,7 @@ AUTH     = HTTPBasicAuth(USERNAME, PASSWORD)
 # Define BASE_URL properly
 BASE_URL = "https://192.168.74.128/piwebapi"
 ATTR_URL = f"{BASE_URL}/elements/F1EmQmqOHC3i_kyP3ytLaQ6cSACt0PThFj8BGgrwAMKdv39AV0lOLUxRSU4wOUk3Ukc0XERBVEFCQVNFMVxB5Y2AXOWGt-awo-apnzE/attributes"
+ELEMENT_WEBID = ATTR_URL.split("/elements/")[1].split("/")[0]
 
 # PI name → USD attribute - Modified to include temp_01 through temp_11
 ATTR_MAP = {
@@ -59,17 +73,44 @@ STATIC_LABELS = [
     "Temp 11 (°C):",
 ]
 
+# PI names in panel order, one per STATIC_LABELS entry
+ORDERED_ATTRS = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
+                 "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
+                 "temp_09", "temp_10", "temp_11"]
+
 # ---------------- Config ----------------
 TARGET_PRIM = "/World/Monitor/shell"      # Mesh to apply texture to
 MAT_PATH    = "/World/Monitor/PI_PanelMat"
 POLL_SEC    = 30.0
+BATCH_READS = True                        # read all mapped tags in one /batch call
+STREAMSET_READS = True                    # read the whole element in one streamsets call
+UPDATES_MODE = True                       # after the first read, fetch only values changed since the last marker
+DEADBAND_ABS = 0.05                       # skip USD writes for changes smaller than this...
+DEADBAND_PCT = 0.5                        # ...or this percent of the last written value
+MAX_SILENCE_SEC = 300.0                   # always write a tag at least this often
+CHANNEL_MODE = True                       # receive pushed values over a PI Web API channel
+CHANNEL_URL  = BASE_URL.replace("https://", "wss://", 1) + "/streamsets/channel"
+CHANNEL_BACKOFF = (1.0, 60.0)             # reconnect delay in seconds, doubled up to the max
+CHANNEL_MAX_FAILURES = 5                  # consecutive failures before dropping back to polling
 
 # Modified image size to be taller to accommodate 11 temperature readings
 IMG_SIZE    = (1024, 768)
 BG_RGBA     = (0, 0, 0, 180)
 FONT_SIZE   = 45
+TEXT_ATLAS  = True  # blit value text from a numpy glyph atlas instead of ImageDraw.text
 PNG_DIR     = os.path.join(tempfile.gettempdir(), "pi_panel")
+TEXTURE_FORMAT = "tga-rle"  # panel texture encoding, a key of TEXTURE_ENCODINGS; see Monitor_V2.benchmark_encode()
+TEXTURE_ENCODINGS = {        # name -> (file extension, Image.save arguments)
+    "png-6":   (".png", {"format": "PNG", "compress_level": 6}),  # Pillow's default
+    "png-3":   (".png", {"format": "PNG", "compress_level": 3}),
+    "png-1":   (".png", {"format": "PNG", "compress_level": 1}),
+    "tga-rle": (".tga", {"format": "TGA", "compression": "tga_rle"}),
+    "tga":     (".tga", {"format": "TGA"}),
+    "bmp":     (".bmp", {"format": "BMP"}),
+}
 os.makedirs(PNG_DIR, exist_ok=True)
+WEBID_CACHE_FILE = os.path.join(PNG_DIR, "webid_cache.json")
+WEBID_CACHE_TTL  = 24 * 3600.0            # seconds before the name -> WebId map is listed again
 
 # ---------------- Globals ----------------
 _session         = requests.Session()
@@ -77,11 +118,21 @@ _session.auth    = AUTH
 _session.verify  = False
 
 _font            = None
+_canvas          = None          # PanelCanvas reused across updates
+_canvas_size     = None
 _mat_ready       = False
 _last_values     = {}
 _texture_path    = None
 _task            = None
 _stage_sub       = None
+_handles         = None          # {(prim_path, attr): Sdf.AttributeSpec or None}
+_handle_layer    = None
+_markers         = {}            # {name: update marker}
+_marker_webids   = {}            # {name: webid} registered for updates
+_last_written    = {}            # {name: (value, monotonic time)} last value sent to USD
+_executor        = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="pi_fetch")
+_webid_cache     = None          # {"fetched": epoch, "map": {name: webid}}
+_not_found       = set()         # names whose stream read returned 404
 
 # ============================================================
 # Basic Tools
@@ -102,6 +153,208 @@ def get_attribute_value(webid):
     r.raise_for_status()
     return r.json()["Value"]
 
+def get_attribute_values_batch(webids):
+    """Read {name: webid} in one /batch call; failed sub-requests fall back to per-tag reads"""
+    body = {name: {"Method": "GET", "Resource": f"{BASE_URL}/streams/{webid}/value"}
+            for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/batch", json=body, timeout=10)
+    r.raise_for_status()
+    results = r.json()
+    values, trips = {}, 1
+    for name, webid in webids.items():
+        sub = results.get(name) or {}
+        content = sub.get("Content")
+        if sub.get("Status") == 200 and isinstance(content, dict) and "Value" in content:
+            values[name] = content["Value"]
+            continue
+        if sub.get("Status") == 404:
+            _not_found.add(name)
+            continue
+        trips += 1
+        try:
+            values[name] = get_attribute_value(webid)
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                _not_found.add(name)
+            print(f"Read failed for {name}: {exc}")
+        except Exception as exc:
+            print(f"Read failed for {name}: {exc}")
+    return values, trips
+
+def read_attribute_values(webids):
+    """Return ({name: value}, round_trips) using the configured read mode"""
+    if BATCH_READS and len(webids) > 1:
+        return get_attribute_values_batch(webids)
+    values = {}
+    for name, webid in webids.items():
+        try:
+            values[name] = get_attribute_value(webid)
+        except requests.HTTPError as exc:
+            if exc.response is None or exc.response.status_code != 404:
+                raise
+            # Stale WebId: read_element_values() re-resolves it, as for a 404 in a batch
+            _not_found.add(name)
+            print(f"Read failed for {name}: {exc}")
+    return values, len(webids)
+
+def get_element_values():
+    """Current value of every attribute on the element in one streamsets call"""
+    params = {"selectedFields": "Items.Name;Items.WebId;Items.Value.Value;Items.Value.Timestamp"}
+    r = _session.get(f"{BASE_URL}/streamsets/{ELEMENT_WEBID}/value", params=params, timeout=10)
+    r.raise_for_status()
+    return r.json()["Items"]
+
+def read_element_values():
+    """Return ({name: webid}, {name: value}, round_trips) for the tags in ATTR_MAP"""
+    if STREAMSET_READS:
+        try:
+            items = [item for item in get_element_values() if item["Name"] in ATTR_MAP]
+            webids = {item["Name"]: item["WebId"] for item in items}
+            values = {item["Name"]: item["Value"]["Value"] for item in items if item.get("Value")}
+            return webids, values, 1
+        except Exception as exc:
+            print(f"Streamset read failed, falling back to per-attribute reads: {exc}")
+    webids, trips = resolve_webids()
+    values, n = read_attribute_values(webids)
+    trips += n
+    if _not_found:
+        # A WebId went stale: re-list the element and retry just those tags
+        stale = {name for name in _not_found if name in webids}
+        _not_found.clear()
+        webids, n = resolve_webids(refresh=True)
+        trips += n
+        retry, n = read_attribute_values({name: webids[name] for name in stale if name in webids})
+        values.update(retry)
+        trips += n
+        _not_found.clear()
+    return webids, values, trips
+
+def register_update_markers(webids):
+    """Register {name: webid} for stream updates and remember each stream's marker"""
+    global _markers, _marker_webids
+    names = {webid: name for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/streamsets/updates",
+                      params=[("webId", webid) for webid in webids.values()], timeout=10)
+    r.raise_for_status()
+    _markers = {names[item["Source"]]: item["LatestMarker"] for item in r.json().get("Items", [])
+                if item.get("Status") == "Succeeded" and item.get("Source") in names}
+    _marker_webids = dict(webids)
+
+def get_marker_updates():
+    """Return {name: latest value} for streams that changed since their marker and advance the markers"""
+    names = {marker: name for name, marker in _markers.items()}
+    r = _session.get(f"{BASE_URL}/streamsets/updates",
+                     params=[("marker", marker) for marker in _markers.values()], timeout=10)
+    r.raise_for_status()
+    values = {}
+    for item, marker in zip(r.json().get("Items", []), list(_markers.values())):
+        name = names[marker]
+        if item.get("Status") != "Succeeded":
+            _markers.pop(name, None)  # expired/failed marker: re-read and re-register next cycle
+            continue
+        _markers[name] = item["LatestMarker"]
+        events = item.get("Events") or []
+        if events:
+            values[name] = events[-1]["Value"]
+    return values
+
+def read_changed_values():
+    """Like read_element_values(), but after the first read returns only tags that changed"""
+    if UPDATES_MODE and _markers and len(_markers) == len(_marker_webids):
+        try:
+            return dict(_marker_webids), get_marker_updates(), 1
+        except Exception as exc:
+            print(f"Update markers failed, doing a full read: {exc}")
+            _markers.clear()
+    webids, values, trips = read_element_values()
+    if UPDATES_MODE and webids:
+        try:
+            register_update_markers(webids)
+            trips += 1
+        except Exception as exc:
+            print(f"Update marker registration failed: {exc}")
+    return webids, values, trips
+
+async def fetch_element_values():
+    """Run read_changed_values() on the worker thread so HTTP never blocks Kit's loop"""
+    return await asyncio.get_event_loop().run_in_executor(_executor, read_changed_values)
+
+# ============================================================
+# WebId Resolution Cache
+# ============================================================
+def _webid_cache_key():
+    return f"{BASE_URL}|{ELEMENT_WEBID}"
+
+def _load_webid_cache():
+    try:
+        with open(WEBID_CACHE_FILE, encoding="utf-8") as fh:
+            return json.load(fh).get(_webid_cache_key())
+    except Exception:
+        return None
+
+def _save_webid_cache(entry):
+    try:
+        with open(WEBID_CACHE_FILE, encoding="utf-8") as fh:
+            data = json.load(fh)
+    except Exception:
+        data = {}
+    data[_webid_cache_key()] = entry
+    tmp = WEBID_CACHE_FILE + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        json.dump(data, fh, ensure_ascii=False)
+    os.replace(tmp, WEBID_CACHE_FILE)
+
+def resolve_webids(refresh=False):
+    """Return ({name: webid}, round_trips) for ATTR_MAP, listing the element only when the cache is stale"""
+    global _webid_cache
+    if _webid_cache is None and not refresh:
+        # Cold start: trust the on-disk map, 404s and the TTL will correct it
+        _webid_cache = _load_webid_cache()
+        if _webid_cache:
+            return dict(_webid_cache["map"]), 0
+    if not refresh and _webid_cache and time.time() - _webid_cache["fetched"] < WEBID_CACHE_TTL:
+        return dict(_webid_cache["map"]), 0
+    webids = {item["Name"]: item["WebId"] for item in get_element_attributes() if item["Name"] in ATTR_MAP}
+    _webid_cache = {"fetched": time.time(), "map": webids}
+    try:
+        _save_webid_cache(_webid_cache)
+    except Exception as exc:
+        print(f"WebId cache not saved: {exc}")
+    return dict(webids), 1
+
+def filter_deadband(values):
+    """Drop values inside their tag's deadband; returns (values to write, suppressed count)
+
+    An ATTR_MAP entry may carry its own {"deadband": {"abs": ..., "pct": ...}}.
+    """
+    now = time.monotonic()
+    accepted, suppressed = {}, 0
+    for name, val in values.items():
+        try:
+            v = float(val)
+        except (TypeError, ValueError):
+            accepted[name] = val
+            continue
+        last = _last_written.get(name)
+        if last is not None and now - last[1] < MAX_SILENCE_SEC:
+            band = ATTR_MAP.get(name, {}).get("deadband", {})
+            limit = max(band.get("abs", DEADBAND_ABS), abs(last[0]) * band.get("pct", DEADBAND_PCT) / 100.0)
+            if abs(v - last[0]) < limit:
+                suppressed += 1
+                continue
+        accepted[name] = val
+    return accepted, suppressed
+
+def note_written(values, written):
+    """Make the values whose prim is in `written` the deadband reference; call after the write"""
+    now = time.monotonic()
+    for name, val in values.items():
+        if ATTR_MAP[name]["prim_path"] in written:
+            try:
+                _last_written[name] = (float(val), now)
+            except (TypeError, ValueError):
+                pass
+
 def update_usd_prim(prim_path, attr_name, value):
     stage = get_context().get_stage()
     prim  = stage.GetPrimAtPath(prim_path)
@@ -113,6 +366,91 @@ def update_usd_prim(prim_path, attr_name, value):
     attr.Set(to_float2(value))
     return True, f"{attr_name}:{fmt2(value)}"
 
+def mapped_updates(values):
+    """{name: value} -> {prim_path: {attr: value}} through ATTR_MAP"""
+    updates = {}
+    for name, val in values.items():
+        cfg = ATTR_MAP[name]
+        updates.setdefault(cfg["prim_path"], {})[cfg["attribute"]] = val
+    return updates
+
+def _resolve_handles(stage, keys):
+    """Validate the prims for keys in one pass and cache their attribute specs on the edit target"""
+    edit_target = stage.GetEditTarget()
+    layer = edit_target.GetLayer()
+    prim_paths = {prim_path for prim_path, _ in keys}
+    valid = {p for p in prim_paths if stage.GetPrimAtPath(p).IsValid()}
+    missing = sorted(prim_paths - valid)
+    if missing:
+        print(f"Prims not found (skipped until the stage changes): {missing}")
+    with Sdf.ChangeBlock():
+        for prim_path, attr_name in keys:
+            attr_spec = None
+            if prim_path in valid:
+                prim_spec = Sdf.CreatePrimInLayer(layer, edit_target.MapToSpecPath(Sdf.Path(prim_path)))
+                attr_spec = prim_spec.attributes.get(attr_name)
+                if not attr_spec:
+                    attr_spec = Sdf.AttributeSpec(prim_spec, attr_name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+            _handles[(prim_path, attr_name)] = attr_spec
+
+def build_handle_table():
+    """Resolve every ATTR_MAP prim/attribute once; invalid prims are cached as None and logged once"""
+    global _handles, _handle_layer
+    _handles = {}
+    stage = get_context().get_stage()
+    _handle_layer = stage.GetEditTarget().GetLayer() if stage else None
+    if not stage:
+        return
+    _resolve_handles(stage, [(cfg["prim_path"], cfg["attribute"]) for cfg in ATTR_MAP.values()])
+    resolved = sum(1 for spec in _handles.values() if spec is not None)
+    print(f"Handle table built: {resolved}/{len(_handles)} attributes resolved")
+
+def invalidate_handle_table():
+    """Drop the handle table; the next write rebuilds it against the current stage"""
+    global _handles, _handle_layer
+    _handles, _handle_layer = None, None
+
+def _on_stage_event(event):
+    if event.type in (int(StageEventType.OPENED), int(StageEventType.CLOSED)):
+        invalidate_handle_table()
+
+def subscribe_stage_events():
+    """Rebuild the handle table when the stage is opened, closed or reloaded"""
+    global _stage_sub
+    if _stage_sub is None:
+        _stage_sub = get_context().get_stage_event_stream().create_subscription_to_pop(
+            _on_stage_event, name="PI monitor handle table")
+
+def write_usd_batch(updates):
+    """Apply {prim_path: {attr: value}} inside one Sdf.ChangeBlock; returns the prim paths written
+
+    Each value is a lookup in the handle table plus a default Set on the cached
+    attribute spec. Paths outside ATTR_MAP are resolved once on first use.
+    """
+    stage = get_context().get_stage()
+    if not stage:
+        return set()
+    if _handles is None or _handle_layer != stage.GetEditTarget().GetLayer():
+        build_handle_table()
+    new_keys = [(p, a) for p, attrs in updates.items() for a in attrs if (p, a) not in _handles]
+    if new_keys:
+        _resolve_handles(stage, new_keys)
+    written, stale = set(), False
+    with Sdf.ChangeBlock():
+        for prim_path, attrs in updates.items():
+            for attr_name, value in attrs.items():
+                attr_spec = _handles[(prim_path, attr_name)]
+                if attr_spec is None:
+                    continue
+                if attr_spec.expired:
+                    stale = True
+                    continue
+                attr_spec.default = to_float2(value)
+                written.add(prim_path)
+    if stale:
+        invalidate_handle_table()
+    return written
+
 # ============================================================
 # UV Assurance
 # ============================================================
@@ -154,10 +492,151 @@ def _ensure_font():
         _font = ImageFont.load_default()
     return _font
 
-def _draw_png(values_dict, timestamp, path):
-    """Draw PNG with static labels and dynamic values"""
-    img = Image.new("RGBA", IMG_SIZE, (0, 0, 0, 0))
-    d = ImageDraw.Draw(img)
+class GlyphAtlas:
+    """Coverage masks of single glyphs, rasterised once per font
+
+    Value strings are composed from them with numpy alpha blits using the same
+    blend ImageDraw.text applies to RGBA images, so the two are interchangeable.
+    """
+    CHARS = "0123456789+-.,:% /°ACFNVWahkz"
+
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}       # {char: (x offset, y offset, float32 coverage, advance)}
+
+    def _glyph(self, ch):
+        g = self._glyphs.get(ch)
+        if g is None:
+            x0, y0, x1, y1 = self.font.getbbox(ch)
+            mask = Image.new("L", (max(1, x1 - x0), max(1, y1 - y0)), 0)
+            ImageDraw.Draw(mask).text((-x0, -y0), ch, fill=255, font=self.font)
+            g = self._glyphs[ch] = (x0, y0, np.asarray(mask, np.float32) / 255.0, self.font.getlength(ch))
+        return g
+
+    def layout(self, xy, text):
+        """Glyph placements for text drawn at xy, and their bounding box
+
+        Positions snap to pixels as ImageDraw.text does: x rounds half up with the
+        pen's fraction carried over, y rounds half down.
+        """
+        placed, pen = [], 0.0
+        oy = math.ceil(xy[1] - 0.5)
+        for ch in text:
+            x0, y0, cov, advance = self._glyph(ch)
+            placed.append((math.floor(xy[0] + pen + 0.5) + x0, oy + y0, cov))
+            pen += advance
+        if not placed:
+            ox = math.floor(xy[0] + 0.5)
+            return placed, (ox, oy, ox, oy)
+        return placed, (min(x for x, _, _ in placed), min(y for _, y, _ in placed),
+                         max(x + c.shape[1] for x, _, c in placed), max(y + c.shape[0] for _, y, c in placed))
+
+    def blit(self, img, placed, box, fill):
+        """Blend the placed glyphs in `fill` into img, reading and writing only box"""
+        bx0, by0, bx1, by1 = box
+        cov = np.zeros((by1 - by0, bx1 - bx0), np.float32)
+        for x, y, g in placed:
+            sub = cov[y - by0:y - by0 + g.shape[0], x - bx0:x - bx0 + g.shape[1]]
+            np.maximum(sub, g, out=sub)
+        cx0, cy0 = max(bx0, 0), max(by0, 0)
+        cx1, cy1 = min(bx1, img.width), min(by1, img.height)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        cov = cov[cy0 - by0:cy1 - by0, cx0 - bx0:cx1 - bx0, None]
+        cell = np.asarray(img.crop((cx0, cy0, cx1, cy1)), np.float32)
+        ink = np.asarray(fill, np.float32)
+        out = cell + (ink - cell) * cov
+        # Like ImageDraw, fully transparent pixels take the whole ink colour
+        clear = (cell[..., 3] == 0) & (cov[..., 0] > 0)
+        out[clear, :3] = ink[:3]
+        img.paste(Image.fromarray(np.rint(out).astype(np.uint8), "RGBA"), (cx0, cy0))
+
+_atlases = {}                   # {font: GlyphAtlas}
+
+def _atlas_for(font):
+    atlas = _atlases.get(font)
+    if atlas is None:
+        atlas = _atlases[font] = GlyphAtlas(font)
+    return atlas
+
+class PanelCanvas:
+    """Panel image whose static chrome is drawn once; cells are repainted only when they change
+
+    A changed cell is restored from the base image over the union of its old
+    and new boxes; every cell overlapping that area is then redrawn in creation
+    order, so neighbours it erased come back and the result matches a full
+    redraw. With `atlas`, text made only of GlyphAtlas.CHARS is blitted from the
+    glyph atlas.
+    """
+
+    def __init__(self, base, atlas=False):
+        self.base = base
+        self.img = base.copy()
+        self.atlas = atlas
+        self._draw = ImageDraw.Draw(self.img)
+        self._cells = {}        # {key: (box, state, paint)}
+
+    @staticmethod
+    def _grow(a, b):
+        """Union of two boxes"""
+        return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+    def cell(self, key, box, state, paint=None):
+        """Repaint `key` with paint(draw) when its state changed; returns True if pixels changed"""
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        self._cells[key] = (box, state, paint)
+        if prev is None:
+            if paint is not None:
+                paint(self._draw)
+            return True
+        # Anti-aliasing can reach a pixel past a box, hence the 1 px margins
+        pad = lambda b: (b[0] - 1, b[1] - 1, b[2] + 1, b[3] + 1)
+        dirty, redraw = pad(self._grow(prev[0], box)), {key}
+        grown = True
+        while grown:
+            # Redrawing a cell paints all of it, so the area to restore takes in its box
+            grown = False
+            for k, (b, _, _) in self._cells.items():
+                b = pad(b)
+                if k not in redraw and b[0] < dirty[2] and dirty[0] < b[2] and b[1] < dirty[3] and dirty[1] < b[3]:
+                    redraw.add(k)
+                    dirty, grown = self._grow(dirty, b), True
+        # textbbox gives fractional boxes for fractional origins; paste needs whole pixels
+        dirty = (max(0, math.floor(dirty[0])), max(0, math.floor(dirty[1])),
+                 min(self.img.width, math.ceil(dirty[2])), min(self.img.height, math.ceil(dirty[3])))
+        if dirty[2] > dirty[0] and dirty[3] > dirty[1]:
+            self.img.paste(self.base.crop(dirty), dirty[:2])
+        for k, (_, _, p) in self._cells.items():
+            if k in redraw and p is not None:
+                p(self._draw)
+        return True
+
+    def text(self, key, xy, text, fill, font):
+        state = (xy, text, fill, font)
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        if self.atlas and all(ch in GlyphAtlas.CHARS for ch in text):
+            atlas = _atlas_for(font)
+            placed, box = atlas.layout(xy, text)
+            return self.cell(key, box, state, lambda d: atlas.blit(self.img, placed, box, fill))
+        box = self._draw.textbbox(xy, text, font=font)
+        return self.cell(key, box, state, lambda d: d.text(xy, text, fill=fill, font=font))
+
+    def textlength(self, text, font):
+        return self._draw.textlength(text, font=font)
+
+    def prune(self, keep):
+        """Return every cell not in `keep` to the background"""
+        for key in [k for k in self._cells if k not in keep]:
+            self.cell(key, self._cells[key][0], None)
+            del self._cells[key]
+
+def _draw_chrome(size):
+    """Rounded panel and the static labels, drawn once per canvas"""
+    img = Image.new("RGBA", size, (0, 0, 0, 0))
     font = _ensure_font()
     
     # Simple design
@@ -167,40 +646,55 @@ def _draw_png(values_dict, timestamp, path):
     
     margin = 8
     x1, y1 = margin, margin
-    x2, y2 = IMG_SIZE[0] - margin, IMG_SIZE[1] - margin
+    x2, y2 = size[0] - margin, size[1] - margin
     
-    temp_img = Image.new("RGBA", IMG_SIZE, (0, 0, 0, 0))
+    temp_img = Image.new("RGBA", size, (0, 0, 0, 0))
     temp_draw = ImageDraw.Draw(temp_img)
     temp_draw.rounded_rectangle([x1, y1, x2, y2], radius=corner_radius, fill=bg_color)
     
     img = Image.alpha_composite(img, temp_img)
     d = ImageDraw.Draw(img)
     
+    y = 92
+    for label in STATIC_LABELS[:len(ORDERED_ATTRS)]:
+        d.text((40, y), label, fill=text_color, font=font)
+        y += 62
+    return img
+
+def _render_values(values_dict, timestamp, canvas):
+    """Repaint the header and the value cells that changed; returns the panel image"""
+    font = _ensure_font()
+    text_color = (255, 255, 255, 255)
+    
     # Header
-    header = f"PI Sync {timestamp}"
-    d.text((40, 30), header, fill=text_color, font=font)
+    canvas.text("header", (40, 30), f"PI Sync {timestamp}", text_color, font)
     
     # Temperature readings
     y = 92
     line_spacing = 62
-    
-    ordered_attrs = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
-                    "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
-                    "temp_09", "temp_10", "temp_11"]
-    
-    for i, attr_name in enumerate(ordered_attrs):
+    for i, attr_name in enumerate(ORDERED_ATTRS):
         if i < len(STATIC_LABELS):
-            label = STATIC_LABELS[i]
             value = values_dict.get(attr_name, "N/A")
             if value != "N/A":
                 value = fmt2(value)
-            line = f"{label} {value}"
-            d.text((40, y), line, fill=text_color, font=font)
+            x = 40 + canvas.textlength(STATIC_LABELS[i] + " ", font)
+            canvas.text(attr_name, (x, y), value, text_color, font)
             y += line_spacing
+    return canvas.img
+
+def save_texture(img, path):
+    """Encode `img` to `path` with the TEXTURE_FORMAT settings"""
+    img.save(path, **TEXTURE_ENCODINGS[TEXTURE_FORMAT][1])
+
+def _draw_png(values_dict, timestamp, path):
+    """Draw PNG with static labels and dynamic values"""
+    global _canvas, _canvas_size
+    if _canvas is None or _canvas_size != IMG_SIZE:
+        _canvas, _canvas_size = PanelCanvas(_draw_chrome(IMG_SIZE), atlas=TEXT_ATLAS), IMG_SIZE
     
     # Simple save - no fancy file operations
-    img.save(path, "PNG")
-    print(f"PNG created: {path}")
+    save_texture(_render_values(values_dict, timestamp, _canvas), path)
+    print(f"Texture created: {path}")
 
 def rebuild_material(force=False):
     """Create material with single stable texture file"""
@@ -209,7 +703,7 @@ def rebuild_material(force=False):
         return
 
     # Set up the texture path
-    _texture_path = os.path.join(PNG_DIR, "panel_display.png")
+    _texture_path = os.path.join(PNG_DIR, "panel_display" + TEXTURE_ENCODINGS[TEXTURE_FORMAT][0])
 
     stage = get_context().get_stage()
     if force and stage.GetPrimAtPath(MAT_PATH):
@@ -273,55 +767,135 @@ def refresh_texture(values_dict, force_update=False):
 # ============================================================
 # Main Process
 # ============================================================
+def apply_values(values):
+    """Write {name: value} to the mapped prims; returns the values actually written"""
+    values_dict = {}
+    written = write_usd_batch(mapped_updates(values))
+    note_written(values, written)
+    for name in ORDERED_ATTRS:
+        if name in values and ATTR_MAP[name]["prim_path"] in written:
+            values_dict[name] = values[name]
+    return values_dict
+
 async def _one_cycle():
     """Process one update cycle"""
-    updated = 0
+    updated, trips, suppressed = 0, 0, 0
+    t0, waited = time.perf_counter(), 0.0
     values_dict = {}
-    
-    ordered_attrs = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
-                    "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
-                    "temp_09", "temp_10", "temp_11"]
-    
+
     try:
-        all_attrs = {item["Name"]: item["WebId"] for item in get_element_attributes()}
-        
-        for name in ordered_attrs:
-            if name in all_attrs and name in ATTR_MAP:
-                webid = all_attrs[name]
-                val = get_attribute_value(webid)
-                cfg = ATTR_MAP[name]
-                ok, _ = update_usd_prim(cfg["prim_path"], cfg["attribute"], val)
-                if ok:
-                    updated += 1
-                    values_dict[name] = val
+        webids, values, trips = await fetch_element_values()
+        waited = time.perf_counter() - t0
+        values, suppressed = filter_deadband(values)
+        values_dict = apply_values(values)
+        updated = len(values_dict)
     except Exception:
         print(">>> _one_cycle error:\n", traceback.format_exc())
 
     if values_dict:
         try:
-            refresh_texture(values_dict)
+            # Tags that did not change keep their last value on the panel
+            refresh_texture({**_last_values, **values_dict})
         except Exception:
             print(">>> refresh_texture error:\n", traceback.format_exc())
 
-    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] processed {updated} sensors")
+    blocked = time.perf_counter() - t0 - waited
+    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] processed {updated} sensors in {trips} round-trips, {suppressed} suppressed by deadband "
+          f"(fetch {waited * 1000:.0f} ms off-loop, loop blocked {blocked * 1000:.0f} ms)")
     return updated
 
+# ============================================================
+# Channel (push) Mode
+# ============================================================
+def parse_channel_message(message, names_by_webid):
+    """Latest {name: value} from a PI Web API streamsets channel message"""
+    values = {}
+    for item in json.loads(message).get("Items", []):
+        name = names_by_webid.get(item.get("WebId"), item.get("Name"))
+        events = item.get("Items") or []
+        if name in ATTR_MAP and events:
+            values[name] = events[-1]["Value"]
+    return values
+
+def _channel_connect(url):
+    token = base64.b64encode(f"{USERNAME}:{PASSWORD}".encode("utf-8")).decode("ascii")
+    params = inspect.signature(websockets.connect).parameters
+    header_arg = "additional_headers" if "additional_headers" in params else "extra_headers"
+    kwargs = {header_arg: {"Authorization": f"Basic {token}"}}
+    if url.startswith("wss://"):
+        ctx = ssl.create_default_context()
+        ctx.check_hostname = False
+        ctx.verify_mode = ssl.CERT_NONE
+        kwargs["ssl"] = ctx
+    return websockets.connect(url, **kwargs)
+
+async def _channel_loop():
+    """Apply values pushed over a channel; returns when the channel is unavailable"""
+    if websockets is None:
+        print("websockets not available, using polling")
+        return
+    try:
+        webids, current, _ = await fetch_element_values()
+        current = apply_values(filter_deadband(current)[0])
+    except Exception as exc:
+        print(f"Channel setup failed, using polling: {exc}")
+        return
+    if not webids:
+        return
+    if current:
+        # includeInitialValue pushes these same values again and the deadband drops them,
+        # so the panel has to be repainted here or it keeps the 0.00 placeholder
+        try:
+            refresh_texture(current)
+        except Exception:
+            print(">>> refresh_texture error:\n", traceback.format_exc())
+    names_by_webid = {webid: name for name, webid in webids.items()}
+    query = [("webId", webid) for webid in webids.values()] + [("includeInitialValue", "true")]
+    url = f"{CHANNEL_URL}?{urlencode(query)}"
+
+    delay, failures = CHANNEL_BACKOFF[0], 0
+    while failures < CHANNEL_MAX_FAILURES:
+        try:
+            async with _channel_connect(url) as ws:
+                print(f"Channel connected ({len(webids)} streams)")
+                delay, failures = CHANNEL_BACKOFF[0], 0
+                async for message in ws:
+                    written = apply_values(filter_deadband(parse_channel_message(message, names_by_webid))[0])
+                    if written:
+                        current.update(written)
+                        try:
+                            refresh_texture(current)
+                        except Exception:
+                            print(">>> refresh_texture error:\n", traceback.format_exc())
+            reason = "closed by server"
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            reason = exc
+        failures += 1
+        print(f"Channel lost ({reason}), retry {failures}/{CHANNEL_MAX_FAILURES} in {delay:.0f}s")
+        await asyncio.sleep(delay)
+        delay = min(delay * 2, CHANNEL_BACKOFF[1])
+    print("Channel unavailable, dropping back to polling")
+
 async def _polling_loop(period=POLL_SEC):
     print("Starting PI monitoring with stable PNG display")
     try:
+        subscribe_stage_events()
+        build_handle_table()
         ensure_uv()
         rebuild_material(force=True)
         # Initial display
         test_values = {}
-        ordered_attrs = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
-                        "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
-                        "temp_09", "temp_10", "temp_11"]
-        for attr in ordered_attrs:
+        for attr in ORDERED_ATTRS:
             test_values[attr] = 0.0
         refresh_texture(test_values, force_update=True)
     except Exception:
         print(">>> init error:\n", traceback.format_exc())
 
+    if CHANNEL_MODE:
+        await _channel_loop()
+
     while True:
         try:
             await _one_cycle()
@@ -343,10 +917,11 @@ def start():
 
 def stop():
     """Stop automatic updates"""
-    global _task
+    global _task, _stage_sub
     if _task and not _task.done():
         _task.cancel()
     _task = None
+    _stage_sub = None
     print("Stopped.")
 
 def force_refresh():
@@ -358,10 +933,7 @@ def test_png():
     ensure_uv()
     rebuild_material(force=True)
     test_values = {}
-    ordered_attrs = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
-                    "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
-                    "temp_09", "temp_10", "temp_11"]
-    for i, attr in enumerate(ordered_attrs):
+    for i, attr in enumerate(ORDERED_ATTRS):
         test_values[attr] = 25.0 + i * 2.5
     
     refresh_texture(test_values, force_update=True)
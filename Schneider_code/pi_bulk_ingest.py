@@ -0,0 +1,237 @@
+# pi_bulk_ingest.py
+# Offline ingest of recorded PI data into USD time samples
+# Streams a recorded dump (CSV with a tag,timestamp,value header, or JSON lines
+# with the same keys) through the ATTR_MAP of standalone_pi_updater.py:
+#   python pi_bulk_ingest.py scene.usd dump.csv [--out incident.usda] [--attach]
+# The samples land in per-chunk clip layers under <out>_clips, stitched by <out>.
+# --attach also writes <out>_playback.usda, which puts the ingested range over
+# scene.usd for scrubbing; scene.usd itself is not modified.
+
+import csv
+import datetime
+import itertools
+import json
+import os
+import shutil
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+from pxr import Sdf, Vt
+
+from standalone_pi_updater import StandalonePIMonitor
+
+CHUNK_ROWS = 250_000  # rows parsed, converted and written at a time; bounds memory
+CLIP_SET = "piIngest"
+
+
+def read_rows(path):
+    """Yield (tag, timestamp, value) from a CSV or JSON-lines dump"""
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                yield row["tag"], row["timestamp"], row["value"]
+        else:
+            for line in f:
+                if line.strip():
+                    rec = json.loads(line)
+                    yield rec["tag"], rec["timestamp"], rec["value"]
+
+
+def read_chunks(path, size=CHUNK_ROWS):
+    rows = read_rows(path)
+    while True:
+        chunk = list(itertools.islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def to_epoch(timestamps):
+    """ISO-8601 (UTC, 'Z' suffix) or numeric timestamps -> float64 Unix seconds, vectorised"""
+    ts = np.asarray(timestamps)
+    try:
+        return ts.astype(np.float64)
+    except ValueError:
+        pass
+    try:
+        # PI writes 7 fractional digits; nanosecond units parse them without loss
+        ns = np.char.rstrip(ts.astype(str), "Z").astype("datetime64[ns]")
+        return ns.astype(np.int64) / 1e9
+    except ValueError:
+        # Explicit UTC offsets are not understood by numpy; parse this chunk one by one
+        return np.array([datetime.datetime.fromisoformat(t.replace("Z", "+00:00")).timestamp()
+                         for t in ts.astype(str)])
+
+
+def to_values(raw):
+    """Values rounded like to_float2; non-numeric ones (digital states, errors) become NaN"""
+    try:
+        values = np.asarray(raw, dtype=np.float64)
+    except (TypeError, ValueError):
+        values = np.array([v if isinstance(v, (int, float)) else _parse_float(v) for v in raw])
+    return np.round(values, 2)
+
+
+def _parse_float(v):
+    try:
+        return float(v)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def peak_rss_mb():
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def atomic_export(layer, path):
+    """Export layer to a temp file beside path and rename it over path, as _atomic_save does"""
+    tmp = path.with_name(f".{path.stem}.tmp{path.suffix}")  # same suffix keeps the file format
+    if not layer.Export(str(tmp)):
+        raise RuntimeError(f"Could not export {path}")
+    os.replace(tmp, path)
+
+
+def write_segment(path, attr_path, timecodes, values, tcps):
+    """One tag's samples from one chunk as their own clip layer, saved and released at once"""
+    layer = Sdf.Layer.CreateNew(str(path))
+    layer.timeCodesPerSecond = tcps
+    with Sdf.ChangeBlock():
+        prim_spec = Sdf.CreatePrimInLayer(layer, attr_path.GetPrimPath())
+        Sdf.AttributeSpec(prim_spec, attr_path.name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+        # Sdf has no bulk time-sample setter in Python; a usda text import of the
+        # same chunk measured no faster than these calls
+        for tc, value in zip(timecodes.tolist(), values.tolist()):
+            layer.SetTimeSample(attr_path, tc, value)
+    layer.Save()
+
+
+def stitch(segments, attr_paths, clip_dir, tcps):
+    """Layer pointing each tag's prim at its segments through one value-clip set"""
+    manifest = Sdf.Layer.CreateNew(str(clip_dir / "manifest.usda"))
+    for name in segments:
+        prim_spec = Sdf.CreatePrimInLayer(manifest, attr_paths[name].GetPrimPath())
+        Sdf.AttributeSpec(prim_spec, attr_paths[name].name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+    manifest.Save()
+
+    layer = Sdf.Layer.CreateAnonymous(".usda")
+    layer.timeCodesPerSecond = tcps
+    layer.startTimeCode = min(segs[0][0] for segs in segments.values())
+    layer.endTimeCode = max(segs[-1][1] for segs in segments.values())
+    for name, segs in segments.items():
+        prim_path = attr_paths[name].GetPrimPath()
+        end = segs[-1][1]
+        prim_spec = Sdf.CreatePrimInLayer(layer, prim_path)
+        prim_spec.SetInfo("clips", {CLIP_SET: {
+            "assetPaths": Sdf.AssetPathArray([asset for _, _, asset in segs]),
+            "primPath": str(prim_path),
+            "active": Vt.Vec2dArray([(first, i) for i, (first, _, _) in enumerate(segs)]),
+            # Identity: stage time is clip time
+            "times": Vt.Vec2dArray([(first, first) for first, _, _ in segs] + [(end, end)]),
+            "manifestAssetPath": Sdf.AssetPath(f"./{clip_dir.name}/manifest.usda"),
+        }})
+    return layer
+
+
+def ingest(monitor, dump_path, out_path, attach=False):
+    """Write every mapped sample in dump_path as value clips stitched by out_path; returns samples written
+
+    Each tag's rows in a chunk become one clip layer that is saved before the
+    next chunk is read, so memory is bounded by CHUNK_ROWS rather than by the
+    size of the dump. Rows must be in time order per tag; tags may interleave.
+    """
+    out_path = Path(out_path)
+    root = Sdf.Layer.FindOrOpen(str(monitor.usd_file_path))
+    tcps = root.timeCodesPerSecond  # match the main file so composing with it does not rescale time
+    clip_dir = out_path.with_name(f"{out_path.stem}_clips")
+    if clip_dir.exists():
+        shutil.rmtree(clip_dir)  # --out is rewritten, not appended to
+    clip_dir.mkdir(parents=True)
+
+    attr_paths = {name: Sdf.Path(cfg["prim_path"]).AppendProperty(cfg["attribute"])
+                  for name, cfg in monitor.ATTR_MAP.items()}
+    tag_index = {name: i for i, name in enumerate(monitor.ATTR_MAP)}
+    segments = {}  # {name: [(first timecode, last timecode, clip asset path)]}
+
+    rows = written = 0
+    unmapped = set()
+    t0 = time.perf_counter()
+    for chunk in read_chunks(dump_path):
+        tags = np.array([r[0] for r in chunk])
+        # Same timecode mapping as StandalonePIMonitor.to_timecode
+        timecodes = to_epoch([r[1] for r in chunk]) * tcps
+        values = to_values([r[2] for r in chunk])
+        valid = ~np.isnan(values)
+        rows += len(chunk)
+
+        for tag in np.unique(tags):
+            name = str(tag)
+            if name not in attr_paths:
+                unmapped.add(name)
+                continue
+            sel = (tags == tag) & valid
+            order = np.argsort(timecodes[sel], kind="stable")
+            tc, val = timecodes[sel][order], values[sel][order]
+            segs = segments.setdefault(name, [])
+            if segs:
+                if len(tc) and tc[0] < segs[-1][1]:
+                    raise ValueError(f"Rows for {name} go back in time around row {rows:,}; "
+                                     "the dump must list each tag's rows in time order")
+                keep = tc > segs[-1][1]  # an event on the chunk boundary is already written
+                tc, val = tc[keep], val[keep]
+            if not len(tc):
+                continue
+            path = clip_dir / f"{tag_index[name]:02d}_{len(segs):05d}.usdc"
+            write_segment(path, attr_paths[name], tc, val, tcps)
+            segs.append((float(tc[0]), float(tc[-1]), f"./{clip_dir.name}/{path.name}"))
+            written += len(tc)
+
+        elapsed = time.perf_counter() - t0
+        print(f"[Bulk ingest] {rows:,} rows, {written:,} samples, {written / elapsed:,.0f} samples/s")
+
+    if not segments:
+        print(f"[Bulk ingest] No mapped samples in {dump_path}")
+        return 0
+    atomic_export(stitch(segments, attr_paths, clip_dir, tcps), out_path)
+    elapsed = time.perf_counter() - t0
+    if unmapped:
+        print(f"[Bulk ingest] Skipped tags not in ATTR_MAP: {sorted(unmapped)}")
+    clips = sum(len(segs) for segs in segments.values())
+    print(f"[Bulk ingest] Wrote {written:,} samples from {rows:,} rows to {out_path} ({clips} clips) in {elapsed:.1f} s "
+          f"({written / max(elapsed, 1e-9):,.0f} samples/s, peak RSS {peak_rss_mb():.0f} MB)")
+
+    if attach:
+        # The main file is left alone: the ingested range is scrubbed from its own playback file
+        playback_path = out_path.with_name(f"{out_path.stem}_playback.usda")
+        playback = Sdf.Layer.CreateAnonymous(".usda")
+        main = Path(os.path.relpath(monitor.usd_file_path, playback_path.parent)).as_posix()
+        playback.subLayerPaths = [f"./{out_path.name}", main if main.startswith("../") else f"./{main}"]
+        playback.timeCodesPerSecond = tcps
+        playback.startTimeCode = min(segs[0][0] for segs in segments.values())
+        playback.endTimeCode = max(segs[-1][1] for segs in segments.values())
+        atomic_export(playback, playback_path)
+        print(f"[Bulk ingest] Open {playback_path} to scrub the ingested range over {monitor.usd_file_path.name}")
+    return written
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 3:
+        print("Usage: python pi_bulk_ingest.py <path_to_your_usd_file> <dump.csv|dump.jsonl> [--out <layer>] [--attach]")
+        sys.exit(1)
+
+    usd_file, dump = sys.argv[1], Path(sys.argv[2])
+    out = Path(usd_file).with_name(f"{dump.stem}_ingest.usda")
+    if "--out" in sys.argv:
+        out = Path(sys.argv[sys.argv.index("--out") + 1])
+
+    try:
+        ingest(StandalonePIMonitor(usd_file), dump, out, attach="--attach" in sys.argv)
+    except FileNotFoundError as e:
+        print(f"Error: {e}")
+        sys.exit(1)
@@ -0,0 +1,78 @@
+# pi_channel_standin.py
+# Local stand-in for a PI Web API streamsets channel
+# Serves the channel message format on ws://localhost so channel mode can be
+# exercised without a PI server:
+#   python pi_channel_standin.py [port] [interval_sec]
+#   python standalone_pi_updater.py scene.usd --channel-url ws://localhost:8765/streamsets/channel
+
+import asyncio
+import datetime
+import json
+import random
+import sys
+from urllib.parse import parse_qs, urlparse
+
+import websockets
+
+
+def channel_message(webids, values):
+    """Build one channel message carrying a single event per stream"""
+    ts = datetime.datetime.now(datetime.timezone.utc).isoformat().replace("+00:00", "Z")
+    return json.dumps({
+        "Links": {},
+        "Items": [
+            {
+                "WebId": webid,
+                "Name": webid,
+                "Path": "",
+                "Links": {},
+                "Items": [{
+                    "Timestamp": ts,
+                    "Value": values[webid],
+                    "UnitsAbbreviation": "",
+                    "Good": True,
+                    "Questionable": False,
+                    "Substituted": False,
+                    "Annotated": False,
+                }],
+                "UnitsAbbreviation": "",
+            }
+            for webid in webids
+        ],
+    })
+
+
+async def serve_channel(ws, interval):
+    request = getattr(ws, "request", None)
+    path = request.path if request is not None else getattr(ws, "path", "")
+    query = parse_qs(urlparse(path).query)
+    webids = query.get("webId", [])
+    print(f"[Channel stand-in] Client subscribed to {len(webids)} streams")
+
+    values = {webid: round(random.uniform(20.0, 30.0), 2) for webid in webids}
+    if query.get("includeInitialValue", ["false"])[0].lower() == "true":
+        await ws.send(channel_message(webids, values))
+
+    while True:
+        await asyncio.sleep(interval)
+        # PI only pushes streams that changed; mimic that with a random subset
+        changed = [webid for webid in webids if random.random() < 0.5]
+        for webid in changed:
+            values[webid] = round(values[webid] + random.uniform(-0.5, 0.5), 2)
+        if changed:
+            await ws.send(channel_message(changed, values))
+
+
+async def main(port, interval):
+    async with websockets.serve(lambda ws: serve_channel(ws, interval), "localhost", port):
+        print(f"[Channel stand-in] Listening on ws://localhost:{port}/streamsets/channel")
+        await asyncio.Future()
+
+
+if __name__ == "__main__":
+    port = int(sys.argv[1]) if len(sys.argv) > 1 else 8765
+    interval = float(sys.argv[2]) if len(sys.argv) > 2 else 2.0
+    try:
+        asyncio.run(main(port, interval))
+    except KeyboardInterrupt:
+        print("\nStopped by user")
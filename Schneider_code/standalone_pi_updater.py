@@ -3,19 +3,28 @@
 # Run this independently of your USD viewer
 
 import asyncio
+import base64
 import datetime
+import inspect
+import json
+import math
 import os
+import ssl
+import subprocess
+import sys
 import tempfile
 import time
 import traceback
+from collections import deque
 import requests
 import urllib3
 from decimal import Decimal, ROUND_HALF_UP
 from requests.auth import HTTPBasicAuth
 from pathlib import Path
+from urllib.parse import urlencode
 
 # USD imports
-from pxr import Usd, UsdGeom, UsdShade, Sdf
+from pxr import Usd, UsdGeom, UsdShade, Sdf, Vt
 
 # Pillow for texture generation
 try:
@@ -25,10 +34,172 @@ except ImportError:
     os.system("pip install Pillow")
     from PIL import Image, ImageDraw, ImageFont
 
+# NumPy for the glyph-atlas text blitter
+try:
+    import numpy as np
+except ImportError:
+    print("Installing numpy...")
+    os.system("pip install numpy")
+    import numpy as np
+
+# websockets for channel (push) mode; polling is used without it
+try:
+    import websockets
+except ImportError:
+    print("Installing websockets...")
+    os.system("pip install websockets")
+    try:
+        import websockets
+    except ImportError:
+        websockets = None
+
+class GlyphAtlas:
+    """Coverage masks of single glyphs, rasterised once per font
+
+    Value strings are composed from them with numpy alpha blits using the same
+    blend ImageDraw.text applies to RGBA images, so the two are interchangeable.
+    """
+    CHARS = "0123456789+-.,:% /°ACFNVWahkz"
+
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}       # {char: (x offset, y offset, float32 coverage, advance)}
+
+    def _glyph(self, ch):
+        g = self._glyphs.get(ch)
+        if g is None:
+            x0, y0, x1, y1 = self.font.getbbox(ch)
+            mask = Image.new("L", (max(1, x1 - x0), max(1, y1 - y0)), 0)
+            ImageDraw.Draw(mask).text((-x0, -y0), ch, fill=255, font=self.font)
+            g = self._glyphs[ch] = (x0, y0, np.asarray(mask, np.float32) / 255.0, self.font.getlength(ch))
+        return g
+
+    def layout(self, xy, text):
+        """Glyph placements for text drawn at xy, and their bounding box
+
+        Positions snap to pixels as ImageDraw.text does: x rounds half up with the
+        pen's fraction carried over, y rounds half down.
+        """
+        placed, pen = [], 0.0
+        oy = math.ceil(xy[1] - 0.5)
+        for ch in text:
+            x0, y0, cov, advance = self._glyph(ch)
+            placed.append((math.floor(xy[0] + pen + 0.5) + x0, oy + y0, cov))
+            pen += advance
+        if not placed:
+            ox = math.floor(xy[0] + 0.5)
+            return placed, (ox, oy, ox, oy)
+        return placed, (min(x for x, _, _ in placed), min(y for _, y, _ in placed),
+                         max(x + c.shape[1] for x, _, c in placed), max(y + c.shape[0] for _, y, c in placed))
+
+    def blit(self, img, placed, box, fill):
+        """Blend the placed glyphs in `fill` into img, reading and writing only box"""
+        bx0, by0, bx1, by1 = box
+        cov = np.zeros((by1 - by0, bx1 - bx0), np.float32)
+        for x, y, g in placed:
+            sub = cov[y - by0:y - by0 + g.shape[0], x - bx0:x - bx0 + g.shape[1]]
+            np.maximum(sub, g, out=sub)
+        cx0, cy0 = max(bx0, 0), max(by0, 0)
+        cx1, cy1 = min(bx1, img.width), min(by1, img.height)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        cov = cov[cy0 - by0:cy1 - by0, cx0 - bx0:cx1 - bx0, None]
+        cell = np.asarray(img.crop((cx0, cy0, cx1, cy1)), np.float32)
+        ink = np.asarray(fill, np.float32)
+        out = cell + (ink - cell) * cov
+        # Like ImageDraw, fully transparent pixels take the whole ink colour
+        clear = (cell[..., 3] == 0) & (cov[..., 0] > 0)
+        out[clear, :3] = ink[:3]
+        img.paste(Image.fromarray(np.rint(out).astype(np.uint8), "RGBA"), (cx0, cy0))
+
+_atlases = {}                   # {font: GlyphAtlas}
+
+def _atlas_for(font):
+    atlas = _atlases.get(font)
+    if atlas is None:
+        atlas = _atlases[font] = GlyphAtlas(font)
+    return atlas
+
+class PanelCanvas:
+    """Panel image whose static chrome is drawn once; cells are repainted only when they change
+
+    A changed cell is restored from the base image over the union of its old
+    and new boxes; every cell overlapping that area is then redrawn in creation
+    order, so neighbours it erased come back and the result matches a full
+    redraw. With `atlas`, text made only of GlyphAtlas.CHARS is blitted from the
+    glyph atlas.
+    """
+
+    def __init__(self, base, atlas=False):
+        self.base = base
+        self.img = base.copy()
+        self.atlas = atlas
+        self._draw = ImageDraw.Draw(self.img)
+        self._cells = {}        # {key: (box, state, paint)}
+
+    @staticmethod
+    def _grow(a, b):
+        """Union of two boxes"""
+        return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+    def cell(self, key, box, state, paint=None):
+        """Repaint `key` with paint(draw) when its state changed; returns True if pixels changed"""
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        self._cells[key] = (box, state, paint)
+        if prev is None:
+            if paint is not None:
+                paint(self._draw)
+            return True
+        # Anti-aliasing can reach a pixel past a box, hence the 1 px margins
+        pad = lambda b: (b[0] - 1, b[1] - 1, b[2] + 1, b[3] + 1)
+        dirty, redraw = pad(self._grow(prev[0], box)), {key}
+        grown = True
+        while grown:
+            # Redrawing a cell paints all of it, so the area to restore takes in its box
+            grown = False
+            for k, (b, _, _) in self._cells.items():
+                b = pad(b)
+                if k not in redraw and b[0] < dirty[2] and dirty[0] < b[2] and b[1] < dirty[3] and dirty[1] < b[3]:
+                    redraw.add(k)
+                    dirty, grown = self._grow(dirty, b), True
+        # textbbox gives fractional boxes for fractional origins; paste needs whole pixels
+        dirty = (max(0, math.floor(dirty[0])), max(0, math.floor(dirty[1])),
+                 min(self.img.width, math.ceil(dirty[2])), min(self.img.height, math.ceil(dirty[3])))
+        if dirty[2] > dirty[0] and dirty[3] > dirty[1]:
+            self.img.paste(self.base.crop(dirty), dirty[:2])
+        for k, (_, _, p) in self._cells.items():
+            if k in redraw and p is not None:
+                p(self._draw)
+        return True
+
+    def text(self, key, xy, text, fill, font):
+        state = (xy, text, fill, font)
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        if self.atlas and all(ch in GlyphAtlas.CHARS for ch in text):
+            atlas = _atlas_for(font)
+            placed, box = atlas.layout(xy, text)
+            return self.cell(key, box, state, lambda d: atlas.blit(self.img, placed, box, fill))
+        box = self._draw.textbbox(xy, text, font=font)
+        return self.cell(key, box, state, lambda d: d.text(xy, text, fill=fill, font=font))
+
+    def textlength(self, text, font):
+        return self._draw.textlength(text, font=font)
+
+    def prune(self, keep):
+        """Return every cell not in `keep` to the background"""
+        for key in [k for k in self._cells if k not in keep]:
+            self.cell(key, self._cells[key][0], None)
+            del self._cells[key]
+
+
 class StandalonePIMonitor:
     """Standalone PI monitor that updates USD files directly"""
     
-    def __init__(self, usd_file_path):
+    def __init__(self, usd_file_path, channel_url=None):
         # Configuration
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
         
@@ -42,6 +213,7 @@ class StandalonePIMonitor:
         
         self.BASE_URL = "https://192.168.74.128/piwebapi"
         self.ATTR_URL = f"{self.BASE_URL}/elements/F1EmQmqOHC3i_kyP3ytLaQ6cSACt0PThFj8BGgrwAMKdv39AV0lOLUxRSU4wOUk3Ukc0XERBVEFCQVNFMVxB5Y2AXOWGt-awo-apnzE/attributes"
+        self.ELEMENT_WEBID = self.ATTR_URL.split("/elements/")[1].split("/")[0]
         
         # Your existing ATTR_MAP
         self.ATTR_MAP = {
@@ -63,18 +235,59 @@ class StandalonePIMonitor:
             "Temp 05 (°C):", "Temp 06 (°C):", "Temp 07 (°C):", "Temp 08 (°C):",
             "Temp 09 (°C):", "Temp 10 (°C):", "Temp 11 (°C):",
         ]
+        self.ORDERED_ATTRS = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current",
+                              "internalCalculOutput", "temp_06", "temp_07", "temp_08",
+                              "temp_09", "temp_10", "temp_11"]  # one per STATIC_LABELS entry
         
         # Config
         self.TARGET_PRIM = "/World/Monitor/shell"
         self.MAT_PATH = "/World/Monitor/PI_PanelMat"
         self.POLL_SEC = 30.0
+        self.BATCH_READS = True  # read all mapped tags in one /batch call
+        self.STREAMSET_READS = True  # read the whole element in one streamsets call
+        self.UPDATES_MODE = True  # after the first read, fetch only values changed since the last marker
+        self.DEADBAND_ABS = 0.05  # skip USD writes for changes smaller than this...
+        self.DEADBAND_PCT = 0.5  # ...or this percent of the last written value
+        self.MAX_SILENCE_SEC = 300.0  # always write a tag at least this often
+        self.CHANNEL_MODE = True  # receive pushed values over a PI Web API channel
+        self.CHANNEL_URL = channel_url or self.BASE_URL.replace("https://", "wss://", 1) + "/streamsets/channel"
+        self.CHANNEL_BACKOFF = (1.0, 60.0)  # reconnect delay in seconds, doubled up to the max
+        self.CHANNEL_MAX_FAILURES = 5  # consecutive failures before dropping back to polling
         self.IMG_SIZE = (1024, 768)
         self.FONT_SIZE = 45
+        self.TEXT_ATLAS = True  # blit value text from a numpy glyph atlas instead of ImageDraw.text
+        # The texture is read by name outside this script, so it stays a PNG; see --bench-encode
+        self.TEXTURE_FORMAT = "png-3"  # panel texture encoding, a key of TEXTURE_ENCODINGS
+        self.TEXTURE_ENCODINGS = {  # name -> (file extension, Image.save arguments)
+            "png-6": (".png", {"format": "PNG", "compress_level": 6}),  # Pillow's default
+            "png-3": (".png", {"format": "PNG", "compress_level": 3}),
+            "png-1": (".png", {"format": "PNG", "compress_level": 1}),
+            "tga-rle": (".tga", {"format": "TGA", "compression": "tga_rle"}),
+            "tga": (".tga", {"format": "TGA"}),
+            "bmp": (".bmp", {"format": "BMP"}),
+        }
+        self.TEXTURE_RAW_SIDECAR = False  # also write panel_display.rgba: IMG_SIZE, top-down RGBA bytes
         
         # Setup directories
         self.PNG_DIR = Path(tempfile.gettempdir()) / "pi_panel"
         self.PNG_DIR.mkdir(exist_ok=True)
-        self.texture_path = self.PNG_DIR / "panel_display.png"
+        self.texture_path = self.PNG_DIR / f"panel_display{self.TEXTURE_ENCODINGS[self.TEXTURE_FORMAT][0]}"
+        self.WEBID_CACHE_FILE = self.PNG_DIR / "webid_cache.json"
+        self.WEBID_CACHE_TTL = 24 * 3600.0  # seconds before the name -> WebId map is listed again
+        # Sensor values are authored here; the main USD file sublayers it
+        self.LIVE_LAYER_PATH = self.usd_file_path.with_name(f"{self.usd_file_path.stem}_live.usda")
+        self.SAVE_MIN_INTERVAL = 10.0  # seconds between live-layer saves; later changes are coalesced
+        self.OPEN_MASKED = True  # compose only the mapped prims, with payloads unloaded
+        self.RECORD_HISTORY = False  # also record accepted values as time samples for playback
+        self.HISTORY_HOURS = 6.0  # retention window of the rolling history layer
+        self.HISTORY_LAYER_PATH = self.usd_file_path.with_name(f"{self.usd_file_path.stem}_history.usdc")
+        # Recorded history is scrubbed here: history over the main file, with the recorded time range.
+        # The main file never sees it, so it always shows the current reading at any time code.
+        self.PLAYBACK_PATH = self.usd_file_path.with_name(f"{self.usd_file_path.stem}_playback.usda")
+        self.ARCHIVE_CLIPS = False  # with RECORD_HISTORY, roll samples into hourly value-clip layers instead
+        self.ARCHIVE_DAYS = 28.0  # clips older than this are dropped from the clip set and deleted
+        self.CLIP_DIR = self.usd_file_path.parent / f"{self.usd_file_path.stem}_clips"
+        self.CLIP_SET = "piHistory"
         
         # Initialize session
         self._session = requests.Session()
@@ -83,8 +296,25 @@ class StandalonePIMonitor:
         
         # State variables
         self._font = None
+        self._canvas = None  # PanelCanvas reused across updates
         self._last_values = {}
         self._running = False
+        self._webid_cache = None  # {"fetched": epoch, "map": {name: webid}}
+        self._not_found = set()  # names whose stream read returned 404
+        self._markers = {}  # {name: update marker}
+        self._last_written = {}  # {name: (value, monotonic time)} last value sent to USD
+        self._marker_webids = {}  # {name: webid} registered for updates
+        self._stage = None  # kept open for the life of the process
+        self._live_layer = None
+        self._history_layer = None
+        self._history_times = {}  # {attribute spec path: deque of recorded timecodes, oldest first}
+        self._history_end = None  # timecode of the newest recorded sample
+        self._playback_layer = None
+        self._tcps = 24.0  # timecodes per second of the main file
+        self._clip_layer = None  # clip layer of the hour being recorded
+        self._clip_hour = None  # Unix time that hour starts at
+        self._unsaved = set()  # layers with edits not yet on disk
+        self._last_save = 0.0  # monotonic time of the last layer save
         
         print(f"[Standalone PI Monitor] Initialized for USD file: {self.usd_file_path}")
     
@@ -104,6 +334,570 @@ class StandalonePIMonitor:
         r.raise_for_status()
         return r.json()["Value"]
     
+    def get_attribute_values_batch(self, webids):
+        """Read {name: webid} in one /batch call; failed sub-requests fall back to per-tag reads"""
+        body = {name: {"Method": "GET", "Resource": f"{self.BASE_URL}/streams/{webid}/value"}
+                for name, webid in webids.items()}
+        r = self._session.post(f"{self.BASE_URL}/batch", json=body, timeout=10)
+        r.raise_for_status()
+        results = r.json()
+        values, trips = {}, 1
+        for name, webid in webids.items():
+            sub = results.get(name) or {}
+            content = sub.get("Content")
+            if sub.get("Status") == 200 and isinstance(content, dict) and "Value" in content:
+                values[name] = content["Value"]
+                continue
+            if sub.get("Status") == 404:
+                self._not_found.add(name)
+                continue
+            trips += 1
+            try:
+                values[name] = self.get_attribute_value(webid)
+            except requests.HTTPError as e:
+                if e.response is not None and e.response.status_code == 404:
+                    self._not_found.add(name)
+                print(f"[PI Monitor] Read failed for {name}: {e}")
+            except Exception as e:
+                print(f"[PI Monitor] Read failed for {name}: {e}")
+        return values, trips
+    
+    def read_attribute_values(self, webids):
+        """Return ({name: value}, round_trips) using the configured read mode"""
+        if self.BATCH_READS and len(webids) > 1:
+            return self.get_attribute_values_batch(webids)
+        values = {}
+        for name, webid in webids.items():
+            try:
+                values[name] = self.get_attribute_value(webid)
+            except requests.HTTPError as e:
+                if e.response is None or e.response.status_code != 404:
+                    raise
+                # Stale WebId: read_element_values() re-resolves it, as for a 404 in a batch
+                self._not_found.add(name)
+                print(f"[PI Monitor] Read failed for {name}: {e}")
+        return values, len(webids)
+    
+    def get_element_values(self):
+        """Current value of every attribute on the element in one streamsets call"""
+        params = {"selectedFields": "Items.Name;Items.WebId;Items.Value.Value;Items.Value.Timestamp"}
+        r = self._session.get(f"{self.BASE_URL}/streamsets/{self.ELEMENT_WEBID}/value", params=params, timeout=10)
+        r.raise_for_status()
+        return r.json()["Items"]
+    
+    def read_element_values(self):
+        """Return ({name: webid}, {name: value}, round_trips) for the tags in ATTR_MAP"""
+        if self.STREAMSET_READS:
+            try:
+                items = [item for item in self.get_element_values() if item["Name"] in self.ATTR_MAP]
+                webids = {item["Name"]: item["WebId"] for item in items}
+                values = {item["Name"]: item["Value"]["Value"] for item in items if item.get("Value")}
+                return webids, values, 1
+            except Exception as e:
+                print(f"[PI Monitor] Streamset read failed, falling back to per-attribute reads: {e}")
+        webids, trips = self.resolve_webids()
+        values, n = self.read_attribute_values(webids)
+        trips += n
+        if self._not_found:
+            # A WebId went stale: re-list the element and retry just those tags
+            stale = {name for name in self._not_found if name in webids}
+            self._not_found.clear()
+            webids, n = self.resolve_webids(refresh=True)
+            trips += n
+            retry, n = self.read_attribute_values({name: webids[name] for name in stale if name in webids})
+            values.update(retry)
+            trips += n
+            self._not_found.clear()
+        return webids, values, trips
+    
+    def register_update_markers(self, webids):
+        """Register {name: webid} for stream updates and remember each stream's marker"""
+        names = {webid: name for name, webid in webids.items()}
+        r = self._session.post(f"{self.BASE_URL}/streamsets/updates",
+                               params=[("webId", webid) for webid in webids.values()], timeout=10)
+        r.raise_for_status()
+        self._markers = {names[item["Source"]]: item["LatestMarker"] for item in r.json().get("Items", [])
+                         if item.get("Status") == "Succeeded" and item.get("Source") in names}
+        self._marker_webids = dict(webids)
+    
+    def get_marker_updates(self):
+        """Return {name: latest value} for streams that changed since their marker and advance the markers"""
+        names = {marker: name for name, marker in self._markers.items()}
+        r = self._session.get(f"{self.BASE_URL}/streamsets/updates",
+                              params=[("marker", marker) for marker in self._markers.values()], timeout=10)
+        r.raise_for_status()
+        values = {}
+        for item, marker in zip(r.json().get("Items", []), list(self._markers.values())):
+            name = names[marker]
+            if item.get("Status") != "Succeeded":
+                self._markers.pop(name, None)  # expired/failed marker: re-read and re-register next cycle
+                continue
+            self._markers[name] = item["LatestMarker"]
+            events = item.get("Events") or []
+            if events:
+                values[name] = events[-1]["Value"]
+        return values
+    
+    def read_changed_values(self):
+        """Like read_element_values(), but after the first read returns only tags that changed"""
+        if self.UPDATES_MODE and self._markers and len(self._markers) == len(self._marker_webids):
+            try:
+                return dict(self._marker_webids), self.get_marker_updates(), 1
+            except Exception as e:
+                print(f"[PI Monitor] Update markers failed, doing a full read: {e}")
+                self._markers.clear()
+        webids, values, trips = self.read_element_values()
+        if self.UPDATES_MODE and webids:
+            try:
+                self.register_update_markers(webids)
+                trips += 1
+            except Exception as e:
+                print(f"[PI Monitor] Update marker registration failed: {e}")
+        return webids, values, trips
+    
+    def _webid_cache_key(self):
+        return f"{self.BASE_URL}|{self.ELEMENT_WEBID}"
+    
+    def _load_webid_cache(self):
+        try:
+            with open(self.WEBID_CACHE_FILE, encoding="utf-8") as fh:
+                return json.load(fh).get(self._webid_cache_key())
+        except Exception:
+            return None
+    
+    def _save_webid_cache(self, entry):
+        try:
+            with open(self.WEBID_CACHE_FILE, encoding="utf-8") as fh:
+                data = json.load(fh)
+        except Exception:
+            data = {}
+        data[self._webid_cache_key()] = entry
+        tmp = self.WEBID_CACHE_FILE.with_suffix(".tmp")
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(data, fh, ensure_ascii=False)
+        os.replace(tmp, self.WEBID_CACHE_FILE)
+    
+    def resolve_webids(self, refresh=False):
+        """Return ({name: webid}, round_trips) for ATTR_MAP, listing the element only when the cache is stale"""
+        if self._webid_cache is None and not refresh:
+            # Cold start: trust the on-disk map, 404s and the TTL will correct it
+            self._webid_cache = self._load_webid_cache()
+            if self._webid_cache:
+                return dict(self._webid_cache["map"]), 0
+        if not refresh and self._webid_cache and time.time() - self._webid_cache["fetched"] < self.WEBID_CACHE_TTL:
+            return dict(self._webid_cache["map"]), 0
+        webids = {item["Name"]: item["WebId"] for item in self.get_element_attributes()
+                  if item["Name"] in self.ATTR_MAP}
+        self._webid_cache = {"fetched": time.time(), "map": webids}
+        try:
+            self._save_webid_cache(self._webid_cache)
+        except Exception as e:
+            print(f"[PI Monitor] WebId cache not saved: {e}")
+        return dict(webids), 1
+    
+    def filter_deadband(self, values):
+        """Drop values inside their tag's deadband; returns (values to write, suppressed count)
+        
+        An ATTR_MAP entry may carry its own {"deadband": {"abs": ..., "pct": ...}}.
+        """
+        now = time.monotonic()
+        accepted, suppressed = {}, 0
+        for name, val in values.items():
+            try:
+                v = float(val)
+            except (TypeError, ValueError):
+                accepted[name] = val
+                continue
+            last = self._last_written.get(name)
+            if last is not None and now - last[1] < self.MAX_SILENCE_SEC:
+                band = self.ATTR_MAP.get(name, {}).get("deadband", {})
+                limit = max(band.get("abs", self.DEADBAND_ABS),
+                            abs(last[0]) * band.get("pct", self.DEADBAND_PCT) / 100.0)
+                if abs(v - last[0]) < limit:
+                    suppressed += 1
+                    continue
+            accepted[name] = val
+        return accepted, suppressed
+    
+    def note_written(self, values):
+        """Make `values`, as actually written, the deadband reference"""
+        now = time.monotonic()
+        for name, val in values.items():
+            try:
+                self._last_written[name] = (float(val), now)
+            except (TypeError, ValueError):
+                pass
+    
+    def open_stage(self):
+        """Open the stage once and direct all edits to the live-data sublayer"""
+        if self._stage:
+            return self._stage
+        t0 = time.perf_counter()
+        root = Sdf.Layer.FindOrOpen(str(self.usd_file_path))
+        if not root:
+            print(f"[PI Monitor] Error: Could not open USD file: {self.usd_file_path}")
+            return None
+        self._tcps = root.timeCodesPerSecond
+        live = self._open_or_create(self.LIVE_LAYER_PATH)
+        # Only the live layer goes under the main file. Time samples would beat the live
+        # defaults at every time code, so history is composed in PLAYBACK_PATH instead
+        # (an earlier version sublayered it here; that entry is removed)
+        managed = [f"./{self.HISTORY_LAYER_PATH.name}", f"./{self.LIVE_LAYER_PATH.name}"]
+        wanted = managed[1:]
+        current = list(root.subLayerPaths)
+        sublayers = wanted + [path for path in current if path not in managed]
+        if sublayers != current:
+            # One-time edit so viewers of the main file pick up the live values
+            root.subLayerPaths = sublayers
+            self._atomic_save(root)
+            print(f"[PI Monitor] Sublayers of {self.usd_file_path.name} set to {wanted}")
+        if self.RECORD_HISTORY:
+            self._history_layer = self._open_or_create(self.HISTORY_LAYER_PATH)
+            self._load_history_times()
+        stage = self._compose(root, self.OPEN_MASKED)
+        stage.SetEditTarget(Usd.EditTarget(live))
+        self._stage, self._live_layer = stage, live
+        if self.RECORD_HISTORY and self.ARCHIVE_CLIPS:
+            self.author_clip_set()
+        print(f"[PI Monitor] Stage opened in {(time.perf_counter() - t0) * 1000:.0f} ms, "
+              f"writing to {self.LIVE_LAYER_PATH.name}")
+        return stage
+    
+    def _open_or_create(self, path):
+        layer = Sdf.Layer.FindOrOpen(str(path))
+        if not layer:
+            layer = Sdf.Layer.CreateNew(str(path))
+            # Match the main file so sublayering does not rescale time
+            layer.timeCodesPerSecond = self._tcps
+            layer.Save()
+        return layer
+    
+    def history_range(self):
+        """(first, last) timecode of the recorded history, or None while there is none"""
+        if self.ARCHIVE_CLIPS:
+            starts = [start for start, _ in self._clip_files()]
+            if not starts:
+                return None
+            last = self._history_end or self.to_timecode(min(max(starts) + 3600, time.time()))
+            return self.to_timecode(min(starts)), last
+        times = [t for t in self._history_times.values() if t]
+        if not times:
+            return None
+        return min(t[0] for t in times), max(t[-1] for t in times)
+    
+    def update_playback(self):
+        """Keep PLAYBACK_PATH sublayering history over the main file, with the recorded time range"""
+        span = self.history_range()
+        if span is None:
+            return
+        if self._playback_layer is None:
+            self._playback_layer = self._open_or_create(self.PLAYBACK_PATH)
+        layer = self._playback_layer
+        sublayers = [f"./{self.HISTORY_LAYER_PATH.name}", f"./{self.usd_file_path.name}"]
+        if (list(layer.subLayerPaths), layer.startTimeCode, layer.endTimeCode) == (sublayers, span[0], span[1]):
+            return
+        layer.subLayerPaths = sublayers
+        layer.timeCodesPerSecond = self._tcps
+        layer.startTimeCode, layer.endTimeCode = span
+        self._unsaved.add(layer)
+    
+    def to_timecode(self, epoch):
+        """Stage timecode for a Unix time: seconds since 1970 at the main file's timeCodesPerSecond"""
+        return epoch * self._tcps
+    
+    def _history_attr_path(self, name):
+        cfg = self.ATTR_MAP[name]
+        return Sdf.Path(cfg["prim_path"]).AppendProperty(cfg["attribute"])
+    
+    def _load_history_times(self):
+        """Index the samples already in the history layer so a restart keeps its window"""
+        layer = self._history_layer
+        self._history_times = {}
+        for name in self.ATTR_MAP:
+            attr_path = self._history_attr_path(name)
+            if layer.GetAttributeAtPath(attr_path):
+                self._history_times[attr_path] = deque(sorted(layer.ListTimeSamplesForPath(attr_path)))
+        total = sum(len(times) for times in self._history_times.values())
+        print(f"[PI Monitor] History layer {self.HISTORY_LAYER_PATH.name}: {total} samples")
+        self.trim_history(self.to_timecode(time.time()))
+    
+    def _ensure_attr_spec(self, layer, attr_path):
+        prim_spec = Sdf.CreatePrimInLayer(layer, attr_path.GetPrimPath())
+        if not prim_spec.attributes.get(attr_path.name):
+            Sdf.AttributeSpec(prim_spec, attr_path.name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+    
+    def record_samples(self, values, epoch=None):
+        """Append {name: value} as time samples at epoch (now by default) and trim the window"""
+        epoch = epoch if epoch is not None else time.time()
+        if self.ARCHIVE_CLIPS:
+            self.record_clip_samples(values, epoch)
+            return
+        layer = self._history_layer
+        tc = self.to_timecode(epoch)
+        with Sdf.ChangeBlock():
+            for name, value in values.items():
+                attr_path = self._history_attr_path(name)
+                times = self._history_times.get(attr_path)
+                if times is None:
+                    self._ensure_attr_spec(layer, attr_path)
+                    times = self._history_times[attr_path] = deque()
+                if times and tc <= times[-1]:
+                    continue  # samples are appended in time order only
+                layer.SetTimeSample(attr_path, tc, self.to_float2(value))
+                times.append(tc)
+        self._history_end = tc
+        self.trim_history(tc)
+        self._unsaved.add(layer)
+    
+    def trim_history(self, now_tc):
+        """Erase only the samples that fell out of HISTORY_HOURS since the last trim"""
+        cutoff = now_tc - self.HISTORY_HOURS * 3600 * self._tcps
+        erased = 0
+        with Sdf.ChangeBlock():
+            for attr_path, times in self._history_times.items():
+                # Keep one sample at or before the cutoff so the window starts with a value
+                while len(times) > 1 and times[1] <= cutoff:
+                    self._history_layer.EraseTimeSample(attr_path, times.popleft())
+                    erased += 1
+        if erased:
+            self._unsaved.add(self._history_layer)
+        return erased
+    
+    def _clip_path(self, hour_start):
+        stamp = datetime.datetime.fromtimestamp(hour_start, datetime.timezone.utc).strftime("%Y%m%d_%H")
+        return self.CLIP_DIR / f"{self.usd_file_path.stem}_{stamp}.usdc"
+    
+    def _clip_hour_start(self, path):
+        stamp = path.stem[len(self.usd_file_path.stem) + 1:]
+        hour = datetime.datetime.strptime(stamp, "%Y%m%d_%H").replace(tzinfo=datetime.timezone.utc)
+        return hour.timestamp()
+    
+    def _clip_files(self):
+        """[(hour start, path)] of the hourly clips in CLIP_DIR, oldest first
+
+        Other files matching the glob are skipped, so a stray copy cannot stop the
+        clip set from being authored.
+        """
+        clips = []
+        for path in self.CLIP_DIR.glob(f"{self.usd_file_path.stem}_*.usdc"):
+            try:
+                clips.append((self._clip_hour_start(path), path))
+            except ValueError:
+                print(f"[PI Monitor] Ignoring {path.name} in {self.CLIP_DIR.name}: not an hourly clip name")
+        return sorted(clips)
+    
+    def _ensure_manifest(self):
+        """Clip manifest declaring every mapped attribute, so USD knows which ones have clip values"""
+        path = self.CLIP_DIR / "manifest.usda"
+        if not path.exists():
+            layer = Sdf.Layer.CreateNew(str(path))
+            for name in self.ATTR_MAP:
+                self._ensure_attr_spec(layer, self._history_attr_path(name))
+            layer.Save()
+        return f"./{self.CLIP_DIR.name}/{path.name}"
+    
+    def author_clip_set(self):
+        """Point the clip set on every mapped prim at the hourly clips inside ARCHIVE_DAYS"""
+        self.CLIP_DIR.mkdir(exist_ok=True)
+        cutoff = time.time() - self.ARCHIVE_DAYS * 86400
+        clips = []
+        for start, path in self._clip_files():
+            if start + 3600 <= cutoff and start != self._clip_hour:
+                try:
+                    path.unlink()
+                except OSError as e:
+                    print(f"[PI Monitor] Could not delete expired clip {path.name}: {e}")
+                continue
+            clips.append((start, path))
+        if not clips:
+            return
+        asset_paths = [f"./{self.CLIP_DIR.name}/{path.name}" for _, path in clips]
+        active = [(self.to_timecode(start), i) for i, (start, _) in enumerate(clips)]
+        end = self.to_timecode(clips[-1][0] + 3600)
+        times = [(tc, tc) for tc, _ in active] + [(end, end)]  # identity: stage time is clip time
+        manifest = self._ensure_manifest()
+        # Clip metadata is anchored in the history layer, which PLAYBACK_PATH puts above
+        # the live defaults. The layer is not in this process's stage, so author specs directly
+        clip_set = {"assetPaths": Sdf.AssetPathArray(asset_paths), "active": Vt.Vec2dArray(active),
+                    "times": Vt.Vec2dArray(times), "manifestAssetPath": Sdf.AssetPath(manifest)}
+        with Sdf.ChangeBlock():
+            for prim_path in {cfg["prim_path"] for cfg in self.ATTR_MAP.values()}:
+                if not self._stage.GetPrimAtPath(prim_path).IsValid():
+                    continue
+                prim_spec = Sdf.CreatePrimInLayer(self._history_layer, prim_path)
+                prim_clips = dict(prim_spec.GetInfo("clips")) if prim_spec.HasInfo("clips") else {}
+                prim_clips[self.CLIP_SET] = dict(clip_set, primPath=prim_path)
+                prim_spec.SetInfo("clips", prim_clips)
+        self._unsaved.add(self._history_layer)
+        print(f"[PI Monitor] Clip set {self.CLIP_SET}: {len(clips)} hourly clips")
+    
+    def record_clip_samples(self, values, epoch):
+        """Append samples to the clip layer of epoch's hour, starting a new clip on rollover"""
+        hour = epoch - epoch % 3600
+        if hour != self._clip_hour:
+            if self._clip_layer is not None and self._clip_layer in self._unsaved:
+                # The finished hour is written out once and then released
+                self._atomic_save(self._clip_layer)
+                self._unsaved.discard(self._clip_layer)
+            self.CLIP_DIR.mkdir(exist_ok=True)
+            self._clip_layer = self._open_or_create(self._clip_path(hour))
+            self._clip_hour = hour
+            self.author_clip_set()
+        layer = self._clip_layer
+        tc = self.to_timecode(epoch)
+        with Sdf.ChangeBlock():
+            for name, value in values.items():
+                attr_path = self._history_attr_path(name)
+                if not layer.GetAttributeAtPath(attr_path):
+                    self._ensure_attr_spec(layer, attr_path)
+                layer.SetTimeSample(attr_path, tc, self.to_float2(value))
+        self._history_end = tc
+        self._unsaved.add(layer)
+    
+    def probe_history(self, epoch):
+        """Open the playback file fresh and read every mapped attribute around epoch; returns cost figures"""
+        rss0 = self._rss_mb()
+        t0 = time.perf_counter()
+        stage = Usd.Stage.Open(str(self.PLAYBACK_PATH))
+        open_ms = (time.perf_counter() - t0) * 1000
+        t0 = time.perf_counter()
+        found = 0
+        for offset in (0, -600, -1800):
+            tc = self.to_timecode(epoch + offset)
+            for cfg in self.ATTR_MAP.values():
+                attr = stage.GetPrimAtPath(cfg["prim_path"]).GetAttribute(cfg["attribute"])
+                found += attr.Get(tc) is not None
+        query_ms = (time.perf_counter() - t0) * 1000
+        return {"open_ms": open_ms, "query_ms": query_ms, "rss_mb": self._rss_mb() - rss0,
+                "layers": len(Sdf.Layer.GetLoadedLayers()), "found": found}
+    
+    def bench_clip_archive(self, hours_list=(24, 168, 672)):
+        """Memory to view the latest hour as the archive grows: hourly clips vs one rolling layer"""
+        values = {name: 25.0 for name in self.ATTR_MAP}
+        now = time.time() - time.time() % self.POLL_SEC
+        print(f"[PI Monitor] Clip archive benchmark, {len(values)} tags every {self.POLL_SEC:g} s")
+        for hours in hours_list:
+            for mode in ("clips", "rolling"):
+                work = Path(tempfile.mkdtemp(prefix="pi_clips_"))
+                root = work / "bench.usda"
+                stage = Usd.Stage.CreateNew(str(root))
+                for cfg in self.ATTR_MAP.values():
+                    stage.DefinePrim(cfg["prim_path"])
+                stage.GetRootLayer().Save()
+                del stage
+                
+                bench = StandalonePIMonitor(root)
+                bench.RECORD_HISTORY, bench.ARCHIVE_CLIPS = True, mode == "clips"
+                bench.HISTORY_HOURS, bench.ARCHIVE_DAYS = hours, hours / 24 + 1
+                bench.OPEN_MASKED = False
+                bench.open_stage()
+                t0 = time.perf_counter()
+                epoch = now - hours * 3600
+                while epoch <= now:
+                    bench.record_samples({k: v + (epoch % 600) / 100 for k, v in values.items()}, epoch)
+                    epoch += self.POLL_SEC
+                bench.save_layers(force=True)
+                build_s = time.perf_counter() - t0
+                del bench
+                
+                proc = subprocess.run([sys.executable, __file__, str(root), "--probe-history", str(now)],
+                                      capture_output=True, text=True)
+                if proc.returncode != 0:
+                    print(f"[PI Monitor] Probe failed:\n{proc.stderr}")
+                    return
+                r = json.loads(proc.stdout.strip().splitlines()[-1])
+                print(f"  {hours:5d} h {mode:<8} built in {build_s:6.1f} s | open {r['open_ms']:7.1f} ms  "
+                      f"query {r['query_ms']:6.1f} ms  {r['rss_mb']:7.1f} MB  {r['layers']:3d} layers  "
+                      f"{r['found']} values")
+    
+    def population_mask(self):
+        """Mask covering every prim the updater reads or writes"""
+        mask = Usd.StagePopulationMask()
+        for path in [cfg["prim_path"] for cfg in self.ATTR_MAP.values()] + [self.TARGET_PRIM, self.MAT_PATH]:
+            mask.Add(Sdf.Path(path))
+        return mask
+    
+    def _compose(self, root, masked):
+        """Compose root fully, or masked with only the payloads the mapped prims sit in loaded"""
+        if not masked:
+            return Usd.Stage.Open(root)
+        stage = Usd.Stage.OpenMasked(root, self.population_mask(), Usd.Stage.LoadNone)
+        missing = {Sdf.Path(cfg["prim_path"]) for cfg in self.ATTR_MAP.values()
+                   if not stage.GetPrimAtPath(cfg["prim_path"]).IsValid()}
+        if missing:
+            # Mapped prims behind a payload only appear once that payload is loaded
+            stage.LoadAndUnload(missing, set())
+        return stage
+    
+    def _rss_mb(self):
+        """Resident memory of this process in MB (peak RSS without psutil)"""
+        try:
+            import psutil
+            return psutil.Process().memory_info().rss / 2**20
+        except ImportError:
+            pass
+        try:
+            import resource
+        except ImportError:
+            return float("nan")
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (2**20 if sys.platform == "darwin" else 2**10)
+    
+    def probe_open(self, masked):
+        """Open the main file once without touching it; returns timing and memory figures"""
+        rss0 = self._rss_mb()
+        t0 = time.perf_counter()
+        root = Sdf.Layer.FindOrOpen(str(self.usd_file_path))
+        stage = self._compose(root, masked)
+        open_ms = (time.perf_counter() - t0) * 1000
+        prims = sum(1 for _ in stage.Traverse())
+        return {"open_ms": open_ms, "rss_mb": self._rss_mb() - rss0, "prims": prims}
+    
+    def compare_open(self):
+        """Report full vs masked open cost, each measured in a fresh process"""
+        results = {}
+        for mode in ("full", "masked"):
+            proc = subprocess.run([sys.executable, __file__, str(self.usd_file_path), "--probe-open", mode],
+                                  capture_output=True, text=True)
+            if proc.returncode != 0:
+                print(f"[PI Monitor] {mode} open failed:\n{proc.stderr}")
+                return
+            results[mode] = json.loads(proc.stdout.strip().splitlines()[-1])
+        print(f"[PI Monitor] Open comparison for {self.usd_file_path.name}:")
+        for mode, r in results.items():
+            print(f"  {mode:<7} {r['open_ms']:8.0f} ms  {r['rss_mb']:8.1f} MB  {r['prims']:7d} prims")
+        full, masked = results["full"], results["masked"]
+        print(f"  masked open is {full['open_ms'] / max(masked['open_ms'], 1e-3):.1f}x faster, "
+              f"{full['rss_mb'] - masked['rss_mb']:.1f} MB smaller")
+    
+    def _atomic_save(self, layer):
+        """Export layer to a temp file beside it and rename over the original; returns bytes written"""
+        path = Path(layer.realPath)
+        tmp = path.with_name(f".{path.stem}.tmp{path.suffix}")  # same suffix keeps the file format
+        if not layer.Export(str(tmp)):
+            raise RuntimeError(f"Could not export {path}")
+        size = tmp.stat().st_size
+        os.replace(tmp, path)
+        return size
+    
+    def save_layers(self, force=False):
+        """Save layers with edits, at most once per SAVE_MIN_INTERVAL unless forced"""
+        if not self._unsaved:
+            return False
+        now = time.monotonic()
+        if not force and now - self._last_save < self.SAVE_MIN_INTERVAL:
+            return False
+        if self.RECORD_HISTORY:
+            self.update_playback()
+        for layer in list(self._unsaved):
+            t0 = time.perf_counter()
+            size = self._atomic_save(layer)
+            print(f"[PI Monitor] Saved {Path(layer.realPath).name}: {size} bytes in "
+                  f"{(time.perf_counter() - t0) * 1000:.1f} ms")
+        self._unsaved.clear()
+        self._last_save = now
+        return True
+    
     def update_usd_prim(self, stage, prim_path, attr_name, value):
         """Update USD prim attribute in the stage"""
         prim = stage.GetPrimAtPath(prim_path)
@@ -128,10 +922,9 @@ class StandalonePIMonitor:
             self._font = ImageFont.load_default()
         return self._font
     
-    def create_display_texture(self, values_dict, timestamp):
-        """Create the PI display texture PNG"""
+    def _draw_chrome(self):
+        """Rounded panel and the static labels, drawn once per canvas"""
         img = Image.new("RGBA", self.IMG_SIZE, (0, 0, 0, 0))
-        d = ImageDraw.Draw(img)
         font = self._ensure_font()
         
         # Simple design
@@ -150,31 +943,76 @@ class StandalonePIMonitor:
         img = Image.alpha_composite(img, temp_img)
         d = ImageDraw.Draw(img)
         
+        y = 92
+        for label in self.STATIC_LABELS[:len(self.ORDERED_ATTRS)]:
+            d.text((40, y), label, fill=text_color, font=font)
+            y += 62
+        return img
+    
+    def render_display(self, values_dict, timestamp):
+        """Repaint the header and the value cells that changed; returns the panel image"""
+        if self._canvas is None or self._canvas.img.size != self.IMG_SIZE:
+            self._canvas = PanelCanvas(self._draw_chrome(), atlas=self.TEXT_ATLAS)
+        canvas = self._canvas
+        font = self._ensure_font()
+        text_color = (255, 255, 255, 255)
+        
         # Header
-        header = f"PI Sync {timestamp}"
-        d.text((40, 30), header, fill=text_color, font=font)
+        canvas.text("header", (40, 30), f"PI Sync {timestamp}", text_color, font)
         
         # Temperature readings
         y = 92
         line_spacing = 62
-        
-        ordered_attrs = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
-                        "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
-                        "temp_09", "temp_10", "temp_11"]
-        
-        for i, attr_name in enumerate(ordered_attrs):
+        for i, attr_name in enumerate(self.ORDERED_ATTRS):
             if i < len(self.STATIC_LABELS):
-                label = self.STATIC_LABELS[i]
                 value = values_dict.get(attr_name, "N/A")
                 if value != "N/A":
                     value = self.fmt2(value)
-                line = f"{label} {value}"
-                d.text((40, y), line, fill=text_color, font=font)
+                x = 40 + canvas.textlength(self.STATIC_LABELS[i] + " ", font)
+                canvas.text(attr_name, (x, y), value, text_color, font)
                 y += line_spacing
-        
-        img.save(self.texture_path, "PNG")
+        return canvas.img
+    
+    def create_display_texture(self, values_dict, timestamp):
+        """Create the PI display texture PNG"""
+        self.save_texture(self.render_display(values_dict, timestamp))
         print(f"[PI Monitor] Texture updated: {self.texture_path}")
     
+    def save_texture(self, img):
+        """Encode the panel with the TEXTURE_FORMAT settings, plus the raw sidecar when enabled"""
+        img.save(self.texture_path, **self.TEXTURE_ENCODINGS[self.TEXTURE_FORMAT][1])
+        if self.TEXTURE_RAW_SIDECAR:
+            # Replaced in one step so a viewer polling the file never reads half a frame
+            raw_path = self.texture_path.with_suffix(".rgba")
+            tmp_path = raw_path.with_name(f".{raw_path.name}.tmp")
+            tmp_path.write_bytes(img.tobytes())
+            os.replace(tmp_path, raw_path)
+    
+    def bench_encode(self, sizes=((1024, 768), (1200, 600)), repeat=20):
+        """Encode-and-write time and file size of the panel for every TEXTURE_ENCODINGS entry"""
+        values = {name: 20.0 + i * 1.37 for i, name in enumerate(self.ORDERED_ATTRS)}
+        saved = self.IMG_SIZE
+        try:
+            for size in sizes:
+                self.IMG_SIZE, self._canvas = size, None
+                img = self.render_display(values, "00:00:00")
+                # "raw" is the RGBA buffer as is, the floor for any encoder
+                for fmt, (ext, params) in list(self.TEXTURE_ENCODINGS.items()) + [("raw", (".rgba", None))]:
+                    path = self.PNG_DIR / f"bench_encode{ext}"
+                    t0 = time.perf_counter()
+                    for _ in range(repeat):
+                        if params is None:
+                            path.write_bytes(img.tobytes())
+                        else:
+                            img.save(path, **params)
+                    ms = (time.perf_counter() - t0) / repeat * 1000
+                    kib = path.stat().st_size / 1024
+                    path.unlink()
+                    mark = "  <- TEXTURE_FORMAT" if fmt == self.TEXTURE_FORMAT else ""
+                    print(f"  {size[0]}x{size[1]} {fmt:<8} {ms:6.1f} ms {kib:7.0f} KiB{mark}")
+        finally:
+            self.IMG_SIZE, self._canvas = saved, None
+    
     def setup_material_and_uv(self, stage):
         """Set up UV mapping and material for the display"""
         # Ensure UV mapping exists
@@ -230,77 +1068,220 @@ class StandalonePIMonitor:
         
         # Bind material to target prim
         UsdShade.MaterialBindingAPI.Apply(prim).Bind(mat)
+        self._unsaved.add(self._live_layer)
         print("[PI Monitor] Material setup complete")
     
+    def write_usd_batch(self, stage, updates):
+        """Apply {prim_path: {attr: value}} inside one Sdf.ChangeBlock; returns the prim paths written
+        
+        Prims are validated on the composed stage first; the writes themselves go
+        through Sdf specs on the edit target so missing attributes are created in
+        the same block.
+        """
+        edit_target = stage.GetEditTarget()
+        layer = edit_target.GetLayer()
+        valid = []
+        for prim_path in updates:
+            if stage.GetPrimAtPath(prim_path).IsValid():
+                valid.append(prim_path)
+            else:
+                print(f"[PI Monitor] Warning: Prim not found: {prim_path}")
+        with Sdf.ChangeBlock():
+            for prim_path in valid:
+                prim_spec = Sdf.CreatePrimInLayer(layer, edit_target.MapToSpecPath(Sdf.Path(prim_path)))
+                for attr_name, value in updates[prim_path].items():
+                    attr_spec = prim_spec.attributes.get(attr_name)
+                    if not attr_spec:
+                        attr_spec = Sdf.AttributeSpec(prim_spec, attr_name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+                    attr_spec.default = self.to_float2(value)
+        return set(valid)
+    
+    def write_values(self, stage, values):
+        """Write {name: value} to the mapped prims in one batch; returns the values actually written"""
+        updates = {}
+        for name, val in values.items():
+            cfg = self.ATTR_MAP.get(name)
+            if cfg:
+                updates.setdefault(cfg["prim_path"], {})[cfg["attribute"]] = val
+        written = self.write_usd_batch(stage, updates)
+        written = {name: val for name, val in values.items()
+                   if name in self.ATTR_MAP and self.ATTR_MAP[name]["prim_path"] in written}
+        self.note_written(written)
+        if written:
+            self._unsaved.add(self._live_layer)
+            if self.RECORD_HISTORY:
+                self.record_samples(written)
+        return written
+    
     def one_cycle(self):
         """Process one update cycle"""
         print(f"[PI Monitor] Starting update cycle at {datetime.datetime.now().strftime('%H:%M:%S')}")
         
         try:
-            # Open the USD stage
-            stage = Usd.Stage.Open(str(self.usd_file_path))
+            stage = self.open_stage()
             if not stage:
-                print(f"[PI Monitor] Error: Could not open USD file: {self.usd_file_path}")
                 return
             
             updated = 0
+            trips = 0
+            suppressed = 0
             values_dict = {}
-            
-            ordered_attrs = ["temperature", "TemperatureSetpoint", "PowerUsage", "Current", 
-                            "internalCalculOutput", "temp_06", "temp_07", "temp_08", 
-                            "temp_09", "temp_10", "temp_11"]
+            fallback = False
             
             # Fetch PI data
             try:
-                all_attrs = {item["Name"]: item["WebId"] for item in self.get_element_attributes()}
-                
-                for name in ordered_attrs:
-                    if name in all_attrs and name in self.ATTR_MAP:
-                        webid = all_attrs[name]
-                        val = self.get_attribute_value(webid)
-                        cfg = self.ATTR_MAP[name]
-                        
-                        # Update USD prim
-                        if self.update_usd_prim(stage, cfg["prim_path"], cfg["attribute"], val):
-                            updated += 1
-                            values_dict[name] = val
+                webids, values, trips = self.read_changed_values()
+                values, suppressed = self.filter_deadband(values)
+                values_dict = self.write_values(stage, values)
+                updated = len(values_dict)
                 
             except Exception as e:
                 print(f"[PI Monitor] Error fetching PI data: {e}")
                 # Use test values if PI connection fails
-                for i, attr in enumerate(ordered_attrs):
+                for i, attr in enumerate(self.ORDERED_ATTRS):
                     values_dict[attr] = 25.0 + i * 2.5
+                fallback = True
                 updated = len(values_dict)
                 print("[PI Monitor] Using test values due to PI connection error")
             
             # Update display texture
             if values_dict:
+                # Tags that did not change keep their last value on the panel. Test values
+                # are only drawn: once PI is back, update markers and the deadband return
+                # just the tags that changed, so merged ones would stay on the panel.
+                merged = values_dict if fallback else {**self._last_values, **values_dict}
                 timestamp = datetime.datetime.now().strftime("%H:%M:%S")
-                self.create_display_texture(values_dict, timestamp)
+                self.create_display_texture(merged, timestamp)
                 
                 # Set up material if needed (first run)
                 if not self._last_values:
                     self.setup_material_and_uv(stage)
                 
-                self._last_values = values_dict.copy()
+                if not fallback:
+                    self._last_values = merged
             
-            # Save the stage
-            stage.Save()
-            print(f"[PI Monitor] Updated {updated} sensors, USD file saved")
+            # Only the live-data layer is written; the main file is untouched
+            saved = self.save_layers()
+            print(f"[PI Monitor] Updated {updated} sensors in {trips} round-trips, "
+                  f"{suppressed} suppressed by deadband, "
+                  f"{'layers saved' if saved else 'save deferred' if self._unsaved else 'nothing to save'}")
             
         except Exception as e:
             print(f"[PI Monitor] Error in update cycle: {e}")
             traceback.print_exc()
     
+    def parse_channel_message(self, message, names_by_webid):
+        """Latest {name: value} from a PI Web API streamsets channel message"""
+        values = {}
+        for item in json.loads(message).get("Items", []):
+            name = names_by_webid.get(item.get("WebId"), item.get("Name"))
+            events = item.get("Items") or []
+            if name in self.ATTR_MAP and events:
+                values[name] = events[-1]["Value"]
+        return values
+    
+    def apply_pushed_values(self, values):
+        """Write values received over the channel, refresh the texture and save"""
+        stage = self.open_stage()
+        if not stage:
+            return
+        values, suppressed = self.filter_deadband(values)
+        written = self.write_values(stage, values)
+        if not written:
+            return
+        merged = {**self._last_values, **written}
+        self.create_display_texture(merged, datetime.datetime.now().strftime("%H:%M:%S"))
+        if not self._last_values:
+            self.setup_material_and_uv(stage)
+        self._last_values = merged
+        saved = self.save_layers()
+        print(f"[PI Monitor] Channel update: {len(written)} sensors, {suppressed} suppressed by deadband"
+              f"{', layers saved' if saved else ''}")
+    
+    def _channel_connect(self, url):
+        token = base64.b64encode(f"{self.USERNAME}:{self.PASSWORD}".encode("utf-8")).decode("ascii")
+        params = inspect.signature(websockets.connect).parameters
+        header_arg = "additional_headers" if "additional_headers" in params else "extra_headers"
+        kwargs = {header_arg: {"Authorization": f"Basic {token}"}}
+        if url.startswith("wss://"):
+            ctx = ssl.create_default_context()
+            ctx.check_hostname = False
+            ctx.verify_mode = ssl.CERT_NONE
+            kwargs["ssl"] = ctx
+        return websockets.connect(url, **kwargs)
+    
+    async def channel_loop(self):
+        """Apply values pushed over a channel; returns when the channel is unavailable"""
+        if websockets is None:
+            print("[PI Monitor] websockets not available, using polling")
+            return
+        try:
+            webids, values, _ = self.read_element_values()
+        except Exception as e:
+            print(f"[PI Monitor] Could not resolve WebIds ({e}), trying cached map")
+            webids, values = (self._load_webid_cache() or {}).get("map", {}), {}
+        if not webids:
+            print("[PI Monitor] No WebIds to subscribe to, using polling")
+            return
+        if values:
+            self.apply_pushed_values(values)
+        names_by_webid = {webid: name for name, webid in webids.items()}
+        query = [("webId", webid) for webid in webids.values()] + [("includeInitialValue", "true")]
+        url = f"{self.CHANNEL_URL}?{urlencode(query)}"
+        
+        delay, failures = self.CHANNEL_BACKOFF[0], 0
+        flusher = asyncio.create_task(self._flush_loop())
+        try:
+            while self._running and failures < self.CHANNEL_MAX_FAILURES:
+                try:
+                    async with self._channel_connect(url) as ws:
+                        print(f"[PI Monitor] Channel connected: {self.CHANNEL_URL} ({len(webids)} streams)")
+                        delay, failures = self.CHANNEL_BACKOFF[0], 0
+                        async for message in ws:
+                            try:
+                                self.apply_pushed_values(self.parse_channel_message(message, names_by_webid))
+                            except Exception as e:
+                                print(f"[PI Monitor] Error applying channel message: {e}")
+                    reason = "closed by server"
+                except Exception as e:
+                    reason = e
+                failures += 1
+                print(f"[PI Monitor] Channel lost ({reason}), retry {failures}/{self.CHANNEL_MAX_FAILURES} in {delay:.0f}s")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.CHANNEL_BACKOFF[1])
+        finally:
+            flusher.cancel()
+        print("[PI Monitor] Channel unavailable, dropping back to polling")
+    
+    async def _flush_loop(self):
+        """Save edits that SAVE_MIN_INTERVAL deferred even when no further message arrives"""
+        while True:
+            await asyncio.sleep(self.SAVE_MIN_INTERVAL)
+            try:
+                if self.save_layers():
+                    print("[PI Monitor] Deferred channel edits saved")
+            except Exception as e:
+                print(f"[PI Monitor] Error saving layers: {e}")
+    
     def start(self):
         """Start the monitoring loop"""
         self._running = True
-        print(f"[PI Monitor] Starting standalone monitoring (polling every {self.POLL_SEC} seconds)")
+        mode = "channel, polling fallback" if self.CHANNEL_MODE else "polling"
+        print(f"[PI Monitor] Starting standalone monitoring ({mode}, polling every {self.POLL_SEC} seconds)")
         print(f"[PI Monitor] USD file: {self.usd_file_path}")
+        print(f"[PI Monitor] Live-data layer: {self.LIVE_LAYER_PATH}")
+        if self.RECORD_HISTORY and self.ARCHIVE_CLIPS:
+            print(f"[PI Monitor] Archiving {self.ARCHIVE_DAYS:g} days of hourly clips to {self.CLIP_DIR}")
+        elif self.RECORD_HISTORY:
+            print(f"[PI Monitor] Recording {self.HISTORY_HOURS:g} h of history to {self.HISTORY_LAYER_PATH}")
+        if self.RECORD_HISTORY:
+            print(f"[PI Monitor] Open {self.PLAYBACK_PATH.name} to scrub the recorded range")
         print(f"[PI Monitor] Texture output: {self.texture_path}")
         print("[PI Monitor] Press Ctrl+C to stop")
         
         try:
+            if self.CHANNEL_MODE:
+                asyncio.run(self.channel_loop())
             while self._running:
                 self.one_cycle()
                 time.sleep(self.POLL_SEC)
@@ -309,6 +1290,9 @@ class StandalonePIMonitor:
         except Exception as e:
             print(f"[PI Monitor] Error: {e}")
             traceback.print_exc()
+        finally:
+            # Flush edits held back by SAVE_MIN_INTERVAL
+            self.save_layers(force=True)
     
     def stop(self):
         """Stop the monitoring loop"""
@@ -316,18 +1300,36 @@ class StandalonePIMonitor:
 
 
 if __name__ == "__main__":
-    import sys
-    
     if len(sys.argv) < 2:
-        print("Usage: python standalone_pi_updater.py <path_to_your_usd_file>")
+        print("Usage: python standalone_pi_updater.py <path_to_your_usd_file> [--channel-url <ws_url>] [--record-history] [--archive-clips] [--compare-open] [--bench-clips] [--bench-encode]")
         print("Example: python standalone_pi_updater.py scene.usd")
         sys.exit(1)
     
     usd_file = sys.argv[1]
+    channel_url = None
+    if "--channel-url" in sys.argv:
+        channel_url = sys.argv[sys.argv.index("--channel-url") + 1]
     
     try:
-        monitor = StandalonePIMonitor(usd_file)
-        monitor.start()
+        monitor = StandalonePIMonitor(usd_file, channel_url=channel_url)
+        monitor.RECORD_HISTORY = monitor.RECORD_HISTORY or "--record-history" in sys.argv
+        monitor.ARCHIVE_CLIPS = monitor.ARCHIVE_CLIPS or "--archive-clips" in sys.argv
+        if "--probe-open" in sys.argv:
+            # Internal: one measurement for --compare-open, run in its own process
+            masked = sys.argv[sys.argv.index("--probe-open") + 1] == "masked"
+            print(json.dumps(monitor.probe_open(masked)))
+        elif "--probe-history" in sys.argv:
+            # Internal: one measurement for --bench-clips, run in its own process
+            epoch = float(sys.argv[sys.argv.index("--probe-history") + 1])
+            print(json.dumps(monitor.probe_history(epoch)))
+        elif "--compare-open" in sys.argv:
+            monitor.compare_open()
+        elif "--bench-clips" in sys.argv:
+            monitor.bench_clip_archive()
+        elif "--bench-encode" in sys.argv:
+            monitor.bench_encode()
+        else:
+            monitor.start()
     except FileNotFoundError as e:
         print(f"Error: {e}")
         sys.exit(1)
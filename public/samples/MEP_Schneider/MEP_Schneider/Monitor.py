@@ -2,12 +2,12 @@
 #  PI -> USD -> PNG -> 貼到 3D 物件表面  (Stable Auto Version)
 # ============================================================
 
-import asyncio, datetime, os, tempfile, time, traceback
+import asyncio, collections, concurrent.futures, datetime, hashlib, os, re, tempfile, threading, time, traceback
 import requests, urllib3
 from decimal import Decimal, ROUND_HALF_UP
 from requests.auth import HTTPBasicAuth
 
-from omni.usd import get_context
+from omni.usd import get_context, StageEventType
 from pxr import Sdf, UsdShade, UsdGeom
 
 # ---------------- Pillow ----------------
@@ -28,6 +28,7 @@ AUTH     = HTTPBasicAuth(USERNAME, PASSWORD)
 ATTR_URL = ("https://192.168.195.133/piwebapi/elements/"
             "F1Emo1CwofaPqEWTbP-5QLeDbQ7H901dxc8BGNOQAMKUls9QV0lOLVMzM0M2XERBVEFCQVNFMVxB5Y2AXOWGt-awo-apnzE"
             "/attributes")
+ELEMENT_WEBID = ATTR_URL.split("/elements/")[1].split("/")[0]
 
 # PI 名稱 → USD attribute
 ATTR_MAP = {
@@ -49,12 +50,29 @@ DISPLAY = {
 TARGET_PRIM = "/World/Monitor/shell"      # 要貼圖的 Mesh
 MAT_PATH    = "/World/Monitor/PI_PanelMat"
 POLL_SEC    = 30.0                        # 輪詢秒數
+BATCH_READS = True                        # 以單一 /batch 請求讀取所有對應點位
+STREAMSET_READS = True                    # 以單一 streamsets 請求讀取整個元素
+UPDATES_MODE = True                       # 首次讀取後只抓取自上次 marker 以來變動的值
+DEADBAND_ABS = 0.05                       # 變動小於此值不寫入 USD...
+DEADBAND_PCT = 0.5                        # ...或小於上次寫入值的此百分比
+MAX_SILENCE_SEC = 300.0                   # 每個點位至少每隔此秒數寫入一次
 
 IMG_SIZE    = (1024, 512)
 BG_RGBA     = (0, 0, 0, 180)
 FONT_SIZE   = 42
 PNG_DIR     = os.path.join(tempfile.gettempdir(), "pi_panel")
-os.makedirs(PNG_DIR, exist_ok=True)
+TEXTURE_DIR = os.path.join(PNG_DIR, "Monitor")  # this script's texture cache; other monitors share PNG_DIR
+TEXTURE_CACHE_SIZE = 64    # panel textures kept in TEXTURE_DIR; least recently shown are evicted
+TEXTURE_FORMAT = "tga-rle"  # panel texture encoding, a key of TEXTURE_ENCODINGS; see Monitor_V2.benchmark_encode()
+TEXTURE_ENCODINGS = {        # name -> (file extension, Image.save arguments)
+    "png-6":   (".png", {"format": "PNG", "compress_level": 6}),  # Pillow's default
+    "png-3":   (".png", {"format": "PNG", "compress_level": 3}),
+    "png-1":   (".png", {"format": "PNG", "compress_level": 1}),
+    "tga-rle": (".tga", {"format": "TGA", "compression": "tga_rle"}),
+    "tga":     (".tga", {"format": "TGA"}),
+    "bmp":     (".bmp", {"format": "BMP"}),
+}
+os.makedirs(TEXTURE_DIR, exist_ok=True)
 
 # ---------------- Globals ----------------
 _session         = requests.Session()
@@ -63,9 +81,16 @@ _session.verify  = False
 
 _font            = None
 _mat_ready       = False
-_png_idx         = 0
+_render_worker   = None          # RenderWorker, started on the first refresh_texture
+_current_values  = {}            # 每個 PI 名稱最後寫入的值
 _task            = None          # asyncio Task
 _stage_sub       = None          # Stage event subscription（可選）
+_handles         = None          # {(prim_path, attr): Sdf.AttributeSpec or None}
+_handle_layer    = None
+_markers         = {}            # {name: update marker}
+_marker_webids   = {}            # {name: webid} registered for updates
+_last_written    = {}            # {name: (value, monotonic time)} last value sent to USD
+_executor        = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="pi_fetch")
 
 # ============================================================
 # 基本工具
@@ -86,6 +111,137 @@ def get_attribute_value(webid):
     r.raise_for_status()
     return r.json()["Value"]
 
+def get_attribute_values_batch(webids):
+    """Read {name: webid} in one /batch call; failed sub-requests fall back to per-tag reads"""
+    body = {name: {"Method": "GET", "Resource": f"{BASE_URL}/streams/{webid}/value"}
+            for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/batch", json=body, timeout=10)
+    r.raise_for_status()
+    results = r.json()
+    values, trips = {}, 1
+    for name, webid in webids.items():
+        sub = results.get(name) or {}
+        content = sub.get("Content")
+        if sub.get("Status") == 200 and isinstance(content, dict) and "Value" in content:
+            values[name] = content["Value"]
+            continue
+        trips += 1
+        try:
+            values[name] = get_attribute_value(webid)
+        except Exception as exc:
+            print(f"Read failed for {name}: {exc}")
+    return values, trips
+
+def read_attribute_values(webids):
+    """Return ({name: value}, round_trips) using the configured read mode"""
+    if BATCH_READS and len(webids) > 1:
+        return get_attribute_values_batch(webids)
+    return {name: get_attribute_value(webid) for name, webid in webids.items()}, len(webids)
+
+def get_element_values():
+    """Current value of every attribute on the element in one streamsets call"""
+    params = {"selectedFields": "Items.Name;Items.WebId;Items.Value.Value;Items.Value.Timestamp"}
+    r = _session.get(f"{BASE_URL}/streamsets/{ELEMENT_WEBID}/value", params=params, timeout=10)
+    r.raise_for_status()
+    return r.json()["Items"]
+
+def read_element_values():
+    """Return ({name: webid}, {name: value}, round_trips) for the tags in ATTR_MAP"""
+    if STREAMSET_READS:
+        try:
+            items = [item for item in get_element_values() if item["Name"] in ATTR_MAP]
+            webids = {item["Name"]: item["WebId"] for item in items}
+            values = {item["Name"]: item["Value"]["Value"] for item in items if item.get("Value")}
+            return webids, values, 1
+        except Exception as exc:
+            print(f"Streamset read failed, falling back to per-attribute reads: {exc}")
+    webids = {item["Name"]: item["WebId"] for item in get_element_attributes() if item["Name"] in ATTR_MAP}
+    values, trips = read_attribute_values(webids)
+    return webids, values, trips + 1
+
+def register_update_markers(webids):
+    """Register {name: webid} for stream updates and remember each stream's marker"""
+    global _markers, _marker_webids
+    names = {webid: name for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/streamsets/updates",
+                      params=[("webId", webid) for webid in webids.values()], timeout=10)
+    r.raise_for_status()
+    _markers = {names[item["Source"]]: item["LatestMarker"] for item in r.json().get("Items", [])
+                if item.get("Status") == "Succeeded" and item.get("Source") in names}
+    _marker_webids = dict(webids)
+
+def get_marker_updates():
+    """Return {name: latest value} for streams that changed since their marker and advance the markers"""
+    names = {marker: name for name, marker in _markers.items()}
+    r = _session.get(f"{BASE_URL}/streamsets/updates",
+                     params=[("marker", marker) for marker in _markers.values()], timeout=10)
+    r.raise_for_status()
+    values = {}
+    for item, marker in zip(r.json().get("Items", []), list(_markers.values())):
+        name = names[marker]
+        if item.get("Status") != "Succeeded":
+            _markers.pop(name, None)  # expired/failed marker: re-read and re-register next cycle
+            continue
+        _markers[name] = item["LatestMarker"]
+        events = item.get("Events") or []
+        if events:
+            values[name] = events[-1]["Value"]
+    return values
+
+def read_changed_values():
+    """Like read_element_values(), but after the first read returns only tags that changed"""
+    if UPDATES_MODE and _markers and len(_markers) == len(_marker_webids):
+        try:
+            return dict(_marker_webids), get_marker_updates(), 1
+        except Exception as exc:
+            print(f"Update markers failed, doing a full read: {exc}")
+            _markers.clear()
+    webids, values, trips = read_element_values()
+    if UPDATES_MODE and webids:
+        try:
+            register_update_markers(webids)
+            trips += 1
+        except Exception as exc:
+            print(f"Update marker registration failed: {exc}")
+    return webids, values, trips
+
+async def fetch_element_values():
+    """Run read_changed_values() on the worker thread so HTTP never blocks Kit's loop"""
+    return await asyncio.get_event_loop().run_in_executor(_executor, read_changed_values)
+
+def filter_deadband(values):
+    """Drop values inside their tag's deadband; returns (values to write, suppressed count)
+
+    An ATTR_MAP entry may carry its own {"deadband": {"abs": ..., "pct": ...}}.
+    """
+    now = time.monotonic()
+    accepted, suppressed = {}, 0
+    for name, val in values.items():
+        try:
+            v = float(val)
+        except (TypeError, ValueError):
+            accepted[name] = val
+            continue
+        last = _last_written.get(name)
+        if last is not None and now - last[1] < MAX_SILENCE_SEC:
+            band = ATTR_MAP.get(name, {}).get("deadband", {})
+            limit = max(band.get("abs", DEADBAND_ABS), abs(last[0]) * band.get("pct", DEADBAND_PCT) / 100.0)
+            if abs(v - last[0]) < limit:
+                suppressed += 1
+                continue
+        accepted[name] = val
+    return accepted, suppressed
+
+def note_written(values, written):
+    """Make the values whose prim is in `written` the deadband reference; call after the write"""
+    now = time.monotonic()
+    for name, val in values.items():
+        if ATTR_MAP[name]["prim_path"] in written:
+            try:
+                _last_written[name] = (float(val), now)
+            except (TypeError, ValueError):
+                pass
+
 def update_usd_prim(prim_path, attr_name, value):
     stage = get_context().get_stage()
     prim  = stage.GetPrimAtPath(prim_path)
@@ -97,6 +253,91 @@ def update_usd_prim(prim_path, attr_name, value):
     attr.Set(to_float2(value))
     return True, f"{attr_name}:{fmt2(value)}"
 
+def mapped_updates(values):
+    """{name: value} -> {prim_path: {attr: value}} through ATTR_MAP"""
+    updates = {}
+    for name, val in values.items():
+        cfg = ATTR_MAP[name]
+        updates.setdefault(cfg["prim_path"], {})[cfg["attribute"]] = val
+    return updates
+
+def _resolve_handles(stage, keys):
+    """Validate the prims for keys in one pass and cache their attribute specs on the edit target"""
+    edit_target = stage.GetEditTarget()
+    layer = edit_target.GetLayer()
+    prim_paths = {prim_path for prim_path, _ in keys}
+    valid = {p for p in prim_paths if stage.GetPrimAtPath(p).IsValid()}
+    missing = sorted(prim_paths - valid)
+    if missing:
+        print(f"Prims not found (skipped until the stage changes): {missing}")
+    with Sdf.ChangeBlock():
+        for prim_path, attr_name in keys:
+            attr_spec = None
+            if prim_path in valid:
+                prim_spec = Sdf.CreatePrimInLayer(layer, edit_target.MapToSpecPath(Sdf.Path(prim_path)))
+                attr_spec = prim_spec.attributes.get(attr_name)
+                if not attr_spec:
+                    attr_spec = Sdf.AttributeSpec(prim_spec, attr_name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+            _handles[(prim_path, attr_name)] = attr_spec
+
+def build_handle_table():
+    """Resolve every ATTR_MAP prim/attribute once; invalid prims are cached as None and logged once"""
+    global _handles, _handle_layer
+    _handles = {}
+    stage = get_context().get_stage()
+    _handle_layer = stage.GetEditTarget().GetLayer() if stage else None
+    if not stage:
+        return
+    _resolve_handles(stage, [(cfg["prim_path"], cfg["attribute"]) for cfg in ATTR_MAP.values()])
+    resolved = sum(1 for spec in _handles.values() if spec is not None)
+    print(f"Handle table built: {resolved}/{len(_handles)} attributes resolved")
+
+def invalidate_handle_table():
+    """Drop the handle table; the next write rebuilds it against the current stage"""
+    global _handles, _handle_layer
+    _handles, _handle_layer = None, None
+
+def _on_stage_event(event):
+    if event.type in (int(StageEventType.OPENED), int(StageEventType.CLOSED)):
+        invalidate_handle_table()
+
+def subscribe_stage_events():
+    """Rebuild the handle table when the stage is opened, closed or reloaded"""
+    global _stage_sub
+    if _stage_sub is None:
+        _stage_sub = get_context().get_stage_event_stream().create_subscription_to_pop(
+            _on_stage_event, name="PI monitor handle table")
+
+def write_usd_batch(updates):
+    """Apply {prim_path: {attr: value}} inside one Sdf.ChangeBlock; returns the prim paths written
+
+    Each value is a lookup in the handle table plus a default Set on the cached
+    attribute spec. Paths outside ATTR_MAP are resolved once on first use.
+    """
+    stage = get_context().get_stage()
+    if not stage:
+        return set()
+    if _handles is None or _handle_layer != stage.GetEditTarget().GetLayer():
+        build_handle_table()
+    new_keys = [(p, a) for p, attrs in updates.items() for a in attrs if (p, a) not in _handles]
+    if new_keys:
+        _resolve_handles(stage, new_keys)
+    written, stale = set(), False
+    with Sdf.ChangeBlock():
+        for prim_path, attrs in updates.items():
+            for attr_name, value in attrs.items():
+                attr_spec = _handles[(prim_path, attr_name)]
+                if attr_spec is None:
+                    continue
+                if attr_spec.expired:
+                    stale = True
+                    continue
+                attr_spec.default = to_float2(value)
+                written.add(prim_path)
+    if stale:
+        invalidate_handle_table()
+    return written
+
 # ============================================================
 # UV 保障
 # ============================================================
@@ -138,6 +379,10 @@ def _ensure_font():
         _font = ImageFont.load_default()
     return _font
 
+def save_texture(img, path):
+    """Encode `img` to `path` with the TEXTURE_FORMAT settings"""
+    img.save(path, **TEXTURE_ENCODINGS[TEXTURE_FORMAT][1])
+
 def _draw_png(lines, path):
     img = Image.new("RGBA", IMG_SIZE, BG_RGBA)
     d   = ImageDraw.Draw(img)
@@ -146,7 +391,14 @@ def _draw_png(lines, path):
     for txt in lines:
         d.text((40, y), txt, fill=(255,255,255,255), font=font)
         y += FONT_SIZE + 28
-    img.save(path)
+    save_texture(img, path)
+
+def _placeholder_texture():
+    """Plain background for Tex.file until the render worker has presented a panel"""
+    path = os.path.join(TEXTURE_DIR, "panel_placeholder.png")
+    if not os.path.exists(path):
+        Image.new("RGBA", IMG_SIZE, BG_RGBA).save(path)
+    return path
 
 def rebuild_material(force=False):
     global _mat_ready
@@ -169,7 +421,8 @@ def rebuild_material(force=False):
     # texture
     tex = UsdShade.Shader.Define(stage, f"{MAT_PATH}/Tex")
     tex.CreateIdAttr("UsdUVTexture")
-    tex.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(os.path.join(PNG_DIR, "panel_0.png"))
+    tex.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(
+        (_render_worker and _render_worker.front_path) or _placeholder_texture())
     tex.CreateInput("st",   Sdf.ValueTypeNames.Float2).ConnectToSource(uv_out)
     tex_rgb = tex.CreateOutput("rgb", Sdf.ValueTypeNames.Float3)
 
@@ -189,13 +442,156 @@ def rebuild_material(force=False):
     _mat_ready = True
     print("Material rebuilt & bound.")
 
-def refresh_texture(lines):
-    """畫 PNG 並更新 shader file（輪替檔名避免快取）"""
-    global _png_idx
-    _png_idx = (_png_idx + 1) % 5
-    new_path = os.path.join(PNG_DIR, f"panel_{_png_idx}.png")
-    _draw_png(lines, new_path)
+class RenderWorker:
+    """Thread that owns the Pillow work for the panel texture
+
+    submit() is latest-wins: a snapshot that arrives while another is still
+    pending replaces it. Textures are content-addressed: each file is named by
+    key(snapshot), written once and never rewritten, so a state that was already
+    rendered costs no drawing and no write. The next snapshot is not taken until
+    the previous one has been swapped into Tex.file on Kit's loop, and the file
+    the shader references is never evicted from the cache.
+    """
+
+    def __init__(self, render, present, key):
+        self._render = render           # (snapshot, path), called on the worker thread
+        self._present = present         # (path), called on Kit's loop
+        self._key = key                 # snapshot -> hex digest; equal digests mean equal pixels
+        self._cond = threading.Condition()
+        self._pending = None
+        self._in_flight = False         # a finished frame is waiting for its swap
+        self._stopping = False
+        self._thread = None
+        self._loop = None
+        self._cache = collections.OrderedDict()  # {path: None}, least recently shown first
+        self._front = None              # file the shader references
+        self.render_ms = 0.0
+        self.dropped = 0
+        self.hits = 0
+        self.evicted = 0
+
+    def texture_path(self, key):
+        return os.path.join(TEXTURE_DIR, f"panel_{key}{TEXTURE_ENCODINGS[TEXTURE_FORMAT][0]}")
+
+    @property
+    def front_path(self):
+        return self._front
+
+    def adopt(self, keep=None):
+        """Delete cached textures left by an earlier run, except `keep`, which the shader still references"""
+        for name in os.listdir(TEXTURE_DIR):
+            path = os.path.join(TEXTURE_DIR, name)
+            if re.fullmatch(r"panel_[0-9a-f]{16}\.(png|tga|bmp)", name) and path != keep:
+                os.remove(path)
+        if keep and os.path.exists(keep):
+            self._cache[keep] = None
+            self._front = keep
+
+    def start(self, loop):
+        with self._cond:
+            self._loop = loop
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="panel_render", daemon=True)
+                self._thread.start()
+
+    def submit(self, snapshot):
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._pending = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (self._pending is None or self._in_flight):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._in_flight = True
+                loop = self._loop
+            try:
+                path = self.texture_path(self._key(snapshot))
+                if path == self._front:
+                    self.hits += 1
+                    self._swapped()     # already on screen; nothing to draw, write or swap
+                    continue
+                if path in self._cache and os.path.exists(path):
+                    self.hits += 1
+                    self.render_ms = 0.0
+                else:
+                    t0 = time.perf_counter()
+                    self._render(snapshot, path)
+                    self.render_ms = (time.perf_counter() - t0) * 1000
+                self._cache[path] = None
+                self._cache.move_to_end(path)
+                self._evict(path)
+                loop.call_soon_threadsafe(self._swap, path)
+            except Exception:
+                print(">>> render worker error:\n", traceback.format_exc())
+                self._swapped()
+
+    def _evict(self, incoming):
+        """Drop least recently shown files beyond TEXTURE_CACHE_SIZE, never the front or incoming one"""
+        for path in list(self._cache):
+            if len(self._cache) <= TEXTURE_CACHE_SIZE:
+                return
+            if path in (self._front, incoming):
+                continue
+            del self._cache[path]
+            try:
+                os.remove(path)
+                self.evicted += 1
+            except OSError:
+                pass
+
+    def _swap(self, path):
+        try:
+            self._present(path)
+            self._front = path
+        except Exception:
+            print(">>> refresh_texture error:\n", traceback.format_exc())
+        self._swapped()
+
+    def _swapped(self):
+        with self._cond:
+            self._in_flight = False
+            self._cond.notify()
 
+def _shader_file():
+    """Path currently set on the Tex shader's file input, or None"""
+    tex = UsdShade.Shader.Get(get_context().get_stage(), f"{MAT_PATH}/Tex")
+    asset = tex.GetInput("file").Get() if tex else None
+    return asset.path if asset else None
+
+def refresh_texture(lines):
+    """交給背景繪圖執行緒；Kit 的 loop 只在圖完成時切換 Tex.file"""
+    global _render_worker
+    if _render_worker is None:
+        _render_worker = RenderWorker(_draw_png, _present_texture, _texture_key)
+        _render_worker.adopt(_shader_file())
+    _render_worker.start(asyncio.get_event_loop())
+    _render_worker.submit(list(lines))
+
+def _texture_key(lines):
+    """Digest of every line the panel draws, the "PI Sync" clock included, and the layout
+
+    The clock is drawn to the minute, so a state that recurs within the same
+    minute reuses the texture already on disk.
+    """
+    shown = list(lines)
+    layout = (IMG_SIZE, FONT_SIZE)
+    return hashlib.blake2b(repr((shown, layout)).encode("utf-8"), digest_size=8).hexdigest()
+
+def _present_texture(new_path):
     stage = get_context().get_stage()
     tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     if not tex:
@@ -204,40 +600,49 @@ def refresh_texture(lines):
 
     tex.GetInput("file").Set(Sdf.AssetPath(new_path))
     # 若你想要更激進的 cache bust：tex.GetInput("file").Set(Sdf.AssetPath(new_path + f"?t={time.time()}"))
-    print("texture updated ->", new_path)
+    print(f"texture updated -> {new_path} (rendered in {_render_worker.render_ms:.0f} ms off-loop, "
+          f"{_render_worker.hits} cache hits, {_render_worker.dropped} stale frames dropped)")
 
 # ============================================================
 # 主流程
 # ============================================================
 async def _one_cycle():
-    updated, lines = 0, []
+    updated, trips, suppressed = 0, 0, 0
+    t0, waited = time.perf_counter(), 0.0
     try:
-        for item in get_element_attributes():
-            name, webid = item["Name"], item["WebId"]
-            if name in ATTR_MAP:
-                val = get_attribute_value(webid)
-                cfg = ATTR_MAP[name]
-                ok, _ = update_usd_prim(cfg["prim_path"], cfg["attribute"], val)
-                if ok:
-                    updated += 1
-                    lines.append(f"{DISPLAY.get(name, name)}: {fmt2(val)}")
+        webids, values, trips = await fetch_element_values()
+        waited = time.perf_counter() - t0
+        values, suppressed = filter_deadband(values)
+        written = write_usd_batch(mapped_updates(values))
+        note_written(values, written)
+        for name, val in values.items():
+            if ATTR_MAP[name]["prim_path"] in written:
+                updated += 1
+                _current_values[name] = val
     except Exception:
         print(">>> _one_cycle error:\n", traceback.format_exc())
 
-    if lines:
-        ts = datetime.datetime.now().strftime("%H:%M:%S")
+    if updated:
+        # 未變動的點位沿用上次的值
+        lines = [f"{DISPLAY.get(name, name)}: {fmt2(val)}" for name, val in _current_values.items()]
+        # Minutes only: the clock is part of the texture key, so seconds would make every panel unique
+        ts = datetime.datetime.now().strftime("%H:%M")
         lines.insert(0, f"PI Sync {ts}")
         try:
             refresh_texture(lines)
         except Exception:
             print(">>> refresh_texture error:\n", traceback.format_exc())
 
-    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] updated {updated} attrs")
+    blocked = time.perf_counter() - t0 - waited
+    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] updated {updated} attrs in {trips} round-trips, {suppressed} suppressed by deadband "
+          f"(fetch {waited * 1000:.0f} ms off-loop, loop blocked {blocked * 1000:.0f} ms)")
     return updated
 
 async def _polling_loop(period=POLL_SEC):
     print("Async polling loop started")
     try:
+        subscribe_stage_events()
+        build_handle_table()
         ensure_uv()
         rebuild_material(force=True)
         refresh_texture(["Loading..."])
@@ -265,10 +670,13 @@ def start():
 
 def stop():
     """停止自動更新"""
-    global _task
+    global _task, _stage_sub
     if _task and not _task.done():
         _task.cancel()
     _task = None
+    _stage_sub = None
+    if _render_worker:
+        _render_worker.stop()
     print("Stopped.")
 
 def force_refresh():
@@ -287,7 +695,7 @@ def diag():
     stage = get_context().get_stage()
     tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     print("== Diagnose ==")
-    print("PNG_DIR:", PNG_DIR, "files:", os.listdir(PNG_DIR))
+    print("TEXTURE_DIR:", TEXTURE_DIR, "files:", os.listdir(TEXTURE_DIR))
     print("mat prim exists:", stage.GetPrimAtPath(MAT_PATH).IsValid())
     print("tex node exists:", bool(tex))
     if tex:
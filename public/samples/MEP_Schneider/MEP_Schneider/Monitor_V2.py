@@ -2,13 +2,14 @@
 #  Enhanced PI -> USD -> PNG -> Interactive Info Panel (Upgraded Version)
 # ============================================================
 
-import asyncio, datetime, os, tempfile, time, traceback, json
+import asyncio, collections, concurrent.futures, datetime, hashlib, heapq, math, os, re, tempfile, threading, time, traceback, tracemalloc, json
 import requests, urllib3
 from decimal import Decimal, ROUND_HALF_UP
 from requests.auth import HTTPBasicAuth
 
-from omni.usd import get_context
+from omni.usd import get_context, StageEventType
 from pxr import Sdf, UsdShade, UsdGeom
+import numpy as np
 import omni.ui as ui
 
 # ---------------- Pillow ----------------
@@ -29,6 +30,7 @@ AUTH     = HTTPBasicAuth(USERNAME, PASSWORD)
 ATTR_URL = ("https://192.168.195.133/piwebapi/elements/"
             "F1Emo1CwofaPqEWTbP-5QLeDbQ7H901dxc8BGNOQAMKUls9QV0lOLVMzM0M2XERBVEFCQVNFMVxB5Y2AXOWGt-awo-apnzE"
             "/attributes")
+ELEMENT_WEBID = ATTR_URL.split("/elements/")[1].split("/")[0]
 # PI Tag Name -> USD Attribute Mapping with Enhanced Info
 ATTR_MAP = {
     "溫度": {
@@ -119,13 +121,40 @@ DISPLAY = {
 TARGET_PRIM = "/World/Monitor/shell"
 MAT_PATH    = "/World/Monitor/PI_PanelMat"
 POLL_SEC    = 30.0
+BATCH_READS = True                        # read all mapped tags in one /batch call
+STREAMSET_READS = True                    # read the whole element in one streamsets call
+UPDATES_MODE = True                       # after the first read, fetch only values changed since the last marker
+DEADBAND_ABS = 0.05                       # skip USD writes for changes smaller than this...
+DEADBAND_PCT = 0.5                        # ...or this percent of the last written value
+MAX_SILENCE_SEC = 300.0                   # always write a tag at least this often
+SCHEDULED_POLLING = True                  # poll each tag at its ATTR_MAP "update_frequency"
+HISTORY_HOURS = 6                         # trend window kept in _historical_data
+HISTORY_SLICE_HOURS = 1.0                 # recorded windows are fetched as slices of this length...
+HISTORY_PARALLEL = 4                      # ...at most this many at once
+HISTORY_PAGE_SIZE = 10000                 # maxCount per recorded request; full pages are continued
+HISTORY_CAPACITY = 16384                  # samples kept per tag in its HistoryRing
+TREND_HOURS = 24 * 30                     # long trend window, reduced on the server...
+TREND_INTERVALS = 300                     # ...to this many intervals (about the panel width)
+TREND_REFRESH_SEC = 600.0                 # re-read a tag's long trend at most this often
 
 IMG_SIZE    = (1200, 600)  # Increased size for better layout
 BG_RGBA     = (0, 0, 0, 180)
 FONT_SIZE   = 36
+TEXT_ATLAS  = True  # blit value text from a numpy glyph atlas instead of ImageDraw.text
 SMALL_FONT_SIZE = 24
 PNG_DIR     = os.path.join(tempfile.gettempdir(), "pi_panel")
-os.makedirs(PNG_DIR, exist_ok=True)
+TEXTURE_DIR = os.path.join(PNG_DIR, "Monitor_V2")  # this script's texture cache; other monitors share PNG_DIR
+TEXTURE_CACHE_SIZE = 64    # panel textures kept in TEXTURE_DIR; least recently shown are evicted
+TEXTURE_FORMAT = "tga-rle"  # panel texture encoding, a key of TEXTURE_ENCODINGS; see benchmark_encode()
+TEXTURE_ENCODINGS = {        # name -> (file extension, Image.save arguments)
+    "png-6":   (".png", {"format": "PNG", "compress_level": 6}),  # Pillow's default
+    "png-3":   (".png", {"format": "PNG", "compress_level": 3}),
+    "png-1":   (".png", {"format": "PNG", "compress_level": 1}),
+    "tga-rle": (".tga", {"format": "TGA", "compression": "tga_rle"}),
+    "tga":     (".tga", {"format": "TGA"}),
+    "bmp":     (".bmp", {"format": "BMP"}),
+}
+os.makedirs(TEXTURE_DIR, exist_ok=True)
 
 # Global variables for UI elements
 _session         = requests.Session()
@@ -134,15 +163,30 @@ _session.verify  = False
 
 _font            = None
 _small_font      = None
+_canvas          = None          # PanelCanvas reused across updates
+_canvas_size     = None
 _mat_ready       = False
-_png_idx         = 0
+_render_worker   = None          # RenderWorker, started on the first refresh_texture
 _task            = None
 _stage_sub       = None
+_handles         = None          # {(prim_path, attr): Sdf.AttributeSpec or None}
+_handle_layer    = None
+_markers         = {}            # {name: update marker}
+_marker_webids   = {}            # {name: webid} registered for updates
+_not_found       = set()         # names whose stream read returned 404 or that the element does not list
+_last_written    = {}            # {name: (value, monotonic time)} last value sent to USD
+_executor        = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="pi_fetch")
+_history_pool    = concurrent.futures.ThreadPoolExecutor(max_workers=HISTORY_PARALLEL, thread_name_prefix="pi_history")
 _info_window     = None
 _control_window  = None
 _live_labels     = {}
 _current_values  = {}
-_historical_data = {}
+_historical_data = {}            # {pi name: HistoryRing}
+_history_due     = 0.0           # next time the trend history may be re-read
+_trend_data      = {}            # {pi name: {"Minimum"|"Average"|"Maximum": (timestamps, values)}}
+_trend_due       = {}            # {pi name: monotonic time its long trend may be re-read}
+_schedule        = []            # heap of (due monotonic time, pi name)
+_webids          = {}            # {pi name: webid} for scheduled reads
 
 def fmt2(v):
     return str(Decimal(str(v)).quantize(Decimal("0.00"), rounding=ROUND_HALF_UP))
@@ -160,27 +204,356 @@ def get_attribute_value(webid):
     r.raise_for_status()
     return r.json()["Value"]
 
-def get_historical_data(webid, hours=24):
-    """Get historical data for trend analysis"""
-    try:
-        end_time = datetime.datetime.now()
-        start_time = end_time - datetime.timedelta(hours=hours)
-        
-        url = f"{BASE_URL}/streams/{webid}/recorded"
-        params = {
-            "startTime": start_time.isoformat(),
-            "endTime": end_time.isoformat(),
-            "maxCount": 100
-        }
-        
-        r = _session.get(url, params=params, timeout=10)
+def get_attribute_values_batch(webids):
+    """Read {name: webid} in one /batch call; failed sub-requests fall back to per-tag reads"""
+    body = {name: {"Method": "GET", "Resource": f"{BASE_URL}/streams/{webid}/value"}
+            for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/batch", json=body, timeout=10)
+    r.raise_for_status()
+    results = r.json()
+    values, trips = {}, 1
+    for name, webid in webids.items():
+        sub = results.get(name) or {}
+        content = sub.get("Content")
+        if sub.get("Status") == 200 and isinstance(content, dict) and "Value" in content:
+            values[name] = content["Value"]
+            continue
+        if sub.get("Status") == 404:
+            _not_found.add(name)
+            continue
+        trips += 1
+        try:
+            values[name] = get_attribute_value(webid)
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                _not_found.add(name)
+            print(f"Read failed for {name}: {exc}")
+        except Exception as exc:
+            print(f"Read failed for {name}: {exc}")
+    return values, trips
+
+def read_attribute_values(webids):
+    """Return ({name: value}, round_trips) using the configured read mode"""
+    if BATCH_READS and len(webids) > 1:
+        return get_attribute_values_batch(webids)
+    values = {}
+    for name, webid in webids.items():
+        try:
+            values[name] = get_attribute_value(webid)
+        except requests.HTTPError as exc:
+            if exc.response is None or exc.response.status_code != 404:
+                raise
+            _not_found.add(name)
+            print(f"Read failed for {name}: {exc}")
+    return values, len(webids)
+
+def get_element_values():
+    """Current value of every attribute on the element in one streamsets call"""
+    params = {"selectedFields": "Items.Name;Items.WebId;Items.Value.Value;Items.Value.Timestamp"}
+    r = _session.get(f"{BASE_URL}/streamsets/{ELEMENT_WEBID}/value", params=params, timeout=10)
+    r.raise_for_status()
+    return r.json()["Items"]
+
+def read_element_values():
+    """Return ({name: webid}, {name: value}, round_trips) for the tags in ATTR_MAP"""
+    if STREAMSET_READS:
+        try:
+            items = [item for item in get_element_values() if item["Name"] in ATTR_MAP]
+            webids = {item["Name"]: item["WebId"] for item in items}
+            values = {item["Name"]: item["Value"]["Value"] for item in items if item.get("Value")}
+            return webids, values, 1
+        except Exception as exc:
+            print(f"Streamset read failed, falling back to per-attribute reads: {exc}")
+    webids = {item["Name"]: item["WebId"] for item in get_element_attributes() if item["Name"] in ATTR_MAP}
+    values, trips = read_attribute_values(webids)
+    return webids, values, trips + 1
+
+def register_update_markers(webids, merge=False):
+    """Register {name: webid} for stream updates and remember each stream's marker
+
+    merge=True adds to the markers already held instead of replacing them.
+    """
+    global _markers, _marker_webids
+    names = {webid: name for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/streamsets/updates",
+                      params=[("webId", webid) for webid in webids.values()], timeout=10)
+    r.raise_for_status()
+    markers = {names[item["Source"]]: item["LatestMarker"] for item in r.json().get("Items", [])
+               if item.get("Status") == "Succeeded" and item.get("Source") in names}
+    if merge:
+        _markers.update(markers)
+        _marker_webids.update(webids)
+    else:
+        _markers, _marker_webids = markers, dict(webids)
+
+def get_marker_updates(names=None):
+    """Return {name: latest value} for streams that changed since their marker and advance the markers
+
+    Only the markers of `names` are read and advanced when given; the others keep
+    collecting changes until their own turn.
+    """
+    names = list(_markers) if names is None else list(names)
+    r = _session.get(f"{BASE_URL}/streamsets/updates",
+                     params=[("marker", _markers[name]) for name in names], timeout=10)
+    r.raise_for_status()
+    values = {}
+    for item, name in zip(r.json().get("Items", []), names):
+        if item.get("Status") != "Succeeded":
+            _markers.pop(name, None)  # expired/failed marker: re-read and re-register next cycle
+            continue
+        _markers[name] = item["LatestMarker"]
+        events = item.get("Events") or []
+        if events:
+            values[name] = events[-1]["Value"]
+    return values
+
+def read_changed_values(full=False):
+    """Like read_element_values(), but after the first read returns only tags that changed
+
+    full=True reads every tag and registers fresh markers, as the first read does.
+    """
+    if UPDATES_MODE and not full and _markers and len(_markers) == len(_marker_webids):
+        try:
+            return dict(_marker_webids), get_marker_updates(), 1
+        except Exception as exc:
+            print(f"Update markers failed, doing a full read: {exc}")
+            _markers.clear()
+    webids, values, trips = read_element_values()
+    if UPDATES_MODE and webids:
+        try:
+            register_update_markers(webids)
+            trips += 1
+        except Exception as exc:
+            print(f"Update marker registration failed: {exc}")
+    return webids, values, trips
+
+def read_scheduled_values(names):
+    """Read only the due tags; returns ({name: webid}, {name: value}, round_trips)
+
+    With UPDATES_MODE the due tags' markers are read, so only those that changed
+    come back. A due tag without a marker (first turn, or its marker expired) is
+    read directly and registered on its own. Only before the webids are known is
+    the whole element read; tags it does not list go to _not_found, as do tags
+    whose read returns 404, and pop_due_tags() stops scheduling them.
+    """
+    if not _webids:
+        webids, values, trips = read_changed_values(full=True)
+        _webids.update(webids)
+        _not_found.update(name for name in ATTR_MAP if name not in webids)
+        return webids, values, trips
+    webids = {name: _webids[name] for name in names if name in _webids}
+    _not_found.update(name for name in names if name not in _webids)
+    values, trips = {}, 0
+    marked = [name for name in webids if UPDATES_MODE and name in _markers]
+    if marked:
+        try:
+            values, trips = get_marker_updates(marked), 1
+        except Exception as exc:
+            print(f"Update markers failed, reading the due tags: {exc}")
+            for name in marked:
+                _markers.pop(name, None)
+            marked = []
+    unmarked = {name: webid for name, webid in webids.items() if name not in marked}
+    if unmarked:
+        read, n = read_attribute_values(unmarked)
+        values.update(read)
+        trips += n
+        unmarked = {name: webid for name, webid in unmarked.items() if name not in _not_found}
+        if UPDATES_MODE and unmarked:
+            try:
+                register_update_markers(unmarked, merge=True)
+                trips += 1
+            except Exception as exc:
+                print(f"Update marker registration failed: {exc}")
+    return webids, values, trips
+
+def parse_update_period(text, default=POLL_SEC):
+    """Seconds from an "update_frequency" string such as "Every 5 seconds"; default when not periodic"""
+    m = re.search(r"(\d+(?:\.\d+)?)\s*(s|sec|second|m|min|minute)s?\b", str(text).lower())
+    if not m:
+        return default
+    return float(m.group(1)) * (60.0 if m.group(2).startswith("m") else 1.0)
+
+def build_schedule():
+    """Heap of (due time, name) with every mapped tag due now"""
+    global _schedule
+    now = time.monotonic()
+    _schedule = [(now, name) for name in ATTR_MAP]
+    heapq.heapify(_schedule)
+    _not_found.clear()
+
+def pop_due_tags(now):
+    """Pop the tags that are due and push each back at its next due time
+
+    Tags in _not_found are dropped from the schedule until build_schedule() runs again.
+    """
+    due = []
+    while _schedule and _schedule[0][0] <= now:
+        when, name = heapq.heappop(_schedule)
+        if name in _not_found:
+            print(f"{name} not found on the server; no longer scheduled")
+            continue
+        due.append(name)
+        period = parse_update_period(ATTR_MAP[name].get("info", {}).get("update_frequency"))
+        # If the loop fell behind, skip missed slots instead of bursting
+        heapq.heappush(_schedule, (max(when + period, now), name))
+    return due
+
+async def fetch_element_values(full=False):
+    """Run read_changed_values() on the worker thread so HTTP never blocks Kit's loop"""
+    return await asyncio.get_event_loop().run_in_executor(_executor, read_changed_values, full)
+
+def _pi_time(epoch):
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ")
+
+def _recorded_slice(webid, start, end):
+    """Numeric recorded events in [start, end], continuing from the last event while pages come back full
+
+    Events may share a timestamp, so a continued page skips only the events at
+    its start time that the previous pages already returned, and asks for that
+    many more so it always gets past them.
+    """
+    ts, vals = [], []
+    skip = 0
+    while True:
+        count = HISTORY_PAGE_SIZE + skip
+        r = _session.get(f"{BASE_URL}/streams/{webid}/recorded", params={
+            "startTime": _pi_time(start),
+            "endTime": _pi_time(end),
+            "maxCount": count,
+            "selectedFields": "Items.Timestamp;Items.Value",
+        }, timeout=10)
         r.raise_for_status()
-        
-        items = r.json().get("Items", [])
-        return [(item["Timestamp"], item["Value"]) for item in items]
+        page = [(parse_pi_time(item["Timestamp"]), item["Value"]) for item in r.json().get("Items", [])]
+        # The next page starts at the last event's timestamp, so those events come back twice
+        repeated = 0
+        while repeated < min(skip, len(page)) and page[repeated][0] == start:
+            repeated += 1
+        for t, v in page[repeated:]:
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                ts.append(t)
+                vals.append(v)
+        if len(page) < count:
+            return ts, vals
+        next_start = page[-1][0]
+        if next_start < start:
+            print(f"Recorded page for {webid} did not advance; truncated at {_pi_time(start)}")
+            return ts, vals
+        skip = sum(1 for t, _ in page if t == next_start)
+        start = next_start
+
+def _as_series(events):
+    """[(PI timestamp, value)] -> (float64 epoch, float32 value) arrays, numeric values only"""
+    events = [(parse_pi_time(t), v) for t, v in events
+              if isinstance(v, (int, float)) and not isinstance(v, bool)]
+    return (np.array([t for t, _ in events], np.float64),
+            np.array([v for _, v in events], np.float32))
+
+def _plot_series(webid, start, end, intervals):
+    """Server-reduced series keeping the shape: first, last, min and max of each interval"""
+    r = _session.get(f"{BASE_URL}/streams/{webid}/plot", params={
+        "startTime": _pi_time(start),
+        "endTime": _pi_time(end),
+        "intervals": intervals,
+        "selectedFields": "Items.Timestamp;Items.Value",
+    }, timeout=10)
+    r.raise_for_status()
+    return _as_series([(item["Timestamp"], item["Value"]) for item in r.json().get("Items", [])])
+
+def get_summary_bands(webid, hours=TREND_HOURS, intervals=TREND_INTERVALS, end_time=None):
+    """Min/avg/max of each of `intervals` intervals over the last `hours`, in one summary call
+
+    Returns {"Minimum"|"Average"|"Maximum": (timestamps, values)} in the same
+    array format as get_historical_data.
+    """
+    end = end_time if end_time is not None else time.time()
+    start = end - hours * 3600
+    # PI Web API rejects "0s"; a short window then simply gives fewer than `intervals` bands
+    duration = max(1, round((end - start) / intervals))
+    r = _session.get(f"{BASE_URL}/streams/{webid}/summary", params=[
+        ("startTime", _pi_time(start)),
+        ("endTime", _pi_time(end)),
+        ("summaryDuration", f"{duration}s"),
+        ("summaryType", "Minimum"), ("summaryType", "Average"), ("summaryType", "Maximum"),
+        ("selectedFields", "Items.Type;Items.Value.Timestamp;Items.Value.Value"),
+    ], timeout=10)
+    r.raise_for_status()
+    events = {"Minimum": [], "Average": [], "Maximum": []}
+    for item in r.json().get("Items", []):
+        if item.get("Type") in events:
+            events[item["Type"]].append((item["Value"]["Timestamp"], item["Value"]["Value"]))
+    return {kind: _as_series(evs) for kind, evs in events.items()}
+
+def get_historical_data(webid, hours=24, start_time=None, end_time=None, mode="recorded",
+                        intervals=TREND_INTERVALS):
+    """History as (float64 epoch timestamps, float32 values) arrays
+
+    mode "recorded" returns every event: the window (the last `hours`, or
+    start_time..end_time in Unix seconds) is split into HISTORY_SLICE_HOURS
+    slices fetched HISTORY_PARALLEL at a time and merged in order. "plot" and
+    "summaries" have the server reduce the window to `intervals` intervals
+    first; summaries gives the per-interval averages (get_summary_bands has
+    min and max too).
+    """
+    end = end_time if end_time is not None else time.time()
+    start = start_time if start_time is not None else end - hours * 3600
+    if mode != "recorded":
+        try:
+            if mode == "plot":
+                return _plot_series(webid, start, end, intervals)
+            return get_summary_bands(webid, (end - start) / 3600, intervals, end)["Average"]
+        except Exception as e:
+            print(f"Historical data error: {e}")
+            return np.empty(0), np.empty(0, np.float32)
+    n = max(1, int(np.ceil((end - start) / (HISTORY_SLICE_HOURS * 3600))))
+    bounds = np.linspace(start, end, n + 1)
+    try:
+        parts = list(_history_pool.map(lambda i: _recorded_slice(webid, bounds[i], bounds[i + 1]), range(n)))
     except Exception as e:
         print(f"Historical data error: {e}")
-        return []
+        return np.empty(0), np.empty(0, np.float32)
+    ts_parts, val_parts, last = [], [], float("-inf")
+    for ts, vals in parts:
+        ts, vals = np.asarray(ts, np.float64), np.asarray(vals, np.float32)
+        keep = ts > last  # an event on a slice boundary is returned by both slices
+        ts_parts.append(ts[keep])
+        val_parts.append(vals[keep])
+        if keep.any():
+            last = ts[keep][-1]
+    return np.concatenate(ts_parts), np.concatenate(val_parts)
+
+def filter_deadband(values):
+    """Drop values inside their tag's deadband; returns (values to write, suppressed count)
+
+    An ATTR_MAP entry may carry its own {"deadband": {"abs": ..., "pct": ...}}.
+    """
+    now = time.monotonic()
+    accepted, suppressed = {}, 0
+    for name, val in values.items():
+        try:
+            v = float(val)
+        except (TypeError, ValueError):
+            accepted[name] = val
+            continue
+        last = _last_written.get(name)
+        if last is not None and now - last[1] < MAX_SILENCE_SEC:
+            band = ATTR_MAP.get(name, {}).get("deadband", {})
+            limit = max(band.get("abs", DEADBAND_ABS), abs(last[0]) * band.get("pct", DEADBAND_PCT) / 100.0)
+            if abs(v - last[0]) < limit:
+                suppressed += 1
+                continue
+        accepted[name] = val
+    return accepted, suppressed
+
+def note_written(values, written):
+    """Make the values whose prim is in `written` the deadband reference; call after the write"""
+    now = time.monotonic()
+    for name, val in values.items():
+        if ATTR_MAP[name]["prim_path"] in written:
+            try:
+                _last_written[name] = (float(val), now)
+            except (TypeError, ValueError):
+                pass
 
 def update_usd_prim(prim_path, attr_name, value):
     stage = get_context().get_stage()
@@ -193,6 +566,91 @@ def update_usd_prim(prim_path, attr_name, value):
     attr.Set(to_float2(value))
     return True, f"{attr_name}:{fmt2(value)}"
 
+def mapped_updates(values):
+    """{name: value} -> {prim_path: {attr: value}} through ATTR_MAP"""
+    updates = {}
+    for name, val in values.items():
+        cfg = ATTR_MAP[name]
+        updates.setdefault(cfg["prim_path"], {})[cfg["attribute"]] = val
+    return updates
+
+def _resolve_handles(stage, keys):
+    """Validate the prims for keys in one pass and cache their attribute specs on the edit target"""
+    edit_target = stage.GetEditTarget()
+    layer = edit_target.GetLayer()
+    prim_paths = {prim_path for prim_path, _ in keys}
+    valid = {p for p in prim_paths if stage.GetPrimAtPath(p).IsValid()}
+    missing = sorted(prim_paths - valid)
+    if missing:
+        print(f"Prims not found (skipped until the stage changes): {missing}")
+    with Sdf.ChangeBlock():
+        for prim_path, attr_name in keys:
+            attr_spec = None
+            if prim_path in valid:
+                prim_spec = Sdf.CreatePrimInLayer(layer, edit_target.MapToSpecPath(Sdf.Path(prim_path)))
+                attr_spec = prim_spec.attributes.get(attr_name)
+                if not attr_spec:
+                    attr_spec = Sdf.AttributeSpec(prim_spec, attr_name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+            _handles[(prim_path, attr_name)] = attr_spec
+
+def build_handle_table():
+    """Resolve every ATTR_MAP prim/attribute once; invalid prims are cached as None and logged once"""
+    global _handles, _handle_layer
+    _handles = {}
+    stage = get_context().get_stage()
+    _handle_layer = stage.GetEditTarget().GetLayer() if stage else None
+    if not stage:
+        return
+    _resolve_handles(stage, [(cfg["prim_path"], cfg["attribute"]) for cfg in ATTR_MAP.values()])
+    resolved = sum(1 for spec in _handles.values() if spec is not None)
+    print(f"Handle table built: {resolved}/{len(_handles)} attributes resolved")
+
+def invalidate_handle_table():
+    """Drop the handle table; the next write rebuilds it against the current stage"""
+    global _handles, _handle_layer
+    _handles, _handle_layer = None, None
+
+def _on_stage_event(event):
+    if event.type in (int(StageEventType.OPENED), int(StageEventType.CLOSED)):
+        invalidate_handle_table()
+
+def subscribe_stage_events():
+    """Rebuild the handle table when the stage is opened, closed or reloaded"""
+    global _stage_sub
+    if _stage_sub is None:
+        _stage_sub = get_context().get_stage_event_stream().create_subscription_to_pop(
+            _on_stage_event, name="PI monitor handle table")
+
+def write_usd_batch(updates):
+    """Apply {prim_path: {attr: value}} inside one Sdf.ChangeBlock; returns the prim paths written
+
+    Each value is a lookup in the handle table plus a default Set on the cached
+    attribute spec. Paths outside ATTR_MAP are resolved once on first use.
+    """
+    stage = get_context().get_stage()
+    if not stage:
+        return set()
+    if _handles is None or _handle_layer != stage.GetEditTarget().GetLayer():
+        build_handle_table()
+    new_keys = [(p, a) for p, attrs in updates.items() for a in attrs if (p, a) not in _handles]
+    if new_keys:
+        _resolve_handles(stage, new_keys)
+    written, stale = set(), False
+    with Sdf.ChangeBlock():
+        for prim_path, attrs in updates.items():
+            for attr_name, value in attrs.items():
+                attr_spec = _handles[(prim_path, attr_name)]
+                if attr_spec is None:
+                    continue
+                if attr_spec.expired:
+                    stale = True
+                    continue
+                attr_spec.default = to_float2(value)
+                written.add(prim_path)
+    if stale:
+        invalidate_handle_table()
+    return written
+
 def ensure_uv():
     stage = get_context().get_stage()
     prim  = stage.GetPrimAtPath(TARGET_PRIM)
@@ -245,38 +703,195 @@ def get_status_color(attr_name, value):
     else:
         return (150, 255, 150, 255)  # Green for normal
 
-def _draw_enhanced_png(data_lines, path):
-    """Enhanced PNG drawing with status indicators and click hints"""
+class GlyphAtlas:
+    """Coverage masks of single glyphs, rasterised once per font
+
+    Value strings are composed from them with numpy alpha blits using the same
+    blend ImageDraw.text applies to RGBA images, so the two are interchangeable.
+    """
+    CHARS = "0123456789+-.,:% /°ACFNVWahkz"
+
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}       # {char: (x offset, y offset, float32 coverage, advance)}
+
+    def _glyph(self, ch):
+        g = self._glyphs.get(ch)
+        if g is None:
+            x0, y0, x1, y1 = self.font.getbbox(ch)
+            mask = Image.new("L", (max(1, x1 - x0), max(1, y1 - y0)), 0)
+            ImageDraw.Draw(mask).text((-x0, -y0), ch, fill=255, font=self.font)
+            g = self._glyphs[ch] = (x0, y0, np.asarray(mask, np.float32) / 255.0, self.font.getlength(ch))
+        return g
+
+    def layout(self, xy, text):
+        """Glyph placements for text drawn at xy, and their bounding box
+
+        Positions snap to pixels as ImageDraw.text does: x rounds half up with the
+        pen's fraction carried over, y rounds half down.
+        """
+        placed, pen = [], 0.0
+        oy = math.ceil(xy[1] - 0.5)
+        for ch in text:
+            x0, y0, cov, advance = self._glyph(ch)
+            placed.append((math.floor(xy[0] + pen + 0.5) + x0, oy + y0, cov))
+            pen += advance
+        if not placed:
+            ox = math.floor(xy[0] + 0.5)
+            return placed, (ox, oy, ox, oy)
+        return placed, (min(x for x, _, _ in placed), min(y for _, y, _ in placed),
+                         max(x + c.shape[1] for x, _, c in placed), max(y + c.shape[0] for _, y, c in placed))
+
+    def blit(self, img, placed, box, fill):
+        """Blend the placed glyphs in `fill` into img, reading and writing only box"""
+        bx0, by0, bx1, by1 = box
+        cov = np.zeros((by1 - by0, bx1 - bx0), np.float32)
+        for x, y, g in placed:
+            sub = cov[y - by0:y - by0 + g.shape[0], x - bx0:x - bx0 + g.shape[1]]
+            np.maximum(sub, g, out=sub)
+        cx0, cy0 = max(bx0, 0), max(by0, 0)
+        cx1, cy1 = min(bx1, img.width), min(by1, img.height)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        cov = cov[cy0 - by0:cy1 - by0, cx0 - bx0:cx1 - bx0, None]
+        cell = np.asarray(img.crop((cx0, cy0, cx1, cy1)), np.float32)
+        ink = np.asarray(fill, np.float32)
+        out = cell + (ink - cell) * cov
+        # Like ImageDraw, fully transparent pixels take the whole ink colour
+        clear = (cell[..., 3] == 0) & (cov[..., 0] > 0)
+        out[clear, :3] = ink[:3]
+        img.paste(Image.fromarray(np.rint(out).astype(np.uint8), "RGBA"), (cx0, cy0))
+
+_atlases = {}                   # {font: GlyphAtlas}
+
+def _atlas_for(font):
+    atlas = _atlases.get(font)
+    if atlas is None:
+        atlas = _atlases[font] = GlyphAtlas(font)
+    return atlas
+
+class PanelCanvas:
+    """Panel image whose static chrome is drawn once; cells are repainted only when they change
+
+    A changed cell is restored from the base image over the union of its old
+    and new boxes; every cell overlapping that area is then redrawn in creation
+    order, so neighbours it erased come back and the result matches a full
+    redraw. With `atlas`, text made only of GlyphAtlas.CHARS is blitted from the
+    glyph atlas.
+    """
+
+    def __init__(self, base, atlas=False):
+        self.base = base
+        self.img = base.copy()
+        self.atlas = atlas
+        self._draw = ImageDraw.Draw(self.img)
+        self._cells = {}        # {key: (box, state, paint)}
+
+    @staticmethod
+    def _grow(a, b):
+        """Union of two boxes"""
+        return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+    def cell(self, key, box, state, paint=None):
+        """Repaint `key` with paint(draw) when its state changed; returns True if pixels changed"""
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        self._cells[key] = (box, state, paint)
+        if prev is None:
+            if paint is not None:
+                paint(self._draw)
+            return True
+        # Anti-aliasing can reach a pixel past a box, hence the 1 px margins
+        pad = lambda b: (b[0] - 1, b[1] - 1, b[2] + 1, b[3] + 1)
+        dirty, redraw = pad(self._grow(prev[0], box)), {key}
+        grown = True
+        while grown:
+            # Redrawing a cell paints all of it, so the area to restore takes in its box
+            grown = False
+            for k, (b, _, _) in self._cells.items():
+                b = pad(b)
+                if k not in redraw and b[0] < dirty[2] and dirty[0] < b[2] and b[1] < dirty[3] and dirty[1] < b[3]:
+                    redraw.add(k)
+                    dirty, grown = self._grow(dirty, b), True
+        # textbbox gives fractional boxes for fractional origins; paste needs whole pixels
+        dirty = (max(0, math.floor(dirty[0])), max(0, math.floor(dirty[1])),
+                 min(self.img.width, math.ceil(dirty[2])), min(self.img.height, math.ceil(dirty[3])))
+        if dirty[2] > dirty[0] and dirty[3] > dirty[1]:
+            self.img.paste(self.base.crop(dirty), dirty[:2])
+        for k, (_, _, p) in self._cells.items():
+            if k in redraw and p is not None:
+                p(self._draw)
+        return True
+
+    def text(self, key, xy, text, fill, font):
+        state = (xy, text, fill, font)
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        if self.atlas and all(ch in GlyphAtlas.CHARS for ch in text):
+            atlas = _atlas_for(font)
+            placed, box = atlas.layout(xy, text)
+            return self.cell(key, box, state, lambda d: atlas.blit(self.img, placed, box, fill))
+        box = self._draw.textbbox(xy, text, font=font)
+        return self.cell(key, box, state, lambda d: d.text(xy, text, fill=fill, font=font))
+
+    def textlength(self, text, font):
+        return self._draw.textlength(text, font=font)
+
+    def prune(self, keep):
+        """Return every cell not in `keep` to the background"""
+        for key in [k for k in self._cells if k not in keep]:
+            self.cell(key, self._cells[key][0], None)
+            del self._cells[key]
+
+def _draw_enhanced_chrome(size):
+    """Background, border, title and instructions: everything that does not change per update"""
+    font, small_font = _ensure_fonts()
     try:
         bg_path = os.path.join(PNG_DIR, "panel_bg.png")
         img = Image.open(bg_path).convert("RGBA")
     except Exception:
-        img = Image.new("RGBA", IMG_SIZE, BG_RGBA)
+        img = Image.new("RGBA", size, BG_RGBA)
     
     d = ImageDraw.Draw(img)
-    font, small_font = _ensure_fonts()
     
     # Draw main border
     border_margin = 20
     d.rounded_rectangle(
-        [border_margin, border_margin, IMG_SIZE[0] - border_margin, IMG_SIZE[1] - border_margin],
+        [border_margin, border_margin, size[0] - border_margin, size[1] - border_margin],
         radius=40,
         outline=(255, 255, 255, 120),
         width=4
     )
     
     # Title
-    title_y = 30
-    d.text((40, title_y), "PI Data Monitor - Click attribute names for details", 
+    d.text((40, 30), "PI Data Monitor - Click attribute names for details", 
            fill=(255, 220, 150, 255), font=font)
     
-    y = title_y + 60
+    # Instructions
+    instruction_y = size[1] - 80
+    d.text((40, instruction_y), "Click blue dots for detailed information", 
+           fill=(100, 200, 255, 200), font=small_font)
+    d.text((40, instruction_y + 30), "Status: Green=Normal, Red=High, Blue=Low", 
+           fill=(180, 180, 180, 200), font=small_font)
+    return img
+
+def _render_enhanced(data_lines, canvas, values=None):
+    """Repaint the cells of `canvas` whose text or status changed; returns the panel image"""
+    values = _current_values if values is None else values
+    font, _ = _ensure_fonts()
+    y = 30 + 60
+    keep = set()
     
     # Draw data with status colors and click indicators
-    for line in data_lines:
+    for i, line in enumerate(data_lines):
+        dot, status, label_fill = None, None, (255, 220, 150, 255)
+        label, value, value_fill = line, "", (255, 255, 255, 255)
         if ":" in line and any(attr in line for attr in DISPLAY.values()):
             label, value = line.split(":", 1)
-            value = value.strip()
+            label, value = label + ":", value.strip()
+            label_fill = (200, 200, 255, 255)
             
             # Find the attribute name for this display label
             attr_name = None
@@ -285,35 +900,64 @@ def _draw_enhanced_png(data_lines, path):
                     attr_name = key
                     break
             
-            if attr_name and attr_name in _current_values:
-                color = get_status_color(attr_name, _current_values[attr_name])
-                
-                # Draw clickable indicator
-                d.ellipse([15, y + 5, 25, y + 15], fill=(100, 200, 255, 200))
-                
-                # Draw status indicator
-                status_color = color[:3] + (200,)
-                d.rectangle([350, y, 360, y + 25], fill=status_color)
-                
-                d.text((40, y), label + ":", fill=(200, 200, 255, 255), font=font)
-                d.text((400, y), value, fill=color, font=font)
-            else:
-                d.text((40, y), label + ":", fill=(200, 200, 255, 255), font=font)
-                d.text((400, y), value, fill=(255, 255, 255, 255), font=font)
-        else:
-            if "PI Sync" not in line:  # Skip timestamp line
-                d.text((40, y), line, fill=(255, 220, 150, 255), font=font)
+            if attr_name and attr_name in values:
+                value_fill = get_status_color(attr_name, values[attr_name])
+                dot = (100, 200, 255, 200)          # clickable indicator
+                status = value_fill[:3] + (200,)    # status indicator
+        elif "PI Sync" in line:
+            label = ""  # Skip timestamp line
         
+        dot_box, status_box = (15, y + 5, 25, y + 15), (350, y, 360, y + 25)
+        canvas.cell(("dot", i), dot_box, dot, dot and (lambda d, b=dot_box, f=dot: d.ellipse(b, fill=f)))
+        canvas.cell(("status", i), status_box, status,
+                    status and (lambda d, b=status_box, f=status: d.rectangle(b, fill=f)))
+        canvas.text(("label", i), (40, y), label, label_fill, font)
+        canvas.text(("value", i), (400, y), value, value_fill, font)
+        keep.update((key, i) for key in ("dot", "status", "label", "value"))
         y += FONT_SIZE + 20
     
-    # Instructions
-    instruction_y = IMG_SIZE[1] - 80
-    d.text((40, instruction_y), "Click blue dots for detailed information", 
-           fill=(100, 200, 255, 200), font=small_font)
-    d.text((40, instruction_y + 30), "Status: Green=Normal, Red=High, Blue=Low", 
-           fill=(180, 180, 180, 200), font=small_font)
-           
-    img.save(path)
+    canvas.prune(keep)  # rows that disappeared go back to the background
+    return canvas.img
+
+def save_texture(img, path):
+    """Encode `img` to `path` with the TEXTURE_FORMAT settings"""
+    img.save(path, **TEXTURE_ENCODINGS[TEXTURE_FORMAT][1])
+
+def _draw_enhanced_png(data_lines, path, values=None):
+    """Enhanced PNG drawing with status indicators and click hints"""
+    global _canvas, _canvas_size
+    if _canvas is None or _canvas_size != IMG_SIZE:
+        _canvas, _canvas_size = PanelCanvas(_draw_enhanced_chrome(IMG_SIZE), atlas=TEXT_ATLAS), IMG_SIZE
+    save_texture(_render_enhanced(data_lines, _canvas, values), path)
+
+def benchmark_render(sizes=((1200, 600), (3840, 2160)), updates=50):
+    """Per-update render time: full redraw against the cached base with dirty cells"""
+    names = list(DISPLAY)
+    values = {name: 20.0 + i for i, name in enumerate(names)}
+    saved = dict(_current_values)
+    _current_values.update(values)
+    try:
+        for size in sizes:
+            def lines_for(k):
+                _current_values[names[k % len(names)]] = values[names[k % len(names)]] + k * 0.01
+                return ["PI Sync"] + [f"{DISPLAY[n]}: {fmt2(_current_values[n])}" for n in names]
+            
+            t0 = time.perf_counter()
+            for k in range(updates):
+                _render_enhanced(lines_for(k), PanelCanvas(_draw_enhanced_chrome(size)))
+            full = (time.perf_counter() - t0) / updates
+            
+            canvas = PanelCanvas(_draw_enhanced_chrome(size), atlas=TEXT_ATLAS)
+            _render_enhanced(lines_for(0), canvas)
+            t0 = time.perf_counter()
+            for k in range(1, updates + 1):
+                _render_enhanced(lines_for(k), canvas)
+            dirty = (time.perf_counter() - t0) / updates
+            print(f"{size[0]}x{size[1]}: full redraw {full * 1000:.1f} ms, "
+                  f"dirty cells {dirty * 1000:.2f} ms ({full / dirty:.0f}x)")
+    finally:
+        _current_values.clear()
+        _current_values.update(saved)
 
 def create_info_window(attr_name):
     """Create detailed information window for an attribute"""
@@ -378,14 +1022,22 @@ def create_info_window(attr_name):
                 ui.Label(f"Status: {status}", style={"font_size": 14, "color": status_color})
             
             # Historical trend (simplified)
-            hist_data = _historical_data.get(attr_name, [])
-            if hist_data:
-                recent_values = [v for _, v in hist_data[-10:]]
-                if len(recent_values) >= 2:
-                    trend = "RISING" if recent_values[-1] > recent_values[0] else "FALLING"
+            ring = _historical_data.get(attr_name)
+            if ring is not None and len(ring) >= 2:
+                ts, _ = ring.view()
+                recent = ring.stats(start=ts[max(0, len(ts) - 10)])  # last 10 samples
+                if recent["count"] >= 2:
+                    trend = "RISING" if recent["slope_per_hour"] > 0 else "FALLING"
                     trend_color = 0xFFFF8000 if trend == "RISING" else 0xFF0080FF
                     ui.Label(f"Recent Trend: {trend}", style={"font_size": 12, "color": trend_color})
             
+            bands = _trend_data.get(attr_name)
+            if bands and len(bands["Average"][1]):
+                ui.Label(f"{TREND_HOURS // 24}-day range: {fmt2(float(np.nanmin(bands['Minimum'][1])))} - "
+                         f"{fmt2(float(np.nanmax(bands['Maximum'][1])))} {info.get('unit', '')} "
+                         f"(avg {fmt2(float(np.nanmean(bands['Average'][1])))})",
+                         style={"font_size": 12, "color": 0xFFCCCCCC})
+            
             ui.Spacer()
             
             def close_window():
@@ -462,7 +1114,7 @@ def create_control_panel():
             ui.Label("How to Use:", style={"font_size": 12, "color": 0xFFAAAAAA})
             ui.Label("Click any data button above for detailed info", style={"font_size": 10})
             ui.Label("Status dots: 🟢=Normal, 🔴=High, 🔵=Low", style={"font_size": 10})
-            ui.Label("Data updates every 30 seconds", style={"font_size": 10})
+            ui.Label("Data updates at each sensor's update frequency", style={"font_size": 10})
             
             ui.Spacer()
 
@@ -490,6 +1142,13 @@ def update_live_display():
                 hex_color = (color[0] << 16) | (color[1] << 8) | color[2] | 0xFF000000
                 _live_labels[status_key].set_style({"background_color": hex_color, "border_radius": 3})
 
+def _placeholder_texture():
+    """Plain background for Tex.file until the render worker has presented a panel"""
+    path = os.path.join(TEXTURE_DIR, "panel_placeholder.png")
+    if not os.path.exists(path):
+        Image.new("RGBA", IMG_SIZE, BG_RGBA).save(path)
+    return path
+
 def rebuild_material(force=False):
     global _mat_ready
     if _mat_ready and not force:
@@ -509,7 +1168,8 @@ def rebuild_material(force=False):
 
     tex = UsdShade.Shader.Define(stage, f"{MAT_PATH}/Tex")
     tex.CreateIdAttr("UsdUVTexture")
-    tex.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(os.path.join(PNG_DIR, "panel_0.png"))
+    tex.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(
+        (_render_worker and _render_worker.front_path) or _placeholder_texture())
     tex.CreateInput("st",   Sdf.ValueTypeNames.Float2).ConnectToSource(uv_out)
     tex_rgb = tex.CreateOutput("rgb", Sdf.ValueTypeNames.Float3)
 
@@ -526,45 +1186,307 @@ def rebuild_material(force=False):
     _mat_ready = True
     print("Enhanced material rebuilt & bound.")
 
+class RenderWorker:
+    """Thread that owns the Pillow work for the panel texture
+
+    submit() is latest-wins: a snapshot that arrives while another is still
+    pending replaces it. Textures are content-addressed: each file is named by
+    key(snapshot), written once and never rewritten, so a state that was already
+    rendered costs no drawing and no write. The next snapshot is not taken until
+    the previous one has been swapped into Tex.file on Kit's loop, and the file
+    the shader references is never evicted from the cache.
+    """
+
+    def __init__(self, render, present, key):
+        self._render = render           # (snapshot, path), called on the worker thread
+        self._present = present         # (path), called on Kit's loop
+        self._key = key                 # snapshot -> hex digest; equal digests mean equal pixels
+        self._cond = threading.Condition()
+        self._pending = None
+        self._in_flight = False         # a finished frame is waiting for its swap
+        self._stopping = False
+        self._thread = None
+        self._loop = None
+        self._cache = collections.OrderedDict()  # {path: None}, least recently shown first
+        self._front = None              # file the shader references
+        self.render_ms = 0.0
+        self.dropped = 0
+        self.hits = 0
+        self.evicted = 0
+
+    def texture_path(self, key):
+        return os.path.join(TEXTURE_DIR, f"panel_{key}{TEXTURE_ENCODINGS[TEXTURE_FORMAT][0]}")
+
+    @property
+    def front_path(self):
+        return self._front
+
+    def adopt(self, keep=None):
+        """Delete cached textures left by an earlier run, except `keep`, which the shader still references"""
+        for name in os.listdir(TEXTURE_DIR):
+            path = os.path.join(TEXTURE_DIR, name)
+            if re.fullmatch(r"panel_[0-9a-f]{16}\.(png|tga|bmp)", name) and path != keep:
+                os.remove(path)
+        if keep and os.path.exists(keep):
+            self._cache[keep] = None
+            self._front = keep
+
+    def start(self, loop):
+        with self._cond:
+            self._loop = loop
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="panel_render", daemon=True)
+                self._thread.start()
+
+    def submit(self, snapshot):
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._pending = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (self._pending is None or self._in_flight):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._in_flight = True
+                loop = self._loop
+            try:
+                path = self.texture_path(self._key(snapshot))
+                if path == self._front:
+                    self.hits += 1
+                    self._swapped()     # already on screen; nothing to draw, write or swap
+                    continue
+                if path in self._cache and os.path.exists(path):
+                    self.hits += 1
+                    self.render_ms = 0.0
+                else:
+                    t0 = time.perf_counter()
+                    self._render(snapshot, path)
+                    self.render_ms = (time.perf_counter() - t0) * 1000
+                self._cache[path] = None
+                self._cache.move_to_end(path)
+                self._evict(path)
+                loop.call_soon_threadsafe(self._swap, path)
+            except Exception:
+                print(">>> render worker error:\n", traceback.format_exc())
+                self._swapped()
+
+    def _evict(self, incoming):
+        """Drop least recently shown files beyond TEXTURE_CACHE_SIZE, never the front or incoming one"""
+        for path in list(self._cache):
+            if len(self._cache) <= TEXTURE_CACHE_SIZE:
+                return
+            if path in (self._front, incoming):
+                continue
+            del self._cache[path]
+            try:
+                os.remove(path)
+                self.evicted += 1
+            except OSError:
+                pass
+
+    def _swap(self, path):
+        try:
+            self._present(path)
+            self._front = path
+        except Exception:
+            print(">>> refresh_texture error:\n", traceback.format_exc())
+        self._swapped()
+
+    def _swapped(self):
+        with self._cond:
+            self._in_flight = False
+            self._cond.notify()
+
+def _shader_file():
+    """Path currently set on the Tex shader's file input, or None"""
+    tex = UsdShade.Shader.Get(get_context().get_stage(), f"{MAT_PATH}/Tex")
+    asset = tex.GetInput("file").Get() if tex else None
+    return asset.path if asset else None
+
 def refresh_texture(lines):
-    global _png_idx
-    _png_idx = (_png_idx + 1) % 5
-    new_path = os.path.join(PNG_DIR, f"panel_{_png_idx}.png")
-    _draw_enhanced_png(lines, new_path)
+    """Hand the panel to the render worker; Kit's loop only swaps Tex.file when the frame is ready"""
+    global _render_worker
+    if _render_worker is None:
+        _render_worker = RenderWorker(lambda snap, path: _draw_enhanced_png(snap[0], path, snap[1]),
+                                      _present_texture, _texture_key)
+        _render_worker.adopt(_shader_file())
+    _render_worker.start(asyncio.get_event_loop())
+    # Status colours are taken from the values as of this call, not as of the render
+    _render_worker.submit((list(lines), dict(_current_values)))
 
+def _texture_key(snapshot):
+    """Digest of everything the panel draws: the lines, their status colours and the layout"""
+    lines, values = snapshot
+    # The "PI Sync" header is not drawn on this panel, so its clock does not count
+    shown = [line for line in lines if "PI Sync" not in line]
+    colours = [get_status_color(name, val) for name, val in values.items()]
+    layout = (IMG_SIZE, FONT_SIZE, SMALL_FONT_SIZE, TEXT_ATLAS)
+    return hashlib.blake2b(repr((shown, colours, layout)).encode("utf-8"), digest_size=8).hexdigest()
+
+def _present_texture(new_path):
     stage = get_context().get_stage()
     tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     if not tex:
         rebuild_material(force=True)
         tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     tex.GetInput("file").Set(Sdf.AssetPath(new_path))
-    print("Enhanced texture updated ->", new_path)
+    print(f"Enhanced texture updated -> {new_path} (rendered in {_render_worker.render_ms:.0f} ms off-loop, "
+          f"{_render_worker.hits} cache hits, {_render_worker.dropped} stale frames dropped)")
+
+def parse_pi_time(ts):
+    """PI Web API UTC timestamp -> Unix seconds (PI may send 7 fractional digits)"""
+    m = re.match(r"(\d{4}-\d\d-\d\dT\d\d:\d\d:\d\d)(\.\d+)?", ts)
+    base = datetime.datetime.strptime(m.group(1), "%Y-%m-%dT%H:%M:%S").replace(tzinfo=datetime.timezone.utc)
+    return base.timestamp() + float(m.group(2) or 0)
+
+class HistoryRing:
+    """Fixed-capacity series of float64 epoch timestamps and float32 values
+
+    Every sample is written twice, at i and i + capacity, so the samples held
+    are always one contiguous slice and views never copy, even across the wrap.
+    """
+
+    def __init__(self, capacity=HISTORY_CAPACITY):
+        self.capacity = capacity
+        self._ts = np.zeros(2 * capacity, np.float64)
+        self._vals = np.zeros(2 * capacity, np.float32)
+        self._head = 0          # next write position, in [0, capacity)
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def append(self, t, value):
+        i, cap = self._head, self.capacity
+        self._ts[i] = self._ts[i + cap] = t
+        self._vals[i] = self._vals[i + cap] = value
+        self._head = (i + 1) % cap
+        self._size = min(self._size + 1, cap)
+
+    def extend(self, ts, vals):
+        """Append arrays of samples, oldest first; only the newest `capacity` are kept"""
+        cap = self.capacity
+        ts, vals = ts[-cap:], vals[-cap:]
+        idx = (self._head + np.arange(len(ts))) % cap
+        self._ts[idx] = self._ts[idx + cap] = ts
+        self._vals[idx] = self._vals[idx + cap] = vals
+        self._head = (self._head + len(ts)) % cap
+        self._size = min(self._size + len(ts), cap)
+
+    def view(self):
+        """Zero-copy (timestamps, values) views of the samples held, oldest first"""
+        end = self._head + self.capacity
+        return self._ts[end - self._size:end], self._vals[end - self._size:end]
+
+    def window(self, start=None, end=None):
+        """Views of the samples with start <= timestamp <= end"""
+        ts, vals = self.view()
+        lo = np.searchsorted(ts, start) if start is not None else 0
+        hi = np.searchsorted(ts, end, "right") if end is not None else len(ts)
+        return ts[lo:hi], vals[lo:hi]
+
+    def last_time(self):
+        return float(self._ts[self._head + self.capacity - 1]) if self._size else None
+
+    def trim_before(self, t):
+        """Forget samples older than t"""
+        self._size -= int(np.searchsorted(self.view()[0], t))
+
+    def stats(self, start=None, end=None):
+        """min/max/mean and least-squares slope (per hour) over a window, or None if it is empty"""
+        ts, vals = self.window(start, end)
+        if not len(vals):
+            return None
+        v = vals.astype(np.float64)
+        x = ts - ts.mean()
+        denom = float(np.dot(x, x))
+        slope = float(np.dot(x, v - v.mean())) / denom if denom else 0.0
+        return {"min": float(v.min()), "max": float(v.max()), "mean": float(v.mean()),
+                "slope_per_hour": slope * 3600, "count": len(v)}
+
+def update_history(name, webid):
+    """Fetch only events newer than the last one held for name, append them and trim the window"""
+    if name not in _historical_data:
+        _historical_data[name] = HistoryRing()
+    ring = _historical_data[name]
+    last = ring.last_time()
+    ts, vals = get_historical_data(webid, HISTORY_HOURS, start_time=last)
+    if last is not None:
+        keep = ts > last  # startTime is inclusive
+        ts, vals = ts[keep], vals[keep]
+    ring.extend(ts, vals)
+    ring.trim_before(time.time() - HISTORY_HOURS * 3600)
+    return len(ts)
+
+def refresh_trends(webids):
+    """Re-read the long min/avg/max trend of the given tags whose TREND_REFRESH_SEC has passed"""
+    now = time.monotonic()
+    due = [name for name in webids if now >= _trend_due.get(name, 0.0)]
+    for name in due:
+        _trend_due[name] = now + TREND_REFRESH_SEC
+        try:
+            _trend_data[name] = get_summary_bands(webids[name])
+        except Exception as e:
+            print(f"Trend data error for {name}: {e}")
+    return len(due)
+
+async def _one_cycle(names=None, full=False):
+    """Fetch and apply every tag, or only `names` when the scheduler says they are due
+
+    full=True reads every tag's current value instead of only those changed since
+    their markers.
+    """
+    global _current_values, _historical_data, _history_due
+    updated, trips, suppressed = 0, 0, 0
+    t0, waited = time.perf_counter(), 0.0
 
-async def _one_cycle():
-    global _current_values, _historical_data
-    updated, lines = 0, []
-    
     try:
-        for item in get_element_attributes():
-            name, webid = item["Name"], item["WebId"]
-            if name in ATTR_MAP:
-                val = get_attribute_value(webid)
-                cfg = ATTR_MAP[name]
-                ok, _ = update_usd_prim(cfg["prim_path"], cfg["attribute"], val)
-                
-                if ok:
-                    updated += 1
-                    _current_values[name] = val
-                    lines.append(f"{DISPLAY.get(name, name)}: {fmt2(val)}")
-                    
-                    # Collect historical data occasionally
-                    if updated == 1:  # Only for first attribute to avoid too many requests
-                        _historical_data[name] = get_historical_data(webid, hours=6)
-                        
+        if names is None:
+            webids, values, trips = await fetch_element_values(full)
+        else:
+            webids, values, trips = await asyncio.get_event_loop().run_in_executor(
+                _executor, read_scheduled_values, names)
+        waited = time.perf_counter() - t0
+        values, suppressed = filter_deadband(values)
+        written = write_usd_batch(mapped_updates(values))
+        note_written(values, written)
+        for name, val in values.items():
+            if ATTR_MAP[name]["prim_path"] in written:
+                updated += 1
+                _current_values[name] = val
+
+                # Collect historical data occasionally
+                if updated == 1 and time.monotonic() >= _history_due:  # First attribute, at most once per POLL_SEC
+                    _history_due = time.monotonic() + POLL_SEC
+                    t_hist = time.perf_counter()
+                    await asyncio.get_event_loop().run_in_executor(
+                        _executor, update_history, name, webids[name])
+                    waited += time.perf_counter() - t_hist
+                    trips += 1
+
+        t_trend = time.perf_counter()
+        trips += await asyncio.get_event_loop().run_in_executor(_executor, refresh_trends, webids)
+        waited += time.perf_counter() - t_trend
+
     except Exception:
         print(">>> _one_cycle error:\n", traceback.format_exc())
 
-    if lines:
+    if updated:
+        # Tags that did not change keep their last value on the panel
+        lines = [f"{DISPLAY.get(name, name)}: {fmt2(val)}" for name, val in _current_values.items()]
         ts = datetime.datetime.now().strftime("%H:%M:%S")
         lines.insert(0, f"PI Sync {ts}")
         try:
@@ -573,24 +1495,39 @@ async def _one_cycle():
         except Exception:
             print(">>> refresh_texture error:\n", traceback.format_exc())
 
-    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] updated {updated} attrs")
+    blocked = time.perf_counter() - t0 - waited
+    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] updated {updated} attrs in {trips} round-trips, {suppressed} suppressed by deadband "
+          f"(fetch {waited * 1000:.0f} ms off-loop, loop blocked {blocked * 1000:.0f} ms)")
     return updated
 
 async def _polling_loop(period=POLL_SEC):
     print("Enhanced async polling loop started")
     try:
+        subscribe_stage_events()
+        build_handle_table()
         ensure_uv()
         rebuild_material(force=True)
         refresh_texture(["Loading Enhanced Panel..."])
     except Exception:
         print(">>> init error:\n", traceback.format_exc())
 
+    if SCHEDULED_POLLING:
+        build_schedule()
+
     while True:
         try:
-            await _one_cycle()
+            if SCHEDULED_POLLING:
+                due = pop_due_tags(time.monotonic())
+                if due:
+                    await _one_cycle(due)
+            else:
+                await _one_cycle()
         except Exception:
             print(">>> polling_loop error:\n", traceback.format_exc())
-        await asyncio.sleep(period)
+        if SCHEDULED_POLLING and _schedule:
+            await asyncio.sleep(max(0.05, _schedule[0][0] - time.monotonic()))
+        else:
+            await asyncio.sleep(period)
 
 def start():
     global _task
@@ -611,10 +1548,13 @@ def start_monitoring_only():
     print(f"PI monitoring restarted ({POLL_SEC}s)")
 
 def stop():
-    global _task, _info_window, _control_window
+    global _task, _info_window, _control_window, _stage_sub
     if _task and not _task.done():
         _task.cancel()
     _task = None
+    _stage_sub = None
+    if _render_worker:
+        _render_worker.stop()
     if _info_window:
         _info_window.destroy()
         _info_window = None
@@ -630,7 +1570,8 @@ def cleanup_all():
     print("All windows closed.")
 
 def force_refresh():
-    asyncio.ensure_future(_one_cycle())
+    """Read and apply every tag now, whatever the schedule and the update markers say"""
+    asyncio.ensure_future(_one_cycle(full=True))
 
 def test_png():
     ensure_uv()
@@ -647,11 +1588,123 @@ def test_png():
     refresh_texture(test_lines)
     print("Enhanced test PNG generated")
 
+def benchmark_history(tags=10000, samples=360):
+    """Memory and speed of HistoryRing against the old lists of (timestamp string, value) tuples"""
+    t_end = time.time()
+    stamps = t_end - 60.0 * np.arange(samples)[::-1]
+    iso = [_pi_time(t) for t in stamps]
+    results = {}
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    lists = {i: [(iso[k], 20.0 + k * 0.01) for k in range(samples)] for i in range(tags)}
+    build = time.perf_counter() - t0
+    lists_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    stamp = _pi_time(t_end + 60)
+    for series in lists.values():
+        series.append((stamp, 21.0))
+        del series[:1]
+    append = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for series in lists.values():
+        pts = [(parse_pi_time(t), v) for t, v in series]
+        vals = [v for _, v in pts]
+        mean_t, mean_v = sum(t for t, _ in pts) / len(pts), sum(vals) / len(vals)
+        num = sum((t - mean_t) * (v - mean_v) for t, v in pts)
+        den = sum((t - mean_t) ** 2 for t, _ in pts)
+        min(vals), max(vals), num / den
+    results["lists"] = (lists_mb, build, append, time.perf_counter() - t0)
+    del lists
+
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rings = {}
+    values = (20.0 + np.arange(samples) * 0.01).astype(np.float32)
+    for i in range(tags):
+        rings[i] = HistoryRing(samples)
+        rings[i].extend(stamps, values)
+    build = time.perf_counter() - t0
+    rings_mb = tracemalloc.get_traced_memory()[0] / 2**20
+    tracemalloc.stop()
+    t0 = time.perf_counter()
+    for ring in rings.values():
+        ring.append(t_end + 60, 21.0)
+    append = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    for ring in rings.values():
+        ring.stats()
+    results["HistoryRing"] = (rings_mb, build, append, time.perf_counter() - t0)
+
+    print(f"== History store, {tags} tags x {samples} samples ==")
+    for kind, (mb, build, append, stats) in results.items():
+        print(f"{kind:<12} {mb:8.1f} MB  build {build * 1000:8.0f} ms  "
+              f"append 1/tag {append * 1000:7.1f} ms  min/max/mean/slope {stats * 1000:8.0f} ms")
+
+def benchmark_text(samples=("23.50", "-4.07", "125.30", "1013.25", "0.00"), repeat=200,
+                   origins=((400, 90), (400.5, 90), (400.25, 90.5), (401.75, 90.75), (-3.5, 90.5))):
+    """ImageDraw.text against the glyph atlas for value strings: time per string and pixel difference
+
+    The difference is the worst over `origins`, which include fractional ones, as
+    value columns are placed at computed, not always whole, positions.
+    """
+    font, _ = _ensure_fonts()
+    base = _draw_enhanced_chrome(IMG_SIZE)
+    atlas = _atlas_for(font)
+    for text in samples:
+        for fill in ((255, 255, 255, 255), (150, 255, 150, 255)):
+            ref, blit = base.copy(), base.copy()
+            draw = ImageDraw.Draw(ref)
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                draw.text((400, 90), text, fill=fill, font=font)
+            t_draw = (time.perf_counter() - t0) / repeat
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                placed, box = atlas.layout((400, 90), text)
+                atlas.blit(blit, placed, box, fill)
+            t_blit = (time.perf_counter() - t0) / repeat
+            # One pass each on fresh copies per origin for the comparison
+            worst, off = 0, 0
+            for xy in origins:
+                ref, blit = base.copy(), base.copy()
+                ImageDraw.Draw(ref).text(xy, text, fill=fill, font=font)
+                placed, box = atlas.layout(xy, text)
+                atlas.blit(blit, placed, box, fill)
+                diff = np.abs(np.asarray(ref, np.int16) - np.asarray(blit, np.int16))
+                worst, off = max(worst, int(diff.max())), max(off, int((diff.max(axis=2) > 8).sum()))
+            print(f"{text:>8} {str(fill[:3]):<16} ImageDraw {t_draw * 1e6:7.0f} us  atlas {t_blit * 1e6:7.0f} us  "
+                  f"max diff {worst:3d}  pixels off by >8: {off}")
+
+def benchmark_encode(sizes=((1024, 768), (1200, 600)), repeat=20):
+    """Encode-and-write time and file size of a rendered panel for every TEXTURE_ENCODINGS entry"""
+    names = list(DISPLAY)
+    values = {name: 20.0 + i * 1.37 for i, name in enumerate(names)}
+    lines = ["PI Sync"] + [f"{DISPLAY[n]}: {fmt2(values[n])}" for n in names]
+    for size in sizes:
+        img = _render_enhanced(lines, PanelCanvas(_draw_enhanced_chrome(size)), values)
+        # "raw" is the RGBA buffer as is, the floor for any encoder
+        for fmt, (ext, params) in list(TEXTURE_ENCODINGS.items()) + [("raw", (".rgba", None))]:
+            path = os.path.join(PNG_DIR, f"bench_encode{ext}")
+            t0 = time.perf_counter()
+            for _ in range(repeat):
+                if params is None:
+                    with open(path, "wb") as f:
+                        f.write(img.tobytes())
+                else:
+                    img.save(path, **params)
+            ms = (time.perf_counter() - t0) / repeat * 1000
+            kib = os.path.getsize(path) / 1024
+            os.remove(path)
+            mark = "  <- TEXTURE_FORMAT" if fmt == TEXTURE_FORMAT else ""
+            print(f"{size[0]}x{size[1]} {fmt:<8} {ms:6.1f} ms {kib:7.0f} KiB{mark}")
+
 def diag():
     stage = get_context().get_stage()
     tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     print("== Enhanced Diagnostics ==")
-    print("PNG_DIR:", PNG_DIR, "files:", os.listdir(PNG_DIR))
+    print("TEXTURE_DIR:", TEXTURE_DIR, "files:", os.listdir(TEXTURE_DIR))
     print("mat prim exists:", stage.GetPrimAtPath(MAT_PATH).IsValid())
     print("tex node exists:", bool(tex))
     if tex:
@@ -2,13 +2,14 @@
 #  PI -> USD -> PNG -> Apply to 3D Object Surface (Stable Auto Version)
 # ============================================================
 
-import asyncio, datetime, os, tempfile, time, traceback
+import asyncio, collections, concurrent.futures, datetime, hashlib, math, os, re, tempfile, threading, time, traceback
 import requests, urllib3
 from decimal import Decimal, ROUND_HALF_UP
 from requests.auth import HTTPBasicAuth
 
-from omni.usd import get_context
+from omni.usd import get_context, StageEventType
 from pxr import Sdf, UsdShade, UsdGeom
+import numpy as np
 
 # ---------------- Pillow ----------------
 try:
@@ -27,6 +28,7 @@ AUTH     = HTTPBasicAuth(USERNAME, PASSWORD)
 ATTR_URL = ("https://192.168.195.133/piwebapi/elements/"
             "F1Emo1CwofaPqEWTbP-5QLeDbQ7H901dxc8BGNOQAMKUls9QV0lOLVMzM0M2XERBVEFCQVNFMVxB5Y2AXOWGt-awo-apnzE"
             "/attributes")
+ELEMENT_WEBID = ATTR_URL.split("/elements/")[1].split("/")[0]
 
 
 # PI name → USD attribute - Modified to include temp_01 through temp_11
@@ -63,13 +65,31 @@ DISPLAY = {
 TARGET_PRIM = "/World/Monitor/shell"      # Mesh to apply texture to
 MAT_PATH    = "/World/Monitor/PI_PanelMat"
 POLL_SEC    = 30.0                        # Polling interval in seconds
+BATCH_READS = True                        # Read all mapped tags in one /batch call
+STREAMSET_READS = True                    # Read the whole element in one streamsets call
+UPDATES_MODE = True                       # After the first read, fetch only values changed since the last marker
+DEADBAND_ABS = 0.05                       # Skip USD writes for changes smaller than this...
+DEADBAND_PCT = 0.5                        # ...or this percent of the last written value
+MAX_SILENCE_SEC = 300.0                   # Always write a tag at least this often
 
 # Modified image size to be taller to accommodate 11 temperature readings
 IMG_SIZE    = (1024, 768)  # Increased height from 512 to 768
 BG_RGBA     = (0, 0, 0, 180)
 FONT_SIZE   = 45  # Slightly smaller font to fit more data
+TEXT_ATLAS  = True  # blit value text from a numpy glyph atlas instead of ImageDraw.text
 PNG_DIR     = os.path.join(tempfile.gettempdir(), "pi_panel")
-os.makedirs(PNG_DIR, exist_ok=True)
+TEXTURE_DIR = os.path.join(PNG_DIR, "mode1")  # This script's texture cache; other monitors share PNG_DIR
+TEXTURE_CACHE_SIZE = 64    # Panel textures kept in TEXTURE_DIR; least recently shown are evicted
+TEXTURE_FORMAT = "tga-rle"  # Panel texture encoding, a key of TEXTURE_ENCODINGS; see Monitor_V2.benchmark_encode()
+TEXTURE_ENCODINGS = {        # Name -> (file extension, Image.save arguments)
+    "png-6":   (".png", {"format": "PNG", "compress_level": 6}),  # Pillow's default
+    "png-3":   (".png", {"format": "PNG", "compress_level": 3}),
+    "png-1":   (".png", {"format": "PNG", "compress_level": 1}),
+    "tga-rle": (".tga", {"format": "TGA", "compression": "tga_rle"}),
+    "tga":     (".tga", {"format": "TGA"}),
+    "bmp":     (".bmp", {"format": "BMP"}),
+}
+os.makedirs(TEXTURE_DIR, exist_ok=True)
 
 # ---------------- Globals ----------------
 _session         = requests.Session()
@@ -77,10 +97,19 @@ _session.auth    = AUTH
 _session.verify  = False
 
 _font            = None
+_canvas          = None          # PanelCanvas reused across updates
+_canvas_size     = None
 _mat_ready       = False
-_png_idx         = 0
+_render_worker   = None          # RenderWorker, started on the first refresh_texture
+_current_values  = {}            # Last value written per PI name
 _task            = None          # asyncio Task
 _stage_sub       = None          # Stage event subscription (optional)
+_handles         = None          # {(prim_path, attr): Sdf.AttributeSpec or None}
+_handle_layer    = None
+_markers         = {}            # {name: update marker}
+_marker_webids   = {}            # {name: webid} registered for updates
+_last_written    = {}            # {name: (value, monotonic time)} last value sent to USD
+_executor        = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="pi_fetch")
 
 # ============================================================
 # Basic Tools
@@ -101,6 +130,137 @@ def get_attribute_value(webid):
     r.raise_for_status()
     return r.json()["Value"]
 
+def get_attribute_values_batch(webids):
+    """Read {name: webid} in one /batch call; failed sub-requests fall back to per-tag reads"""
+    body = {name: {"Method": "GET", "Resource": f"{BASE_URL}/streams/{webid}/value"}
+            for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/batch", json=body, timeout=10)
+    r.raise_for_status()
+    results = r.json()
+    values, trips = {}, 1
+    for name, webid in webids.items():
+        sub = results.get(name) or {}
+        content = sub.get("Content")
+        if sub.get("Status") == 200 and isinstance(content, dict) and "Value" in content:
+            values[name] = content["Value"]
+            continue
+        trips += 1
+        try:
+            values[name] = get_attribute_value(webid)
+        except Exception as exc:
+            print(f"Read failed for {name}: {exc}")
+    return values, trips
+
+def read_attribute_values(webids):
+    """Return ({name: value}, round_trips) using the configured read mode"""
+    if BATCH_READS and len(webids) > 1:
+        return get_attribute_values_batch(webids)
+    return {name: get_attribute_value(webid) for name, webid in webids.items()}, len(webids)
+
+def get_element_values():
+    """Current value of every attribute on the element in one streamsets call"""
+    params = {"selectedFields": "Items.Name;Items.WebId;Items.Value.Value;Items.Value.Timestamp"}
+    r = _session.get(f"{BASE_URL}/streamsets/{ELEMENT_WEBID}/value", params=params, timeout=10)
+    r.raise_for_status()
+    return r.json()["Items"]
+
+def read_element_values():
+    """Return ({name: webid}, {name: value}, round_trips) for the tags in ATTR_MAP"""
+    if STREAMSET_READS:
+        try:
+            items = [item for item in get_element_values() if item["Name"] in ATTR_MAP]
+            webids = {item["Name"]: item["WebId"] for item in items}
+            values = {item["Name"]: item["Value"]["Value"] for item in items if item.get("Value")}
+            return webids, values, 1
+        except Exception as exc:
+            print(f"Streamset read failed, falling back to per-attribute reads: {exc}")
+    webids = {item["Name"]: item["WebId"] for item in get_element_attributes() if item["Name"] in ATTR_MAP}
+    values, trips = read_attribute_values(webids)
+    return webids, values, trips + 1
+
+def register_update_markers(webids):
+    """Register {name: webid} for stream updates and remember each stream's marker"""
+    global _markers, _marker_webids
+    names = {webid: name for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/streamsets/updates",
+                      params=[("webId", webid) for webid in webids.values()], timeout=10)
+    r.raise_for_status()
+    _markers = {names[item["Source"]]: item["LatestMarker"] for item in r.json().get("Items", [])
+                if item.get("Status") == "Succeeded" and item.get("Source") in names}
+    _marker_webids = dict(webids)
+
+def get_marker_updates():
+    """Return {name: latest value} for streams that changed since their marker and advance the markers"""
+    names = {marker: name for name, marker in _markers.items()}
+    r = _session.get(f"{BASE_URL}/streamsets/updates",
+                     params=[("marker", marker) for marker in _markers.values()], timeout=10)
+    r.raise_for_status()
+    values = {}
+    for item, marker in zip(r.json().get("Items", []), list(_markers.values())):
+        name = names[marker]
+        if item.get("Status") != "Succeeded":
+            _markers.pop(name, None)  # expired/failed marker: re-read and re-register next cycle
+            continue
+        _markers[name] = item["LatestMarker"]
+        events = item.get("Events") or []
+        if events:
+            values[name] = events[-1]["Value"]
+    return values
+
+def read_changed_values():
+    """Like read_element_values(), but after the first read returns only tags that changed"""
+    if UPDATES_MODE and _markers and len(_markers) == len(_marker_webids):
+        try:
+            return dict(_marker_webids), get_marker_updates(), 1
+        except Exception as exc:
+            print(f"Update markers failed, doing a full read: {exc}")
+            _markers.clear()
+    webids, values, trips = read_element_values()
+    if UPDATES_MODE and webids:
+        try:
+            register_update_markers(webids)
+            trips += 1
+        except Exception as exc:
+            print(f"Update marker registration failed: {exc}")
+    return webids, values, trips
+
+async def fetch_element_values():
+    """Run read_changed_values() on the worker thread so HTTP never blocks Kit's loop"""
+    return await asyncio.get_event_loop().run_in_executor(_executor, read_changed_values)
+
+def filter_deadband(values):
+    """Drop values inside their tag's deadband; returns (values to write, suppressed count)
+
+    An ATTR_MAP entry may carry its own {"deadband": {"abs": ..., "pct": ...}}.
+    """
+    now = time.monotonic()
+    accepted, suppressed = {}, 0
+    for name, val in values.items():
+        try:
+            v = float(val)
+        except (TypeError, ValueError):
+            accepted[name] = val
+            continue
+        last = _last_written.get(name)
+        if last is not None and now - last[1] < MAX_SILENCE_SEC:
+            band = ATTR_MAP.get(name, {}).get("deadband", {})
+            limit = max(band.get("abs", DEADBAND_ABS), abs(last[0]) * band.get("pct", DEADBAND_PCT) / 100.0)
+            if abs(v - last[0]) < limit:
+                suppressed += 1
+                continue
+        accepted[name] = val
+    return accepted, suppressed
+
+def note_written(values, written):
+    """Make the values whose prim is in `written` the deadband reference; call after the write"""
+    now = time.monotonic()
+    for name, val in values.items():
+        if ATTR_MAP[name]["prim_path"] in written:
+            try:
+                _last_written[name] = (float(val), now)
+            except (TypeError, ValueError):
+                pass
+
 def update_usd_prim(prim_path, attr_name, value):
     stage = get_context().get_stage()
     prim  = stage.GetPrimAtPath(prim_path)
@@ -112,6 +272,91 @@ def update_usd_prim(prim_path, attr_name, value):
     attr.Set(to_float2(value))
     return True, f"{attr_name}:{fmt2(value)}"
 
+def mapped_updates(values):
+    """{name: value} -> {prim_path: {attr: value}} through ATTR_MAP"""
+    updates = {}
+    for name, val in values.items():
+        cfg = ATTR_MAP[name]
+        updates.setdefault(cfg["prim_path"], {})[cfg["attribute"]] = val
+    return updates
+
+def _resolve_handles(stage, keys):
+    """Validate the prims for keys in one pass and cache their attribute specs on the edit target"""
+    edit_target = stage.GetEditTarget()
+    layer = edit_target.GetLayer()
+    prim_paths = {prim_path for prim_path, _ in keys}
+    valid = {p for p in prim_paths if stage.GetPrimAtPath(p).IsValid()}
+    missing = sorted(prim_paths - valid)
+    if missing:
+        print(f"Prims not found (skipped until the stage changes): {missing}")
+    with Sdf.ChangeBlock():
+        for prim_path, attr_name in keys:
+            attr_spec = None
+            if prim_path in valid:
+                prim_spec = Sdf.CreatePrimInLayer(layer, edit_target.MapToSpecPath(Sdf.Path(prim_path)))
+                attr_spec = prim_spec.attributes.get(attr_name)
+                if not attr_spec:
+                    attr_spec = Sdf.AttributeSpec(prim_spec, attr_name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+            _handles[(prim_path, attr_name)] = attr_spec
+
+def build_handle_table():
+    """Resolve every ATTR_MAP prim/attribute once; invalid prims are cached as None and logged once"""
+    global _handles, _handle_layer
+    _handles = {}
+    stage = get_context().get_stage()
+    _handle_layer = stage.GetEditTarget().GetLayer() if stage else None
+    if not stage:
+        return
+    _resolve_handles(stage, [(cfg["prim_path"], cfg["attribute"]) for cfg in ATTR_MAP.values()])
+    resolved = sum(1 for spec in _handles.values() if spec is not None)
+    print(f"Handle table built: {resolved}/{len(_handles)} attributes resolved")
+
+def invalidate_handle_table():
+    """Drop the handle table; the next write rebuilds it against the current stage"""
+    global _handles, _handle_layer
+    _handles, _handle_layer = None, None
+
+def _on_stage_event(event):
+    if event.type in (int(StageEventType.OPENED), int(StageEventType.CLOSED)):
+        invalidate_handle_table()
+
+def subscribe_stage_events():
+    """Rebuild the handle table when the stage is opened, closed or reloaded"""
+    global _stage_sub
+    if _stage_sub is None:
+        _stage_sub = get_context().get_stage_event_stream().create_subscription_to_pop(
+            _on_stage_event, name="PI monitor handle table")
+
+def write_usd_batch(updates):
+    """Apply {prim_path: {attr: value}} inside one Sdf.ChangeBlock; returns the prim paths written
+
+    Each value is a lookup in the handle table plus a default Set on the cached
+    attribute spec. Paths outside ATTR_MAP are resolved once on first use.
+    """
+    stage = get_context().get_stage()
+    if not stage:
+        return set()
+    if _handles is None or _handle_layer != stage.GetEditTarget().GetLayer():
+        build_handle_table()
+    new_keys = [(p, a) for p, attrs in updates.items() for a in attrs if (p, a) not in _handles]
+    if new_keys:
+        _resolve_handles(stage, new_keys)
+    written, stale = set(), False
+    with Sdf.ChangeBlock():
+        for prim_path, attrs in updates.items():
+            for attr_name, value in attrs.items():
+                attr_spec = _handles[(prim_path, attr_name)]
+                if attr_spec is None:
+                    continue
+                if attr_spec.expired:
+                    stale = True
+                    continue
+                attr_spec.default = to_float2(value)
+                written.add(prim_path)
+    if stale:
+        invalidate_handle_table()
+    return written
+
 # ============================================================
 # UV Assurance
 # ============================================================
@@ -153,26 +398,165 @@ def _ensure_font():
         _font = ImageFont.load_default()
     return _font
 
-def _draw_png(lines, path):
-    """Draw PNG with multiple lines of text, with Schneider Electric green border and rounded corners"""
-    img = Image.new("RGBA", IMG_SIZE, (0, 0, 0, 0))  # Transparent background
-    d = ImageDraw.Draw(img)
-    font = _ensure_font()
+class GlyphAtlas:
+    """Coverage masks of single glyphs, rasterised once per font
+
+    Value strings are composed from them with numpy alpha blits using the same
+    blend ImageDraw.text applies to RGBA images, so the two are interchangeable.
+    """
+    CHARS = "0123456789+-.,:% /°ACFNVWahkz"
+
+    def __init__(self, font):
+        self.font = font
+        self._glyphs = {}       # {char: (x offset, y offset, float32 coverage, advance)}
+
+    def _glyph(self, ch):
+        g = self._glyphs.get(ch)
+        if g is None:
+            x0, y0, x1, y1 = self.font.getbbox(ch)
+            mask = Image.new("L", (max(1, x1 - x0), max(1, y1 - y0)), 0)
+            ImageDraw.Draw(mask).text((-x0, -y0), ch, fill=255, font=self.font)
+            g = self._glyphs[ch] = (x0, y0, np.asarray(mask, np.float32) / 255.0, self.font.getlength(ch))
+        return g
+
+    def layout(self, xy, text):
+        """Glyph placements for text drawn at xy, and their bounding box
+
+        Positions snap to pixels as ImageDraw.text does: x rounds half up with the
+        pen's fraction carried over, y rounds half down.
+        """
+        placed, pen = [], 0.0
+        oy = math.ceil(xy[1] - 0.5)
+        for ch in text:
+            x0, y0, cov, advance = self._glyph(ch)
+            placed.append((math.floor(xy[0] + pen + 0.5) + x0, oy + y0, cov))
+            pen += advance
+        if not placed:
+            ox = math.floor(xy[0] + 0.5)
+            return placed, (ox, oy, ox, oy)
+        return placed, (min(x for x, _, _ in placed), min(y for _, y, _ in placed),
+                         max(x + c.shape[1] for x, _, c in placed), max(y + c.shape[0] for _, y, c in placed))
+
+    def blit(self, img, placed, box, fill):
+        """Blend the placed glyphs in `fill` into img, reading and writing only box"""
+        bx0, by0, bx1, by1 = box
+        cov = np.zeros((by1 - by0, bx1 - bx0), np.float32)
+        for x, y, g in placed:
+            sub = cov[y - by0:y - by0 + g.shape[0], x - bx0:x - bx0 + g.shape[1]]
+            np.maximum(sub, g, out=sub)
+        cx0, cy0 = max(bx0, 0), max(by0, 0)
+        cx1, cy1 = min(bx1, img.width), min(by1, img.height)
+        if cx1 <= cx0 or cy1 <= cy0:
+            return
+        cov = cov[cy0 - by0:cy1 - by0, cx0 - bx0:cx1 - bx0, None]
+        cell = np.asarray(img.crop((cx0, cy0, cx1, cy1)), np.float32)
+        ink = np.asarray(fill, np.float32)
+        out = cell + (ink - cell) * cov
+        # Like ImageDraw, fully transparent pixels take the whole ink colour
+        clear = (cell[..., 3] == 0) & (cov[..., 0] > 0)
+        out[clear, :3] = ink[:3]
+        img.paste(Image.fromarray(np.rint(out).astype(np.uint8), "RGBA"), (cx0, cy0))
+
+_atlases = {}                   # {font: GlyphAtlas}
+
+def _atlas_for(font):
+    atlas = _atlases.get(font)
+    if atlas is None:
+        atlas = _atlases[font] = GlyphAtlas(font)
+    return atlas
+
+class PanelCanvas:
+    """Panel image whose static chrome is drawn once; cells are repainted only when they change
+
+    A changed cell is restored from the base image over the union of its old
+    and new boxes; every cell overlapping that area is then redrawn in creation
+    order, so neighbours it erased come back and the result matches a full
+    redraw. With `atlas`, text made only of GlyphAtlas.CHARS is blitted from the
+    glyph atlas.
+    """
+
+    def __init__(self, base, atlas=False):
+        self.base = base
+        self.img = base.copy()
+        self.atlas = atlas
+        self._draw = ImageDraw.Draw(self.img)
+        self._cells = {}        # {key: (box, state, paint)}
+
+    @staticmethod
+    def _grow(a, b):
+        """Union of two boxes"""
+        return min(a[0], b[0]), min(a[1], b[1]), max(a[2], b[2]), max(a[3], b[3])
+
+    def cell(self, key, box, state, paint=None):
+        """Repaint `key` with paint(draw) when its state changed; returns True if pixels changed"""
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        self._cells[key] = (box, state, paint)
+        if prev is None:
+            if paint is not None:
+                paint(self._draw)
+            return True
+        # Anti-aliasing can reach a pixel past a box, hence the 1 px margins
+        pad = lambda b: (b[0] - 1, b[1] - 1, b[2] + 1, b[3] + 1)
+        dirty, redraw = pad(self._grow(prev[0], box)), {key}
+        grown = True
+        while grown:
+            # Redrawing a cell paints all of it, so the area to restore takes in its box
+            grown = False
+            for k, (b, _, _) in self._cells.items():
+                b = pad(b)
+                if k not in redraw and b[0] < dirty[2] and dirty[0] < b[2] and b[1] < dirty[3] and dirty[1] < b[3]:
+                    redraw.add(k)
+                    dirty, grown = self._grow(dirty, b), True
+        # textbbox gives fractional boxes for fractional origins; paste needs whole pixels
+        dirty = (max(0, math.floor(dirty[0])), max(0, math.floor(dirty[1])),
+                 min(self.img.width, math.ceil(dirty[2])), min(self.img.height, math.ceil(dirty[3])))
+        if dirty[2] > dirty[0] and dirty[3] > dirty[1]:
+            self.img.paste(self.base.crop(dirty), dirty[:2])
+        for k, (_, _, p) in self._cells.items():
+            if k in redraw and p is not None:
+                p(self._draw)
+        return True
+
+    def text(self, key, xy, text, fill, font):
+        state = (xy, text, fill, font)
+        prev = self._cells.get(key)
+        if prev is not None and prev[1] == state:
+            return False
+        if self.atlas and all(ch in GlyphAtlas.CHARS for ch in text):
+            atlas = _atlas_for(font)
+            placed, box = atlas.layout(xy, text)
+            return self.cell(key, box, state, lambda d: atlas.blit(self.img, placed, box, fill))
+        box = self._draw.textbbox(xy, text, font=font)
+        return self.cell(key, box, state, lambda d: d.text(xy, text, fill=fill, font=font))
+
+    def textlength(self, text, font):
+        return self._draw.textlength(text, font=font)
+
+    def prune(self, keep):
+        """Return every cell not in `keep` to the background"""
+        for key in [k for k in self._cells if k not in keep]:
+            self.cell(key, self._cells[key][0], None)
+            del self._cells[key]
+
+def _draw_chrome(size):
+    """Rounded panel with the Schneider Electric green border, drawn once per canvas"""
+    img = Image.new("RGBA", size, (0, 0, 0, 0))  # Transparent background
     
     # Define styling parameters - Schneider Electric branding
     corner_radius = 15
     border_width = 4
     border_color = (60, 181, 75, 255)  # Schneider Electric green border
     bg_color = (35, 35, 35, 200)  # Dark background with some transparency
-    text_color = (255, 255, 255, 255)  # White text
     
     # Calculate main rectangle coordinates
     margin = 8
     x1, y1 = margin, margin
-    x2, y2 = IMG_SIZE[0] - margin, IMG_SIZE[1] - margin
+    x2, y2 = size[0] - margin, size[1] - margin
     
     # Create a temporary image for the rounded rectangle
-    temp_img = Image.new("RGBA", IMG_SIZE, (0, 0, 0, 0))
+    temp_img = Image.new("RGBA", size, (0, 0, 0, 0))
     temp_draw = ImageDraw.Draw(temp_img)
     
     # Draw background rounded rectangle
@@ -183,18 +567,47 @@ def _draw_png(lines, path):
                                outline=border_color, width=border_width)
     
     # Composite the rounded rectangle onto the main image
-    img = Image.alpha_composite(img, temp_img)
-    d = ImageDraw.Draw(img)
+    return Image.alpha_composite(img, temp_img)
+
+def _render_lines(lines, canvas):
+    """Repaint only the lines of `canvas` that changed; returns the panel image"""
+    font = _ensure_font()
+    text_color = (255, 255, 255, 255)  # White text
+    keep = set()
     
-    # Draw the text lines
+    # Labels and values are separate cells so a new value leaves its label alone
     y = 30
     line_spacing = 62  # Adjusted line spacing for better fit
-    for txt in lines:
-        d.text((40, y), txt, fill=text_color, font=font)
+    for i, txt in enumerate(lines):
+        label, sep, value = txt.partition(": ")
+        label += sep
+        canvas.text(("label", i), (40, y), label, text_color, font)
+        canvas.text(("value", i), (40 + canvas.textlength(label, font), y), value, text_color, font)
+        keep.update({("label", i), ("value", i)})
         y += line_spacing
+    canvas.prune(keep)
+    return canvas.img
+
+def save_texture(img, path):
+    """Encode `img` to `path` with the TEXTURE_FORMAT settings"""
+    img.save(path, **TEXTURE_ENCODINGS[TEXTURE_FORMAT][1])
+
+def _draw_png(lines, path):
+    """Draw PNG with multiple lines of text, with Schneider Electric green border and rounded corners"""
+    global _canvas, _canvas_size
+    if _canvas is None or _canvas_size != IMG_SIZE:
+        _canvas, _canvas_size = PanelCanvas(_draw_chrome(IMG_SIZE), atlas=TEXT_ATLAS), IMG_SIZE
     
     # Save the image
-    img.save(path)
+    save_texture(_render_lines(lines, _canvas), path)
+
+def _placeholder_texture():
+    """Plain background for Tex.file until the render worker has presented a panel"""
+    path = os.path.join(TEXTURE_DIR, "panel_placeholder.png")
+    if not os.path.exists(path):
+        Image.new("RGBA", IMG_SIZE, BG_RGBA).save(path)
+    return path
+
 def rebuild_material(force=False):
     global _mat_ready
     if _mat_ready and not force:
@@ -216,7 +629,8 @@ def rebuild_material(force=False):
     # texture
     tex = UsdShade.Shader.Define(stage, f"{MAT_PATH}/Tex")
     tex.CreateIdAttr("UsdUVTexture")
-    tex.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(os.path.join(PNG_DIR, "panel_0.png"))
+    tex.CreateInput("file", Sdf.ValueTypeNames.Asset).Set(
+        (_render_worker and _render_worker.front_path) or _placeholder_texture())
     tex.CreateInput("st",   Sdf.ValueTypeNames.Float2).ConnectToSource(uv_out)
     tex_rgb = tex.CreateOutput("rgb", Sdf.ValueTypeNames.Float3)
 
@@ -236,13 +650,156 @@ def rebuild_material(force=False):
     _mat_ready = True
     print("Material rebuilt & bound.")
 
-def refresh_texture(lines):
-    """Draw PNG and update shader file (rotate filenames to avoid cache)"""
-    global _png_idx
-    _png_idx = (_png_idx + 1) % 5
-    new_path = os.path.join(PNG_DIR, f"panel_{_png_idx}.png")
-    _draw_png(lines, new_path)
+class RenderWorker:
+    """Thread that owns the Pillow work for the panel texture
+
+    submit() is latest-wins: a snapshot that arrives while another is still
+    pending replaces it. Textures are content-addressed: each file is named by
+    key(snapshot), written once and never rewritten, so a state that was already
+    rendered costs no drawing and no write. The next snapshot is not taken until
+    the previous one has been swapped into Tex.file on Kit's loop, and the file
+    the shader references is never evicted from the cache.
+    """
+
+    def __init__(self, render, present, key):
+        self._render = render           # (snapshot, path), called on the worker thread
+        self._present = present         # (path), called on Kit's loop
+        self._key = key                 # snapshot -> hex digest; equal digests mean equal pixels
+        self._cond = threading.Condition()
+        self._pending = None
+        self._in_flight = False         # a finished frame is waiting for its swap
+        self._stopping = False
+        self._thread = None
+        self._loop = None
+        self._cache = collections.OrderedDict()  # {path: None}, least recently shown first
+        self._front = None              # file the shader references
+        self.render_ms = 0.0
+        self.dropped = 0
+        self.hits = 0
+        self.evicted = 0
+
+    def texture_path(self, key):
+        return os.path.join(TEXTURE_DIR, f"panel_{key}{TEXTURE_ENCODINGS[TEXTURE_FORMAT][0]}")
+
+    @property
+    def front_path(self):
+        return self._front
+
+    def adopt(self, keep=None):
+        """Delete cached textures left by an earlier run, except `keep`, which the shader still references"""
+        for name in os.listdir(TEXTURE_DIR):
+            path = os.path.join(TEXTURE_DIR, name)
+            if re.fullmatch(r"panel_[0-9a-f]{16}\.(png|tga|bmp)", name) and path != keep:
+                os.remove(path)
+        if keep and os.path.exists(keep):
+            self._cache[keep] = None
+            self._front = keep
+
+    def start(self, loop):
+        with self._cond:
+            self._loop = loop
+            self._stopping = False
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="panel_render", daemon=True)
+                self._thread.start()
+
+    def submit(self, snapshot):
+        with self._cond:
+            if self._pending is not None:
+                self.dropped += 1
+            self._pending = snapshot
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._pending = None
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._stopping and (self._pending is None or self._in_flight):
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                snapshot, self._pending = self._pending, None
+                self._in_flight = True
+                loop = self._loop
+            try:
+                path = self.texture_path(self._key(snapshot))
+                if path == self._front:
+                    self.hits += 1
+                    self._swapped()     # already on screen; nothing to draw, write or swap
+                    continue
+                if path in self._cache and os.path.exists(path):
+                    self.hits += 1
+                    self.render_ms = 0.0
+                else:
+                    t0 = time.perf_counter()
+                    self._render(snapshot, path)
+                    self.render_ms = (time.perf_counter() - t0) * 1000
+                self._cache[path] = None
+                self._cache.move_to_end(path)
+                self._evict(path)
+                loop.call_soon_threadsafe(self._swap, path)
+            except Exception:
+                print(">>> render worker error:\n", traceback.format_exc())
+                self._swapped()
+
+    def _evict(self, incoming):
+        """Drop least recently shown files beyond TEXTURE_CACHE_SIZE, never the front or incoming one"""
+        for path in list(self._cache):
+            if len(self._cache) <= TEXTURE_CACHE_SIZE:
+                return
+            if path in (self._front, incoming):
+                continue
+            del self._cache[path]
+            try:
+                os.remove(path)
+                self.evicted += 1
+            except OSError:
+                pass
+
+    def _swap(self, path):
+        try:
+            self._present(path)
+            self._front = path
+        except Exception:
+            print(">>> refresh_texture error:\n", traceback.format_exc())
+        self._swapped()
 
+    def _swapped(self):
+        with self._cond:
+            self._in_flight = False
+            self._cond.notify()
+
+def _shader_file():
+    """Path currently set on the Tex shader's file input, or None"""
+    tex = UsdShade.Shader.Get(get_context().get_stage(), f"{MAT_PATH}/Tex")
+    asset = tex.GetInput("file").Get() if tex else None
+    return asset.path if asset else None
+
+def refresh_texture(lines):
+    """Hand the panel to the render worker; Kit's loop only swaps Tex.file when the frame is ready"""
+    global _render_worker
+    if _render_worker is None:
+        _render_worker = RenderWorker(_draw_png, _present_texture, _texture_key)
+        _render_worker.adopt(_shader_file())
+    _render_worker.start(asyncio.get_event_loop())
+    _render_worker.submit(list(lines))
+
+def _texture_key(lines):
+    """Digest of every line the panel draws, the "PI Sync" clock included, and the layout
+
+    The clock is drawn to the minute, so a state that recurs within the same
+    minute reuses the texture already on disk.
+    """
+    shown = list(lines)
+    layout = (IMG_SIZE, FONT_SIZE, TEXT_ATLAS)
+    return hashlib.blake2b(repr((shown, layout)).encode("utf-8"), digest_size=8).hexdigest()
+
+def _present_texture(new_path):
     stage = get_context().get_stage()
     tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     if not tex:
@@ -251,50 +808,62 @@ def refresh_texture(lines):
 
     tex.GetInput("file").Set(Sdf.AssetPath(new_path))
     # For more aggressive cache busting: tex.GetInput("file").Set(Sdf.AssetPath(new_path + f"?t={time.time()}"))
-    print("texture updated ->", new_path)
+    print(f"texture updated -> {new_path} (rendered in {_render_worker.render_ms:.0f} ms off-loop, "
+          f"{_render_worker.hits} cache hits, {_render_worker.dropped} stale frames dropped)")
 
 # ============================================================
 # Main Process
 # ============================================================
 async def _one_cycle():
-    updated, lines = 0, []
+    updated, trips, suppressed = 0, 0, 0
+    t0, waited = time.perf_counter(), 0.0
     # Define the desired order
-    ordered_attrs = ["溫度", "溫度設定", "電流", "用電量", 
-                 "內部運算_Output", "temp_06", "temp_07", 
+    ordered_attrs = ["溫度", "溫度設定", "電流", "用電量",
+                 "內部運算_Output", "temp_06", "temp_07",
                  "temp_08", "temp_09", "temp_10", "temp_11"]
-    
+
     try:
-        # Get all attributes first
-        all_attrs = {item["Name"]: item["WebId"] for item in get_element_attributes()}
-        
+        # Read every mapped tag (one streamsets round-trip when STREAMSET_READS is on)
+        webids, values, trips = await fetch_element_values()
+        waited = time.perf_counter() - t0
+        values, suppressed = filter_deadband(values)
+
+        # One Sdf.ChangeBlock for every write of the cycle
+        written = write_usd_batch(mapped_updates(values))
+        note_written(values, written)
+
         # Process in your desired order
         for name in ordered_attrs:
-            if name in all_attrs and name in ATTR_MAP:
-                webid = all_attrs[name]
-                val = get_attribute_value(webid)
-                cfg = ATTR_MAP[name]
-                ok, _ = update_usd_prim(cfg["prim_path"], cfg["attribute"], val)
-                if ok:
+            if name in values:
+                val = values[name]
+                if ATTR_MAP[name]["prim_path"] in written:
                     updated += 1
-                    lines.append(f"{DISPLAY.get(name, name)}: {fmt2(val)}")
+                    _current_values[name] = val
     except Exception:
         print(">>> _one_cycle error:\n", traceback.format_exc())
-    # ... rest of function
 
-    if lines:
-        ts = datetime.datetime.now().strftime("%H:%M:%S")
+    if updated:
+        # Tags that did not change keep their last value on the panel
+        lines = [f"{DISPLAY.get(name, name)}: {fmt2(_current_values[name])}"
+                 for name in ordered_attrs if name in _current_values]
+        # Minutes only: the clock is part of the texture key, so seconds would make every panel unique
+        ts = datetime.datetime.now().strftime("%H:%M")
         lines.insert(0, f"PI Sync {ts}")
         try:
             refresh_texture(lines)
         except Exception:
             print(">>> refresh_texture error:\n", traceback.format_exc())
 
-    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] updated {updated} attrs")
+    blocked = time.perf_counter() - t0 - waited
+    print(f"[{datetime.datetime.now().strftime('%H:%M:%S')}] updated {updated} attrs in {trips} round-trips, {suppressed} suppressed by deadband "
+          f"(fetch {waited * 1000:.0f} ms off-loop, loop blocked {blocked * 1000:.0f} ms)")
     return updated
 
 async def _polling_loop(period=POLL_SEC):
     print("Async polling loop started")
     try:
+        subscribe_stage_events()
+        build_handle_table()
         ensure_uv()
         rebuild_material(force=True)
         refresh_texture(["Loading..."])
@@ -322,10 +891,13 @@ def start():
 
 def stop():
     """Stop automatic updates"""
-    global _task
+    global _task, _stage_sub
     if _task and not _task.done():
         _task.cancel()
     _task = None
+    _stage_sub = None
+    if _render_worker:
+        _render_worker.stop()
     print("Stopped.")
 
 def force_refresh():
@@ -345,7 +917,7 @@ def diag():
     stage = get_context().get_stage()
     tex = UsdShade.Shader.Get(stage, f"{MAT_PATH}/Tex")
     print("== Diagnose ==")
-    print("PNG_DIR:", PNG_DIR, "files:", os.listdir(PNG_DIR))
+    print("TEXTURE_DIR:", TEXTURE_DIR, "files:", os.listdir(TEXTURE_DIR))
     print("mat prim exists:", stage.GetPrimAtPath(MAT_PATH).IsValid())
     print("tex node exists:", bool(tex))
     if tex:
@@ -1,4 +1,4 @@
-import requests, urllib3, asyncio, datetime
+import requests, urllib3, asyncio, concurrent.futures, datetime, time
 from decimal import Decimal, ROUND_HALF_UP
 from requests.auth import HTTPBasicAuth
 from omni.usd import get_context
@@ -19,6 +19,7 @@ AUTH     = HTTPBasicAuth(USERNAME, PASSWORD)
 ATTR_URL = ("https://192.168.195.133/piwebapi/elements/"
             "F1Emo1CwofaPqEWTbP-5QLeDbQ7H901dxc8BGNOQAMKUls9QV0lOLVMzM0RDSUlKM0M2XERBVEFCQVNFMVxB5Y2AXOWGt-awo-apnzE"
             "/attributes")
+ELEMENT_WEBID = ATTR_URL.split("/elements/")[1].split("/")[0]
 
 # --- PI attribute name -> USD prim/attribute mapping ---
 ATTR_MAP = {
@@ -39,6 +40,12 @@ DISPLAY = {
 }
 
 POLL_SEC = 30.0  # polling interval (seconds)
+BATCH_READS = True  # read all mapped tags in one /batch call
+STREAMSET_READS = True  # read the whole element in one streamsets call
+UPDATES_MODE = True  # after the first read, fetch only values changed since the last marker
+DEADBAND_ABS = 0.05  # skip USD writes for changes smaller than this...
+DEADBAND_PCT = 0.5  # ...or this percent of the last written value
+MAX_SILENCE_SEC = 300.0  # always write a tag at least this often
 
 # ============================================================
 #  Globals
@@ -51,6 +58,10 @@ _session.verify = False
 _win    = None           # ui.Window instance
 _labels = {}             # {pi_name: ui.Label}
 _task   = None           # asyncio Task handle
+_markers  = {}           # {pi_name: update marker}
+_marker_webids = {}      # {pi_name: webid} registered for updates
+_last_written = {}       # {pi_name: (value, monotonic time)} last value sent to USD
+_executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="pi_fetch")  # keeps HTTP off Kit's loop
 
 # ============================================================
 #  Rounding helpers
@@ -86,10 +97,141 @@ def get_attribute_value(webid):
     r.raise_for_status()
     return r.json()["Value"]
 
+def get_attribute_values_batch(webids):
+    """Read {name: webid} in one /batch call; failed sub-requests fall back to per-tag reads."""
+    body = {name: {"Method": "GET", "Resource": f"{BASE_URL}/streams/{webid}/value"}
+            for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/batch", json=body, timeout=10)
+    r.raise_for_status()
+    results = r.json()
+    values, trips = {}, 1
+    for name, webid in webids.items():
+        sub = results.get(name) or {}
+        content = sub.get("Content")
+        if sub.get("Status") == 200 and isinstance(content, dict) and "Value" in content:
+            values[name] = content["Value"]
+            continue
+        trips += 1
+        try:
+            values[name] = get_attribute_value(webid)
+        except Exception as exc:
+            print(f"Read failed for {name}: {exc}")
+    return values, trips
+
+def read_attribute_values(webids):
+    """Return ({name: value}, round_trips) using the configured read mode."""
+    if BATCH_READS and len(webids) > 1:
+        return get_attribute_values_batch(webids)
+    return {name: get_attribute_value(webid) for name, webid in webids.items()}, len(webids)
+
+def get_element_values():
+    """Current value of every attribute on the element in one streamsets call."""
+    params = {"selectedFields": "Items.Name;Items.WebId;Items.Value.Value;Items.Value.Timestamp"}
+    r = _session.get(f"{BASE_URL}/streamsets/{ELEMENT_WEBID}/value", params=params, timeout=10)
+    r.raise_for_status()
+    return r.json()["Items"]
+
+def read_element_values():
+    """Return ({name: webid}, {name: value}, round_trips) for the tags in ATTR_MAP."""
+    if STREAMSET_READS:
+        try:
+            items = [item for item in get_element_values() if item["Name"] in ATTR_MAP]
+            webids = {item["Name"]: item["WebId"] for item in items}
+            values = {item["Name"]: item["Value"]["Value"] for item in items if item.get("Value")}
+            return webids, values, 1
+        except Exception as exc:
+            print(f"Streamset read failed, falling back to per-attribute reads: {exc}")
+    webids = {item["Name"]: item["WebId"] for item in get_element_attributes() if item["Name"] in ATTR_MAP}
+    values, trips = read_attribute_values(webids)
+    return webids, values, trips + 1
+
+def register_update_markers(webids):
+    """Register {name: webid} for stream updates and remember each stream's marker."""
+    global _markers, _marker_webids
+    names = {webid: name for name, webid in webids.items()}
+    r = _session.post(f"{BASE_URL}/streamsets/updates",
+                      params=[("webId", webid) for webid in webids.values()], timeout=10)
+    r.raise_for_status()
+    _markers = {names[item["Source"]]: item["LatestMarker"] for item in r.json().get("Items", [])
+                if item.get("Status") == "Succeeded" and item.get("Source") in names}
+    _marker_webids = dict(webids)
+
+def get_marker_updates():
+    """Return {name: latest value} for streams that changed since their marker and advance the markers."""
+    names = {marker: name for name, marker in _markers.items()}
+    r = _session.get(f"{BASE_URL}/streamsets/updates",
+                     params=[("marker", marker) for marker in _markers.values()], timeout=10)
+    r.raise_for_status()
+    values = {}
+    for item, marker in zip(r.json().get("Items", []), list(_markers.values())):
+        name = names[marker]
+        if item.get("Status") != "Succeeded":
+            _markers.pop(name, None)  # expired/failed marker: re-read and re-register next cycle
+            continue
+        _markers[name] = item["LatestMarker"]
+        events = item.get("Events") or []
+        if events:
+            values[name] = events[-1]["Value"]
+    return values
+
+def read_changed_values():
+    """Like read_element_values(), but after the first read returns only tags that changed."""
+    if UPDATES_MODE and _markers and len(_markers) == len(_marker_webids):
+        try:
+            return dict(_marker_webids), get_marker_updates(), 1
+        except Exception as exc:
+            print(f"Update markers failed, doing a full read: {exc}")
+            _markers.clear()
+    webids, values, trips = read_element_values()
+    if UPDATES_MODE and webids:
+        try:
+            register_update_markers(webids)
+            trips += 1
+        except Exception as exc:
+            print(f"Update marker registration failed: {exc}")
+    return webids, values, trips
+
+async def fetch_element_values():
+    """Run read_changed_values() on the worker thread so HTTP never blocks Kit's loop."""
+    return await asyncio.get_event_loop().run_in_executor(_executor, read_changed_values)
+
 # ============================================================
 #  USD write helper
 # ============================================================
 
+def filter_deadband(values):
+    """Drop values inside their tag's deadband; returns (values to write, suppressed count).
+
+    An ATTR_MAP entry may carry its own {"deadband": {"abs": ..., "pct": ...}}.
+    """
+    now = time.monotonic()
+    accepted, suppressed = {}, 0
+    for name, val in values.items():
+        try:
+            v = float(val)
+        except (TypeError, ValueError):
+            accepted[name] = val
+            continue
+        last = _last_written.get(name)
+        if last is not None and now - last[1] < MAX_SILENCE_SEC:
+            band = ATTR_MAP.get(name, {}).get("deadband", {})
+            limit = max(band.get("abs", DEADBAND_ABS), abs(last[0]) * band.get("pct", DEADBAND_PCT) / 100.0)
+            if abs(v - last[0]) < limit:
+                suppressed += 1
+                continue
+        accepted[name] = val
+    return accepted, suppressed
+
+def note_written(values, written):
+    """Make the values whose prim is in `written` the deadband reference; call after the write."""
+    now = time.monotonic()
+    for name, val in values.items():
+        if ATTR_MAP[name]["prim_path"] in written:
+            try:
+                _last_written[name] = (float(val), now)
+            except (TypeError, ValueError):
+                pass
+
 def update_usd_prim(prim_path, attr_name, value):
     """Write value to a USD attribute. Create it if missing."""
     stage = get_context().get_stage()
@@ -104,6 +246,40 @@ def update_usd_prim(prim_path, attr_name, value):
     usd_attr.Set(to_float2(value))
     return True, f"{attr_name} : {fmt2(value)}"
 
+def mapped_updates(values):
+    """{name: value} -> {prim_path: {attr: value}} through ATTR_MAP."""
+    updates = {}
+    for name, val in values.items():
+        cfg = ATTR_MAP[name]
+        updates.setdefault(cfg["prim_path"], {})[cfg["attribute"]] = val
+    return updates
+
+def write_usd_batch(updates):
+    """Apply {prim_path: {attr: value}} inside one Sdf.ChangeBlock; returns the prim paths written.
+
+    Prims are validated on the composed stage first; the writes themselves go
+    through Sdf specs on the edit target so missing attributes are created in
+    the same block and Kit sees a single change notice per cycle.
+    """
+    stage = get_context().get_stage()
+    edit_target = stage.GetEditTarget()
+    layer = edit_target.GetLayer()
+    valid = []
+    for prim_path in updates:
+        if stage.GetPrimAtPath(prim_path).IsValid():
+            valid.append(prim_path)
+        else:
+            print(f"Prim not found: {prim_path}")
+    with Sdf.ChangeBlock():
+        for prim_path in valid:
+            prim_spec = Sdf.CreatePrimInLayer(layer, edit_target.MapToSpecPath(Sdf.Path(prim_path)))
+            for attr_name, value in updates[prim_path].items():
+                attr_spec = prim_spec.attributes.get(attr_name)
+                if not attr_spec:
+                    attr_spec = Sdf.AttributeSpec(prim_spec, attr_name, Sdf.ValueTypeNames.Float, declaresCustom=True)
+                attr_spec.default = to_float2(value)
+    return set(valid)
+
 # ============================================================
 #  UI construction & update
 # ============================================================
@@ -152,23 +328,25 @@ def update_label(name, val):
 
 async def _one_cycle():
     """Single fetch-write-update cycle."""
-    updated = 0
+    updated, trips, suppressed = 0, 0, 0
+    t0, waited = time.perf_counter(), 0.0
     try:
-        items = get_element_attributes()
-        for item in items:
-            name, webid = item["Name"], item["WebId"]
-            if name in ATTR_MAP:
-                val = get_attribute_value(webid)
-                cfg = ATTR_MAP[name]
-                ok, _ = update_usd_prim(cfg["prim_path"], cfg["attribute"], val)
-                if ok:
-                    updated += 1
-                    update_label(name, val)
+        webids, values, trips = await fetch_element_values()
+        waited = time.perf_counter() - t0
+        values, suppressed = filter_deadband(values)
+        written = write_usd_batch(mapped_updates(values))
+        note_written(values, written)
+        for name, val in values.items():
+            if ATTR_MAP[name]["prim_path"] in written:
+                updated += 1
+                update_label(name, val)
     except Exception as exc:
         print("Sync error:", exc)
 
+    blocked = time.perf_counter() - t0 - waited
     ts = datetime.datetime.now().strftime("%H:%M:%S")
-    print(f"[{ts}] updated {updated} attrs (manual/loop)")
+    print(f"[{ts}] updated {updated} attrs in {trips} round-trips, {suppressed} suppressed by deadband (manual/loop, "
+          f"fetch {waited * 1000:.0f} ms off-loop, loop blocked {blocked * 1000:.0f} ms)")
     return updated
 
 # Button callback
@@ -0,0 +1,50 @@
+import asyncio
+import importlib.util
+import sys
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+ROOT = Path(__file__).resolve().parents[1]
+MONITOR_V2 = ROOT / "public/samples/MEP_Schneider/MEP_Schneider/Monitor_V2.py"
+SCRIPT_16_09 = ROOT / "Schneider_code/16_09.py"
+STANDALONE = ROOT / "Schneider_code/standalone_pi_updater.py"
+KIT_MODULES = ("omni", "omni.usd", "omni.ui", "omni.kit", "omni.kit.pipapi", "pxr")
+
+
+def _load(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _load_kit_script(name, path):
+    """A Kit script loaded outside Kit: Kit modules are mocks and the start() at import is a no-op"""
+    pytest.importorskip("requests")
+    pytest.importorskip("numpy")
+    pytest.importorskip("PIL")
+    kit = {name: mock.MagicMock() for name in KIT_MODULES}
+    with mock.patch.dict(sys.modules, kit), \
+            mock.patch.object(asyncio, "ensure_future", side_effect=lambda coro: coro.close()):
+        return _load(name, path)
+
+
+@pytest.fixture(scope="session")
+def monitor():
+    return _load_kit_script("Monitor_V2", MONITOR_V2)
+
+
+@pytest.fixture(scope="session")
+def script_16_09():
+    return _load_kit_script("pi_16_09", SCRIPT_16_09)
+
+
+@pytest.fixture(scope="session")
+def standalone():
+    """standalone_pi_updater with the real pxr (usd-core)"""
+    pytest.importorskip("pxr")
+    pytest.importorskip("requests")
+    pytest.importorskip("PIL")
+    return _load("standalone_pi_updater", STANDALONE)
@@ -0,0 +1,58 @@
+from unittest import mock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+requests = pytest.importorskip("requests")
+
+
+@pytest.mark.parametrize("atlas", [False, True])
+def test_incremental_values_match_full_redraw(script_16_09, atlas):
+    m = script_16_09
+    base = m._draw_chrome(m.IMG_SIZE)
+    canvas = m.PanelCanvas(base, atlas=atlas)
+    names = m.ORDERED_ATTRS
+    frames = [
+        ({}, "10:00:00"),
+        ({names[0]: 21.5, names[1]: 22.0}, "10:00:30"),
+        ({names[0]: 1021.55, names[1]: 22.0, names[2]: -4.07}, "10:01:00"),
+        ({names[0]: 1.0, names[2]: -4.07}, "10:01:00"),       # a value goes back to N/A
+        ({name: 25.0 + i * 2.5 for i, name in enumerate(names)}, "10:01:30"),
+    ]
+    for values, timestamp in frames:
+        incremental = m._render_values(values, timestamp, canvas)
+        full = m._render_values(values, timestamp, m.PanelCanvas(base, atlas=atlas))
+        assert np.array_equal(np.asarray(incremental), np.asarray(full)), (values, timestamp)
+
+
+def test_non_batch_read_records_404_and_keeps_other_tags(script_16_09, monkeypatch):
+    m = script_16_09
+    monkeypatch.setattr(m, "BATCH_READS", False)
+    monkeypatch.setattr(m, "_not_found", set())
+    missing = requests.Response()
+    missing.status_code = 404
+
+    def get(url, timeout):
+        response = mock.MagicMock()
+        if "/streams/W2/" in url:
+            response.raise_for_status.side_effect = requests.HTTPError("404", response=missing)
+        response.json.return_value = {"Value": 1.5}
+        return response
+
+    with mock.patch.object(m._session, "get", side_effect=get):
+        values, trips = m.read_attribute_values({"a": "W1", "b": "W2"})
+
+    assert (values, trips) == ({"a": 1.5}, 2)
+    assert m._not_found == {"b"}
+
+
+def test_non_batch_read_raises_other_http_errors(script_16_09, monkeypatch):
+    m = script_16_09
+    monkeypatch.setattr(m, "BATCH_READS", False)
+    failing = requests.Response()
+    failing.status_code = 500
+    response = mock.MagicMock()
+    response.raise_for_status.side_effect = requests.HTTPError("500", response=failing)
+
+    with mock.patch.object(m._session, "get", return_value=response), pytest.raises(requests.HTTPError):
+        m.read_attribute_values({"a": "W1"})
@@ -0,0 +1,57 @@
+import pytest
+
+
+@pytest.fixture
+def tag(monitor, monkeypatch):
+    """A mapped tag with the default deadband and no value written yet"""
+    name = next(n for n in monitor.ATTR_MAP if "deadband" not in monitor.ATTR_MAP[n])
+    monkeypatch.setattr(monitor, "_last_written", {})
+    monkeypatch.setattr(monitor, "DEADBAND_ABS", 0.05)
+    monkeypatch.setattr(monitor, "DEADBAND_PCT", 0.5)
+    monkeypatch.setattr(monitor, "MAX_SILENCE_SEC", 300.0)
+    return name
+
+
+def test_value_not_written_is_not_a_deadband_reference(monitor, tag):
+    accepted, _ = monitor.filter_deadband({tag: 20.0})
+    monitor.note_written(accepted, set())          # prim missing: nothing written
+
+    assert monitor.filter_deadband({tag: 20.01}) == ({tag: 20.01}, 0)
+
+
+def test_written_value_suppresses_small_changes(monitor, tag):
+    accepted, _ = monitor.filter_deadband({tag: 20.0})
+    monitor.note_written(accepted, {monitor.ATTR_MAP[tag]["prim_path"]})
+
+    assert monitor.filter_deadband({tag: 20.01}) == ({}, 1)
+
+
+def test_percent_band_of_large_values(monitor, tag):
+    monitor.note_written({tag: 1000.0}, {monitor.ATTR_MAP[tag]["prim_path"]})
+
+    # 0.5 % of 1000 is 5, well above the 0.05 absolute band
+    assert monitor.filter_deadband({tag: 1004.0}) == ({}, 1)
+    assert monitor.filter_deadband({tag: 1005.0}) == ({tag: 1005.0}, 0)
+
+
+def test_per_tag_band_overrides_the_defaults(monitor, tag, monkeypatch):
+    monkeypatch.setitem(monitor.ATTR_MAP, tag, dict(monitor.ATTR_MAP[tag], deadband={"abs": 1.0, "pct": 0.0}))
+    monitor.note_written({tag: 20.0}, {monitor.ATTR_MAP[tag]["prim_path"]})
+
+    assert monitor.filter_deadband({tag: 20.9}) == ({}, 1)
+    assert monitor.filter_deadband({tag: 21.0}) == ({tag: 21.0}, 0)
+
+
+def test_silent_tag_is_written_after_max_silence(monitor, tag, monkeypatch):
+    monitor.note_written({tag: 20.0}, {monitor.ATTR_MAP[tag]["prim_path"]})
+    now = monitor.time.monotonic()
+    monkeypatch.setattr(monitor.time, "monotonic", lambda: now + 301.0)
+
+    assert monitor.filter_deadband({tag: 20.0}) == ({tag: 20.0}, 0)
+
+
+def test_non_numeric_values_pass_through(monitor, tag):
+    monitor.note_written({tag: 20.0}, {monitor.ATTR_MAP[tag]["prim_path"]})
+    state = {"Name": "Shutdown", "Value": 0}
+
+    assert monitor.filter_deadband({tag: state}) == ({tag: state}, 0)
@@ -0,0 +1,82 @@
+from unittest import mock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _recorded_server(monitor, events):
+    """session.get stand-in serving `events` [(epoch, value)] as PI recorded pages"""
+    def get(url, params, timeout):
+        start = monitor.parse_pi_time(params["startTime"])
+        end = monitor.parse_pi_time(params["endTime"])
+        page = [(t, v) for t, v in events if start <= t <= end][:params["maxCount"]]
+        response = mock.MagicMock()
+        response.json.return_value = {"Items": [{"Timestamp": monitor._pi_time(t), "Value": v} for t, v in page]}
+        return response
+    return get
+
+
+@pytest.mark.parametrize("page_size", [2, 3, 100])
+def test_recorded_paging_keeps_events_sharing_a_timestamp(monitor, monkeypatch, page_size):
+    monkeypatch.setattr(monitor, "HISTORY_PAGE_SIZE", page_size)
+    t0 = 1_700_000_000.0
+    # Small pages end inside, or consist only of, runs of equal timestamps
+    events = [(t0, 1.0), (t0 + 1, 2.0), (t0 + 1, 3.0), (t0 + 1, 4.0), (t0 + 2, 5.0),
+              (t0 + 2, 6.0), (t0 + 3, {"Name": "Bad"}), (t0 + 3, 7.0), (t0 + 4, 8.0)]
+    with mock.patch.object(monitor._session, "get", side_effect=_recorded_server(monitor, events)):
+        ts, vals = monitor._recorded_slice("W1", t0, t0 + 10)
+
+    assert vals == [1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0]
+    assert ts == [t0, t0 + 1, t0 + 1, t0 + 1, t0 + 2, t0 + 2, t0 + 3, t0 + 4]
+
+
+def _expected(n, cap):
+    ts = np.arange(n, dtype=np.float64)[-cap:] + 1_700_000_000.0
+    return ts, (ts - 1_700_000_000.0).astype(np.float32) * 0.5
+
+
+@pytest.mark.parametrize("n", [0, 3, 8, 9, 21])
+def test_history_ring_append_wraps_around(monitor, n):
+    ring = monitor.HistoryRing(capacity=8)
+    for t in range(n):
+        ring.append(1_700_000_000.0 + t, t * 0.5)
+
+    ts, vals = ring.view()
+    want_ts, want_vals = _expected(n, 8)
+    np.testing.assert_array_equal(ts, want_ts)
+    np.testing.assert_array_equal(vals, want_vals)
+    assert len(ring) == min(n, 8)
+    assert ring.last_time() == (want_ts[-1] if n else None)
+
+
+@pytest.mark.parametrize("chunks", [[5, 5], [3, 20], [7, 1, 1, 1], [30]])
+def test_history_ring_extend_matches_append(monitor, chunks):
+    ring = monitor.HistoryRing(capacity=8)
+    all_ts, _ = _expected(sum(chunks), sum(chunks))
+    pos = 0
+    for size in chunks:
+        ts = all_ts[pos:pos + size]
+        ring.extend(ts, ((ts - 1_700_000_000.0) * 0.5).astype(np.float32))
+        pos += size
+
+    want_ts, want_vals = _expected(sum(chunks), 8)
+    ts, vals = ring.view()
+    np.testing.assert_array_equal(ts, want_ts)
+    np.testing.assert_array_equal(vals, want_vals)
+
+
+def test_history_ring_window_trim_and_stats_across_the_wrap(monitor):
+    ring = monitor.HistoryRing(capacity=8)
+    for t in range(13):                         # holds 5..12, stored across the wrap
+        ring.append(float(t), float(t))
+
+    ts, vals = ring.window(7.0, 10.0)
+    np.testing.assert_array_equal(ts, [7.0, 8.0, 9.0, 10.0])
+    stats = ring.stats(7.0, 10.0)
+    assert (stats["min"], stats["max"], stats["mean"], stats["count"]) == (7.0, 10.0, 8.5, 4)
+    assert stats["slope_per_hour"] == pytest.approx(3600.0)
+
+    ring.trim_before(9.0)
+    np.testing.assert_array_equal(ring.view()[0], [9.0, 10.0, 11.0, 12.0])
+    assert ring.stats(0.0, 1.0) is None
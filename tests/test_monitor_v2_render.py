@@ -0,0 +1,67 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _frames(monitor, name):
+    """Panel states for one row whose long label runs under the status box and the value column"""
+    info = monitor.ATTR_MAP[name]["info"]
+    high, low = info["critical_high"], info["critical_low"]
+    font, _ = monitor._ensure_fonts()
+    label = monitor.DISPLAY[name]
+    while font.getlength(label + ":") < 420:
+        label = "Long " + label
+    frames = []
+    for value in (high - 1.0, high + 1.0, high + 2.0, low - 1.0, high - 1.0):
+        frames.append(([f"{label}: {monitor.fmt2(value)}", f"{monitor.DISPLAY[name]}: {monitor.fmt2(value)}"],
+                       {name: value}))
+    frames.append(([f"{monitor.DISPLAY[name]}: 1.00"], {name: 1.0}))   # the first row goes away
+    frames.append(([f"{label}: 2.00"], {name: 2.0}))                    # and comes back
+    return frames
+
+
+@pytest.mark.parametrize("atlas", [False, True])
+def test_incremental_render_matches_full_redraw(monitor, atlas):
+    name = next(n for n in monitor.DISPLAY if {"critical_high", "critical_low"} <= set(monitor.ATTR_MAP[n]["info"]))
+    base = monitor._draw_enhanced_chrome(monitor.IMG_SIZE)
+    canvas = monitor.PanelCanvas(base, atlas=atlas)
+    for lines, values in _frames(monitor, name):
+        incremental = monitor._render_enhanced(lines, canvas, values)
+        full = monitor._render_enhanced(lines, monitor.PanelCanvas(base, atlas=atlas), values)
+        diff = np.abs(np.asarray(incremental, np.int16) - np.asarray(full, np.int16))
+        assert int((diff.max(axis=2) > 0).sum()) == 0, lines
+
+
+def test_changed_cell_redraws_overlapping_neighbour(monitor):
+    base = monitor.Image.new("RGBA", (60, 20), (0, 0, 0, 255))
+    canvas = monitor.PanelCanvas(base)
+    wide = lambda d: d.rectangle((0, 0, 40, 19), fill=(255, 255, 255, 255))
+    canvas.cell("wide", (0, 0, 41, 20), 1, wide)
+    canvas.cell("dot", (30, 5, 36, 11), "red", lambda d: d.rectangle((30, 5, 35, 10), fill=(255, 0, 0, 255)))
+    canvas.cell("dot", (30, 5, 36, 11), "green", lambda d: d.rectangle((30, 5, 35, 10), fill=(0, 255, 0, 255)))
+
+    full = base.copy()
+    draw = monitor.ImageDraw.Draw(full)
+    wide(draw)
+    draw.rectangle((30, 5, 35, 10), fill=(0, 255, 0, 255))
+    assert np.array_equal(np.asarray(canvas.img), np.asarray(full))
+
+
+def _font(monitor, size=42):
+    try:
+        return monitor.ImageFont.load_default(size)
+    except TypeError:                           # Pillow < 10.1 has only the bitmap font
+        pytest.skip("needs a scalable default font")
+
+
+@pytest.mark.parametrize("text", ["23.50", "-4.07", "1013.25 kWh", "0.00 °C"])
+def test_glyph_atlas_matches_imagedraw_at_fractional_origins(monitor, text):
+    font = _font(monitor)
+    atlas = monitor.GlyphAtlas(font)
+    base = monitor.Image.new("RGBA", (400, 120), (0, 0, 0, 180))
+    for xy in ((40, 30), (40.5, 30), (40.25, 30.5), (41.75, 30.75), (-3.5, 30.5)):
+        ref, blit = base.copy(), base.copy()
+        monitor.ImageDraw.Draw(ref).text(xy, text, fill=(150, 255, 150, 255), font=font)
+        placed, box = atlas.layout(xy, text)
+        atlas.blit(blit, placed, box, (150, 255, 150, 255))
+        assert np.array_equal(np.asarray(ref), np.asarray(blit)), xy
@@ -0,0 +1,101 @@
+from unittest import mock
+
+import pytest
+
+requests = pytest.importorskip("requests")
+
+
+def _response(payload):
+    response = mock.MagicMock()
+    response.json.return_value = payload
+    return response
+
+
+@pytest.fixture
+def tags(monitor, monkeypatch):
+    """Two mapped tags with webids and update markers, as after the first full read"""
+    a, b = list(monitor.ATTR_MAP)[:2]
+    webids = {a: "WA", b: "WB"}
+    monkeypatch.setattr(monitor, "UPDATES_MODE", True)
+    monkeypatch.setattr(monitor, "STREAMSET_READS", True)
+    monkeypatch.setattr(monitor, "_webids", dict(webids))
+    monkeypatch.setattr(monitor, "_marker_webids", dict(webids))
+    monkeypatch.setattr(monitor, "_markers", {a: "mA0", b: "mB0"})
+    monkeypatch.setattr(monitor, "_not_found", set())
+    return a, b
+
+
+def _element(values):
+    return _response({"Items": [{"Name": name, "WebId": webid, "Value": {"Value": value}}
+                                for name, (webid, value) in values.items()]})
+
+
+def _registration(webids):
+    return _response({"Items": [{"Status": "Succeeded", "Source": webid, "LatestMarker": f"new-{webid}"}
+                                for webid in webids]})
+
+
+def test_scheduled_read_uses_due_markers_only(monitor, tags):
+    a, b = tags
+    update = {"Status": "Succeeded", "LatestMarker": "mA1", "Events": [{"Value": 1.0}, {"Value": 2.5}]}
+    with mock.patch.object(monitor._session, "get", return_value=_response({"Items": [update]})) as get:
+        webids, values, trips = monitor.read_scheduled_values([a])
+
+    assert get.call_args.args[0].endswith("/streamsets/updates")
+    assert get.call_args.kwargs["params"] == [("marker", "mA0")]
+    assert (webids, values, trips) == ({a: "WA"}, {a: 2.5}, 1)
+    assert monitor._markers == {a: "mA1", b: "mB0"}
+
+
+def test_scheduled_read_without_marker_reads_and_registers_that_tag(monitor, tags):
+    a, b = tags
+    monitor._markers.pop(b)
+    value = _response({"Value": 2.0})
+    with mock.patch.object(monitor._session, "get", return_value=value) as get, \
+            mock.patch.object(monitor._session, "post", return_value=_registration(["WB"])) as post:
+        webids, values, trips = monitor.read_scheduled_values([b])
+
+    assert get.call_args.args[0].endswith("/streams/WB/value")
+    assert post.call_args.kwargs["params"] == [("webId", "WB")]
+    assert (webids, values, trips) == ({b: "WB"}, {b: 2.0}, 2)
+    assert monitor._markers == {a: "mA0", b: "new-WB"}
+
+
+def test_missing_tag_leaves_the_schedule(monitor, tags, monkeypatch):
+    a, b = tags
+    monitor._markers.pop(b)
+    missing = requests.Response()
+    missing.status_code = 404
+    gone = _response({})
+    gone.raise_for_status.side_effect = requests.HTTPError("404", response=missing)
+    with mock.patch.object(monitor._session, "get", return_value=gone), \
+            mock.patch.object(monitor._session, "post") as post:
+        webids, values, trips = monitor.read_scheduled_values([b])
+
+    assert values == {} and monitor._not_found == {b}
+    post.assert_not_called()
+    monkeypatch.setattr(monitor, "_schedule", [(0.0, a), (0.0, b)])
+    assert monitor.pop_due_tags(1.0) == [a]
+    assert [name for _, name in monitor._schedule] == [a]
+
+
+def test_first_read_records_tags_the_element_does_not_list(monitor, tags, monkeypatch):
+    a, b = tags
+    monkeypatch.setattr(monitor, "_webids", {})
+    with mock.patch.object(monitor._session, "get", return_value=_element({a: ("WA", 1.0)})), \
+            mock.patch.object(monitor._session, "post", return_value=_registration(["WA"])):
+        webids, values, trips = monitor.read_scheduled_values([a, b])
+
+    assert values == {a: 1.0}
+    assert b in monitor._not_found and a not in monitor._not_found
+
+
+def test_full_read_ignores_markers(monitor, tags):
+    a, b = tags
+    with mock.patch.object(monitor._session, "get", return_value=_element({a: ("WA", 1.0), b: ("WB", 2.0)})) as get, \
+            mock.patch.object(monitor._session, "post", return_value=_registration(["WA", "WB"])):
+        webids, values, trips = monitor.read_changed_values(full=True)
+
+    assert "/streamsets/updates" not in get.call_args.args[0]
+    assert (webids, values, trips) == ({a: "WA", b: "WB"}, {a: 1.0, b: 2.0}, 2)
+    assert monitor._markers == {a: "new-WA", b: "new-WB"}
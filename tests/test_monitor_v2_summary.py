@@ -0,0 +1,64 @@
+from unittest import mock
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+
+def _summary_response(items):
+    response = mock.MagicMock()
+    response.json.return_value = {"Items": items}
+    return response
+
+
+def _item(kind, timestamp, value):
+    return {"Type": kind, "Value": {"Timestamp": timestamp, "Value": value}}
+
+
+def test_summary_bands_request(monitor):
+    with mock.patch.object(monitor._session, "get", return_value=_summary_response([])) as get:
+        monitor.get_summary_bands("W1", hours=24, intervals=24, end_time=1_700_000_000.0)
+
+    url = get.call_args.args[0]
+    params = get.call_args.kwargs["params"]
+    assert url == f"{monitor.BASE_URL}/streams/W1/summary"
+    assert [v for k, v in params if k == "summaryType"] == ["Minimum", "Average", "Maximum"]
+    assert dict(params)["summaryDuration"] == "3600s"
+
+
+def test_summary_bands_duration_is_at_least_a_second(monitor):
+    with mock.patch.object(monitor._session, "get", return_value=_summary_response([])) as get:
+        monitor.get_summary_bands("W1", hours=60 / 3600, intervals=300, end_time=1_700_000_000.0)
+
+    assert dict(get.call_args.kwargs["params"])["summaryDuration"] == "1s"
+
+
+def test_summary_bands_parse_each_type(monitor):
+    items = [
+        _item("Minimum", "2023-11-14T22:13:20Z", 20.5),
+        _item("Average", "2023-11-14T22:13:20Z", 21.0),
+        _item("Maximum", "2023-11-14T22:13:20Z", 22.25),
+        _item("Minimum", "2023-11-14T23:13:20.5Z", 19.0),
+        _item("Average", "2023-11-14T23:13:20.5Z", {"Name": "Shutdown"}),  # digital state, dropped
+        _item("Maximum", "2023-11-14T23:13:20.5Z", 23.0),
+        _item("Total", "2023-11-14T23:13:20Z", 99.0),                     # not requested, ignored
+    ]
+    with mock.patch.object(monitor._session, "get", return_value=_summary_response(items)):
+        bands = monitor.get_summary_bands("W1", hours=2, intervals=2, end_time=1_700_006_400.0)
+
+    assert set(bands) == {"Minimum", "Average", "Maximum"}
+    ts, vals = bands["Minimum"]
+    assert ts.dtype == np.float64 and vals.dtype == np.float32
+    np.testing.assert_array_equal(ts, [1_700_000_000.0, 1_700_003_600.5])
+    np.testing.assert_array_equal(vals, [20.5, 19.0])
+    np.testing.assert_array_equal(bands["Average"][1], [21.0])
+    np.testing.assert_array_equal(bands["Maximum"][1], [22.25, 23.0])
+
+
+def test_historical_summaries_mode_returns_average(monitor):
+    items = [_item("Average", "2023-11-14T22:13:20Z", 21.0)]
+    with mock.patch.object(monitor._session, "get", return_value=_summary_response(items)) as get:
+        ts, vals = monitor.get_historical_data("W1", hours=1, end_time=1_700_003_600.0, mode="summaries")
+
+    assert get.call_args.args[0].endswith("/streams/W1/summary")
+    np.testing.assert_array_equal(vals, [21.0])
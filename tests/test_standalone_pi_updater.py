@@ -0,0 +1,62 @@
+from unittest import mock
+
+import pytest
+
+
+@pytest.fixture
+def updater(standalone, tmp_path):
+    """StandalonePIMonitor on a main file that defines only the "temperature" prim"""
+    from pxr import Usd
+
+    main = tmp_path / "plant.usda"
+    stage = Usd.Stage.CreateNew(str(main))
+    prim_path = "/World/Panel/Mesh"
+    stage.DefinePrim(prim_path, "Mesh")
+    stage.GetRootLayer().Save()
+    monitor = standalone.StandalonePIMonitor(main)
+    monitor.ATTR_MAP = {
+        "temperature": {"prim_path": prim_path, "attribute": "temp_01"},
+        "Current": {"prim_path": "/World/Missing/Mesh", "attribute": "temp_04"},
+    }
+    monitor.ORDERED_ATTRS = ["temperature", "Current"]
+    monitor.OPEN_MASKED = False
+    return monitor
+
+
+def test_write_values_skips_missing_prims_and_authors_custom_attributes(updater):
+    stage = updater.open_stage()
+    values, _ = updater.filter_deadband({"temperature": 21.5, "Current": 3.0})
+    written = updater.write_values(stage, values)
+
+    assert written == {"temperature": 21.5}
+    spec = updater._live_layer.GetAttributeAtPath("/World/Panel/Mesh.temp_01")
+    assert spec.default == pytest.approx(21.5) and spec.custom
+    # The skipped tag is not a deadband reference, so its next small change still goes through
+    assert set(updater._last_written) == {"temperature"}
+    assert updater.filter_deadband({"temperature": 21.51, "Current": 3.01}) == ({"Current": 3.01}, 1)
+
+
+def test_fallback_values_are_not_kept_after_pi_recovers(updater):
+    updater.open_stage()
+    updater._last_values = {"temperature": 21.0, "Current": 3.0}
+    shown = []
+    updater.create_display_texture = lambda values, timestamp: shown.append(dict(values))
+    updater.setup_material_and_uv = lambda stage: None
+    updater.read_changed_values = mock.Mock(side_effect=[RuntimeError("PI down"),
+                                                         ({}, {"temperature": 21.5}, 1)])
+    updater.one_cycle()
+    updater.one_cycle()
+
+    assert shown[0] == {"temperature": 25.0, "Current": 27.5}
+    assert shown[1] == {"temperature": 21.5, "Current": 3.0}
+    assert updater._last_values == {"temperature": 21.5, "Current": 3.0}
+
+
+def test_clip_discovery_skips_stray_files(updater):
+    updater.CLIP_DIR.mkdir()
+    for name in ("plant_20260101_05.usdc", "plant_20260101_04.usdc", "plant_20260101_04 copy.usdc",
+                 "plant_backup.usdc"):
+        (updater.CLIP_DIR / name).touch()
+
+    assert [path.name for _, path in updater._clip_files()] == ["plant_20260101_04.usdc",
+                                                                "plant_20260101_05.usdc"]